@@ -0,0 +1,181 @@
+"""
+Admin commands - diagnostics and hot reloading for the running bot
+"""
+
+import time
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.catalog import catalog
+from utils.helpers import create_embed, create_error_embed, create_success_embed, format_number, is_admin
+from utils.profiling import ProfilerBusy
+
+
+class Admin(commands.Cog):
+    """Commands restricted to Config.ADMIN_IDS"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = bot.db
+        # owned by the bot so a running profile survives reloading this cog
+        self.cpu_profiler = bot.cpu_profiler
+        self.memory = bot.memory_tracker
+        
+    async def cog_check(self, ctx: commands.Context) -> bool:
+        """Every command in this cog is admin only"""
+        return is_admin(ctx.author.id)
+        
+    def report_embed(self, title: str, path: str, lines: list) -> discord.Embed:
+        """Embed with a profiler summary and where the full output was written"""
+        body = "\n".join(lines) or "(nothing recorded)"
+        # leave room for the path inside the 4096 character description limit
+        return create_embed(
+            title=title,
+            description=f"```\n{body[:3800]}\n```\nSaved to `{path}`",
+            color=discord.Color.dark_grey()
+        )
+        
+    @commands.hybrid_command(name="reload")
+    @app_commands.describe(target="A cog name (e.g. economy), 'cogs' for all of them, or 'config' for game data")
+    async def reload(self, ctx: commands.Context, target: str):
+        """Hot reload a cog or the game data without restarting"""
+        target = target.lower()
+        
+        if target == "config":
+            try:
+                tables = await self.bot.reload_game_data()
+            except Exception as e:
+                await ctx.send(embed=create_error_embed("Reload Failed", f"Kept the current game data.\n`{e}`"))
+                return
+            await ctx.send(embed=create_success_embed(
+                "Game Data Reloaded",
+                f"Replaced: {', '.join(f'`{table}`' for table in tables) or 'nothing (no overrides in the file)'}"
+            ))
+            return
+            
+        if target == "cogs":
+            names = [name for name in self.bot.extensions if name.startswith("cogs.")]
+        else:
+            names = [f"cogs.{target}"]
+            if names[0] not in self.bot.extensions:
+                await ctx.send(embed=create_error_embed("Unknown Cog", f"`{names[0]}` is not loaded."))
+                return
+                
+        # reload_extension rolls back to the old module if the new one fails to load
+        failed = []
+        for name in names:
+            try:
+                await self.bot.reload_extension(name)
+            except commands.ExtensionError as e:
+                failed.append(f"`{name}`: {e.__cause__ or e}")
+                
+        if failed:
+            await ctx.send(embed=create_error_embed("Reload Failed", "\n".join(failed)))
+            return
+        await ctx.send(embed=create_success_embed("Reloaded", ", ".join(f"`{name}`" for name in names)))
+        
+    @commands.hybrid_command(name="economy")
+    @app_commands.describe(refresh="Take a new valuation snapshot first")
+    async def economy(self, ctx: commands.Context, refresh: bool = False):
+        """Whole-economy statistics from the latest valuation snapshot"""
+        valuation = self.bot.valuation.snapshot()
+        if refresh or valuation is None:
+            valuation = await self.bot.valuation.refresh(self.db.db_path)
+            
+        stats = valuation.stats
+        if not stats['users']:
+            await ctx.send(embed=create_error_embed("Economy", "Nobody has any money yet."))
+            return
+            
+        items = catalog()
+        supply = sorted(
+            ((items.price(item_id) * quantity, item_id, quantity) for item_id, quantity in valuation.supply.items()),
+            reverse=True
+        )[:5]
+        
+        description = f"Users: **{format_number(stats['users'])}**\n"
+        description += f"Total net worth: **⏣{format_number(stats['total'])}**\n"
+        description += f"Median: ⏣{format_number(stats['median'])} | p99: ⏣{format_number(stats['p99'])}\n"
+        description += f"Top 1% own **{stats['top_1pct_share']:.1%}** | Gini **{stats['gini']:.3f}**\n"
+        description += "\n**Most valuable items in circulation:**\n"
+        for value, item_id, quantity in supply:
+            item = items.by_id(item_id)
+            description += f"{item.name if item else item_id} x{format_number(quantity)} | ⏣{format_number(value)}\n"
+            
+        jumps = self.bot.valuation.last_jumps
+        if jumps:
+            description += f"\n**Net worth jumps since the previous snapshot ({len(jumps)}):**\n"
+            for user_id, before, after in jumps[:5]:
+                description += f"<@{user_id}> ⏣{format_number(before)} → ⏣{format_number(after)}\n"
+                
+        embed = create_embed("📊 Economy", description)
+        embed.set_footer(text=(
+            f"Snapshot {int(time.time() - valuation.taken_at)}s old, "
+            f"took {valuation.elapsed * 1000:.0f}ms ({valuation.backend})"
+        ))
+        await ctx.send(embed=embed)
+        
+    @commands.hybrid_group(name="profile", invoke_without_command=True)
+    async def profile(self, ctx: commands.Context):
+        """Profile the running bot (admin only)"""
+        await ctx.send(embed=create_error_embed(
+            "Profile",
+            "Use `profile cpu [seconds]`, `profile sample [seconds]` or `profile memory <start|snapshot|stop>`"
+        ))
+        
+    @profile.command(name="cpu")
+    @app_commands.describe(seconds="How long to profile (1-300)")
+    async def profile_cpu(self, ctx: commands.Context, seconds: int = 30):
+        """Run cProfile over the event loop for a while and save the pstats file"""
+        seconds = max(1, min(seconds, 300))
+        await ctx.send(f"⏱️ Profiling for {seconds}s...")
+        
+        try:
+            path, lines = await self.cpu_profiler.profile(seconds)
+        except ProfilerBusy as e:
+            await ctx.send(embed=create_error_embed("Busy", str(e)))
+            return
+            
+        await ctx.send(embed=self.report_embed("CPU profile (cumulative)", path, lines))
+        
+    @profile.command(name="sample")
+    @app_commands.describe(seconds="How long to sample (1-600)")
+    async def profile_sample(self, ctx: commands.Context, seconds: int = 60):
+        """Sample the event loop's stack for a while and save folded stacks"""
+        seconds = max(1, min(seconds, 600))
+        await ctx.send(f"⏱️ Sampling for {seconds}s...")
+        
+        try:
+            path, lines = await self.cpu_profiler.sample(seconds)
+        except ProfilerBusy as e:
+            await ctx.send(embed=create_error_embed("Busy", str(e)))
+            return
+            
+        await ctx.send(embed=self.report_embed("Sampled profile (self time)", path, lines))
+        
+    @profile.command(name="memory")
+    @app_commands.describe(action="start, snapshot or stop")
+    async def profile_memory(self, ctx: commands.Context, action: str = "snapshot"):
+        """Trace allocations and diff snapshots to find what keeps growing"""
+        action = action.lower()
+        
+        if action == "start":
+            self.memory.start()
+            await ctx.send("🧠 Memory tracing started. Take a `snapshot` now and another one later to diff them.")
+        elif action == "stop":
+            self.memory.stop()
+            await ctx.send("🧠 Memory tracing stopped.")
+        elif action == "snapshot":
+            if not self.memory.tracing:
+                await ctx.send(embed=create_error_embed("Not Tracing", "Run `profile memory start` first."))
+                return
+            path, lines = await self.memory.snapshot()
+            await ctx.send(embed=self.report_embed("Memory snapshot", path, lines))
+        else:
+            await ctx.send(embed=create_error_embed("Invalid Action", "Use `start`, `snapshot` or `stop`."))
+
+
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
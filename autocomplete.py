@@ -0,0 +1,159 @@
+"""
+Autocomplete index - a prefix trie with a trigram fallback for typos
+
+Built once from the catalog (and rebuilt on game data reloads), so answering
+an autocomplete request is a walk down the trie instead of a scan over every
+item name.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils import catalog
+from utils.config import Config
+
+# discord's limit on autocomplete choices
+MAX_CHOICES = 25
+
+_EMOJI = re.compile(r'<a?:\w+:\d+>|:\w+:')
+_NON_WORD = re.compile(r'[^a-z0-9 ]+')
+
+
+def normalize(text: str) -> str:
+    """Lower-case words only - emoji, custom emoji and punctuation removed"""
+    words = ' '.join(_NON_WORD.sub('', _EMOJI.sub(' ', text.lower())).split())
+    # a query that is only an emoji code (":bone:") means the word in it
+    return words or ' '.join(_NON_WORD.sub(' ', text.lower()).split())
+
+
+def display_name(name: str) -> str:
+    """Item name as autocomplete can show it - :emoji: codes don't render there"""
+    return ' '.join(_EMOJI.sub(' ', name).split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Node:
+    __slots__ = ('children', 'entries')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        # every entry with a term starting here, best first
+        self.entries: List[int] = []
+
+
+class PrefixIndex:
+    """
+    Completes (value, label) entries from a prefix of the value, the label or
+    any word of the label. Misspellings fall back to trigram similarity.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self.values: List[str] = []
+        self.labels: List[str] = []
+        self.root = _Node()
+        self.trigrams: Dict[str, List[int]] = {}
+        self.terms: List[Set[str]] = []
+
+        for index, (value, label) in enumerate(entries):
+            self.values.append(value)
+            self.labels.append(label)
+            name = normalize(label)
+            terms = {value.lower(), name, *name.split()} - {''}
+            self.terms.append(terms)
+            for term in terms:
+                self._insert(term, index)
+            for gram in set().union(*(_trigrams(term) for term in terms)):
+                self.trigrams.setdefault(gram, []).append(index)
+
+        self.by_value = {value.lower(): index for index, value in enumerate(self.values)}
+
+    def _insert(self, term: str, index: int):
+        node = self.root
+        for char in term:
+            node = node.children.setdefault(char, _Node())
+            # entries arrive in order and each term adds it once per node
+            if not node.entries or node.entries[-1] != index:
+                node.entries.append(index)
+
+    def _prefix(self, text: str) -> List[int]:
+        node = self.root
+        for char in text:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.entries if text else list(range(len(self.values)))
+
+    def _fuzzy(self, text: str, minimum: float = 0.3) -> List[int]:
+        """Entries by trigram similarity to their closest term, best first"""
+        grams = _trigrams(text)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for index in self.trigrams.get(gram, ()):
+                shared[index] = shared.get(index, 0) + 1
+
+        scored = []
+        for index, count in shared.items():
+            # Dice coefficient against the entry's best matching term
+            score = max(2 * len(grams & _trigrams(term)) / (len(grams) + len(_trigrams(term))) for term in self.terms[index])
+            if score >= minimum:
+                scored.append((-score, index))
+        return [index for _, index in sorted(scored)]
+
+    def complete(
+        self,
+        text: str,
+        limit: int = MAX_CHOICES,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, str]]:
+        """Up to `limit` (value, label) pairs matching `text`, prefix matches first"""
+        query = normalize(text)
+        matches = self._prefix(query)
+        if not matches and query:
+            matches = self._fuzzy(query)
+
+        results = []
+        for index in matches:
+            if accept is None or accept(self.values[index]):
+                results.append((self.values[index], self.labels[index]))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def resolve(self, text: str) -> Optional[str]:
+        """The value `text` most likely means: an exact value, a unique prefix or the closest spelling"""
+        query = normalize(text)
+        if query.replace(' ', '') in self.by_value:
+            return self.values[self.by_value[query.replace(' ', '')]]
+        if not query:
+            return None
+
+        matches = self._prefix(query)
+        if len(matches) == 1:
+            return self.values[matches[0]]
+        if not matches:
+            fuzzy = self._fuzzy(query, minimum=0.5)
+            if fuzzy:
+                return self.values[fuzzy[0]]
+        return None
+
+
+# swapped in one assignment
+_items: Optional[PrefixIndex] = None
+
+
+def compile_indexes():
+    """Rebuild the item index (a Config reload hook)"""
+    global _items
+    _items = PrefixIndex((item.key, f"{display_name(item.name)} ({item.key})") for item in catalog.catalog())
+
+
+def items() -> PrefixIndex:
+    return _items
+
+
+compile_indexes()
+Config.add_reload_hook(compile_indexes)
@@ -0,0 +1,340 @@
+"""
+Offline load test - drive the Economy and Grinding cogs with fake contexts
+
+Commands are invoked on real cog instances against a real SQLite file, from
+many simulated users at once. Nothing talks to Discord: channel sends return
+a stub message, confirmation prompts are answered "yes" right after the
+command returns and `search` clicks the first offered location.
+
+Usage:
+    python benchmarks/cog_bench.py --users 5000 --commands 20000 --concurrency 200
+    python benchmarks/cog_bench.py --mix beg=3,balance=1 --ignore-cooldowns --query-stats
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.economy import Economy  # noqa: E402
+from cogs.grinding import Grinding  # noqa: E402
+from utils.confirmations import ConfirmButton, ConfirmationDispatcher  # noqa: E402
+from utils.database import Database  # noqa: E402
+from utils.helpers import ChoiceView  # noqa: E402
+from utils.locks import UserLockManager  # noqa: E402
+from utils.querystats import QueryProfiler  # noqa: E402
+from loop_bench import percentile  # noqa: E402
+
+STARTING_WALLET = 10_000_000
+STARTING_ITEMS = [('bone', 50), ('beard', 20)]
+
+# command name -> relative weight
+DEFAULT_MIX = {
+    'balance': 20,
+    'inventory': 10,
+    'shop': 3,
+    'item': 5,
+    'buy': 6,
+    'sell': 6,
+    'pay': 5,
+    'beg': 15,
+    'fetch': 8,
+    'fish': 8,
+    'hunt': 6,
+    'stake': 4,
+    'search': 4,
+    'grind': 4,
+}
+
+
+class FakeUser:
+    """Just enough of discord.Member for the cogs"""
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+
+    def __eq__(self, other):
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __hash__(self):
+        return self.id
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int = 0):
+        self.id = channel_id
+
+
+class FakeMessage:
+    """Message returned by FakeContext.send"""
+
+    def __init__(self, content: Optional[str] = None, author: Optional[FakeUser] = None):
+        self.id = 0
+        self.content = content
+        self.author = author
+        self.channel = FakeChannel()
+
+    async def edit(self, **kwargs):
+        return self
+
+
+class FakeCommand:
+    def __init__(self, name: str):
+        self.qualified_name = name
+
+
+class FakeContext:
+    """commands.Context stand-in whose sends go nowhere"""
+
+    def __init__(self, bot, author: FakeUser, command: str):
+        self.bot = bot
+        self.author = author
+        self.guild = None
+        self.interaction = None
+        self.command = FakeCommand(command)
+        self.sent = 0
+        self.prompts: List[int] = []
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        self.sent += 1
+        if isinstance(view, ChoiceView):
+            # search: click the first location right away
+            view.select(view.options[0])
+        for item in view.children if view is not None else ():
+            # remember confirmation prompts, invoke() answers them with "yes"
+            if isinstance(item, ConfirmButton) and item.confirmed:
+                self.prompts.append(item.action_id)
+        return FakeMessage(content, self.bot.user)
+
+
+class FakeBot:
+    """The parts of EconomyBot the cogs use"""
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.locks = UserLockManager()
+        self.user = FakeUser(0)
+        self.confirmations = ConfirmationDispatcher(self)
+        # commands cogs register themselves, like the grinders
+        self.commands: Dict[str, object] = {}
+
+    def add_command(self, command):
+        self.commands[command.name] = command
+
+    def remove_command(self, name: str):
+        return self.commands.pop(name, None)
+
+    def get_command(self, name: str):
+        return self.commands.get(name)
+
+
+async def seed_users(db: Database, users: int):
+    """Give every simulated user a wallet and a few items in one transaction"""
+    conn = await db.connect()
+    ids = [(user_id,) for user_id in range(1, users + 1)]
+    await conn.executemany("INSERT OR IGNORE INTO balances (user_id, wallet) VALUES (?, 0)", ids)
+    await conn.executemany("UPDATE balances SET wallet = ? WHERE user_id = ?", [(STARTING_WALLET, i) for (i,) in ids])
+    await conn.executemany("INSERT OR IGNORE INTO levels (user_id) VALUES (?)", ids)
+    await conn.executemany("INSERT OR IGNORE INTO cooldowns (user_id) VALUES (?)", ids)
+    for item_id, quantity in STARTING_ITEMS:
+        await conn.executemany(
+            "INSERT OR REPLACE INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)",
+            [(i, db.item_id(item_id), quantity) for (i,) in ids]
+        )
+    await conn.commit()
+
+
+def command_args(name: str, rng: random.Random, users: int, user_id: int) -> list:
+    """Arguments for one invocation of a command"""
+    if name == 'item':
+        return [rng.choice(['beard', 'bone', 'stock', 'sun'])]
+    if name == 'buy':
+        return [rng.choice(['beard', 'sarthak', 'stock']), rng.randint(1, 3)]
+    if name == 'sell':
+        return [rng.choice(['bone', 'beard']), 1]
+    if name == 'pay':
+        other = rng.randint(1, users - 1)
+        target = FakeUser(other if other < user_id else other + 1)
+        if rng.random() < 0.5:
+            return [target, rng.randint(1, 1000)]
+        return [target, 1, 'bone']
+    return []
+
+
+async def run_load(db_path: str, args) -> dict:
+    """Replay the mix and return throughput and per-command latencies"""
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    db = Database(db_path)
+    await db.setup()
+    await seed_users(db, args.users)
+
+    profiler = None
+    if args.query_stats:
+        # the summary is printed at the end, skip the per-invocation warnings
+        logging.getLogger('EconomyBot.QueryStats').setLevel(logging.ERROR)
+        profiler = QueryProfiler()
+        profiler.instrument(db.conn)
+
+    bot = FakeBot(db)
+    cogs = {'economy': Economy(bot), 'grinding': Grinding(bot)}
+    # cogs aren't added to a bot, so call the callbacks with the cog bound by hand
+    commands_by_name = {}
+    for cog in cogs.values():
+        loading = cog.cog_load()
+        if asyncio.iscoroutine(loading):
+            await loading
+        for command in cog.get_commands():
+            commands_by_name[command.name] = (cog, command.callback)
+    # commands a cog added to the bot itself take only the context
+    for command in bot.commands.values():
+        commands_by_name[command.name] = (None, command.callback)
+
+    unknown = set(names) - set(commands_by_name)
+    if unknown:
+        raise SystemExit(f"Unknown commands in mix: {', '.join(sorted(unknown))}")
+
+    if args.ignore_cooldowns:
+        async def no_cooldown(user_id, command, cooldown_seconds):
+            return (False, 0)
+        cogs['grinding'].check_cooldown = no_cooldown
+
+        # grinders check their cooldown inside the claim and `grind` reads them all first,
+        # pretend every one has expired
+        claim_grind = db.claim_grind
+
+        async def claim_ignoring_cooldowns(user_id, cooldowns, now, **kwargs):
+            return await claim_grind(user_id, cooldowns, float('inf'), **kwargs)
+
+        async def no_cooldowns(user_id, commands):
+            return dict.fromkeys(commands, 0)
+        db.claim_grind = claim_ignoring_cooldowns
+        db.get_cooldowns = no_cooldowns
+
+    plan = []
+    for _ in range(args.commands):
+        name = rng.choices(names, weights)[0]
+        user_id = rng.randint(1, args.users)
+        plan.append((name, user_id, command_args(name, rng, args.users, user_id)))
+
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    async def invoke(name: str, user_id: int, arguments: list):
+        ctx = FakeContext(bot, FakeUser(user_id), name)
+        if profiler:
+            profiler.begin(ctx)
+        try:
+            cog, callback = commands_by_name[name]
+            await (callback(cog, ctx, *arguments) if cog else callback(ctx, *arguments))
+            # the click that a real user would send a moment later
+            for action_id in ctx.prompts:
+                await bot.confirmations.run(action_id, user_id, True)
+        finally:
+            if profiler:
+                profiler.finish(ctx)
+
+    async def worker():
+        while not queue.empty():
+            name, user_id, arguments = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                # own task per invocation, like the real dispatcher
+                await asyncio.create_task(invoke(name, user_id, arguments))
+            except Exception as e:
+                key = f"{name}: {type(e).__name__}: {e}"
+                errors[key] = errors.get(key, 0) + 1
+            latencies[name].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    await db.close()
+
+    result = {
+        'users': args.users,
+        'commands': args.commands,
+        'concurrency': args.concurrency,
+        'seconds': round(elapsed, 4),
+        'throughput': round(args.commands / elapsed, 1),
+        'errors': errors,
+        'latency_ms': {
+            name: {
+                'count': len(values),
+                'p50': round(percentile(values, 50) * 1000, 3),
+                'p95': round(percentile(values, 95) * 1000, 3),
+                'p99': round(percentile(values, 99) * 1000, 3),
+            }
+            for name, values in latencies.items() if values
+        }
+    }
+    if profiler:
+        result['query_stats'] = {name: totals.to_dict() for name, totals in profiler.commands.items()}
+    return result
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse 'beg=3,balance=1' into a weight map"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--commands', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mix', help="Command weights, e.g. beg=3,balance=1 (default: built-in mix)")
+    parser.add_argument('--db', help="SQLite file to use (default: a fresh temporary file)")
+    parser.add_argument('--ignore-cooldowns', action='store_true', help="Let grinding commands run every time")
+    parser.add_argument('--query-stats', action='store_true', help="Also count statements per command")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.db:
+        result = asyncio.run(run_load(args.db, args))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = asyncio.run(run_load(os.path.join(tmp, 'load.db'), args))
+
+    print(f"\n{result['commands']} commands from {result['users']} users in {result['seconds']}s "
+          f"({result['throughput']} cmd/s, concurrency {result['concurrency']})")
+    for command, stats in sorted(result['latency_ms'].items()):
+        print(f"  {command:<10} x{stats['count']:<6} p50 {stats['p50']:>8}ms  "
+              f"p95 {stats['p95']:>8}ms  p99 {stats['p99']:>8}ms")
+
+    for command, data in sorted(result.get('query_stats', {}).items()):
+        print(f"  {command:<10} statements avg {data['statements_avg']:>6}  "
+              f"commits avg {data['commits_avg']:>5}  rows avg {data['rows_avg']:>6}")
+
+    for error, count in result['errors'].items():
+        print(f"  error {error} x{count}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
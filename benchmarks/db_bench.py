@@ -0,0 +1,272 @@
+"""
+Micro-benchmarks for every public Database method, with a baseline check
+
+Each method is timed against freshly populated databases of several sizes.
+Results are compared against a stored baseline and the run fails when any
+method's median got slower than the tolerance allows.
+
+Usage:
+    python benchmarks/db_bench.py                          # compare with db_baseline.json
+    python benchmarks/db_bench.py --sizes 1000,10000,1000000 --json results.json
+    python benchmarks/db_bench.py --update-baseline        # after an intended change
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import Config  # noqa: E402
+from utils.database import Database  # noqa: E402
+from loop_bench import percentile  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_baseline.json')
+
+ITEMS = [item_id for item_id, data in Config.SHOP_ITEMS.items() if data['price'] is not None]
+COMMANDS = ['beg', 'search', 'fetch', 'fish', 'hunt', 'stake', 'dice']
+
+Case = Callable[[Database, random.Random, int], Awaitable]
+
+# ids of the holds and (action id, user id) of the pending actions populate()
+# seeded; cases that settle one take a fresh row so they time the real path
+SEEDED: Dict[str, List] = {'holds': [], 'actions': []}
+
+# method -> (call, heavy). heavy cases scan whole tables and run fewer iterations
+CASES: Dict[str, Tuple[Case, bool]] = {
+    'ensure_user': (lambda db, rng, n: db.ensure_user(rng.randint(1, n)), False),
+    'get_balance': (lambda db, rng, n: db.get_balance(rng.randint(1, n)), False),
+    'add_coins': (lambda db, rng, n: db.add_coins(rng.randint(1, n), 100), False),
+    'remove_coins': (lambda db, rng, n: db.remove_coins(rng.randint(1, n), 100), False),
+    'get_net_worth': (lambda db, rng, n: db.get_net_worth(rng.randint(1, n)), False),
+    'get_inventory': (lambda db, rng, n: db.get_inventory(rng.randint(1, n)), False),
+    'get_item_quantity': (lambda db, rng, n: db.get_item_quantity(rng.randint(1, n), rng.choice(ITEMS)), False),
+    'add_item': (lambda db, rng, n: db.add_item(rng.randint(1, n), rng.choice(ITEMS), 1), False),
+    'remove_item': (lambda db, rng, n: db.remove_item(rng.randint(1, n), rng.choice(ITEMS), 1), False),
+    'exchange_items': (lambda db, rng, n: db.exchange_items(rng.randint(1, n), rng.choice(ITEMS), 1, {'beard': 1}), False),
+    'get_level_data': (lambda db, rng, n: db.get_level_data(rng.randint(1, n)), False),
+    'add_experience': (lambda db, rng, n: db.add_experience(rng.randint(1, n), 1), False),
+    'set_level': (lambda db, rng, n: db.set_level(rng.randint(1, n), rng.randint(1, 20)), False),
+    'get_cooldown': (lambda db, rng, n: db.get_cooldown(rng.randint(1, n), rng.choice(COMMANDS)), False),
+    'set_cooldown': (lambda db, rng, n: db.set_cooldown(rng.randint(1, n), rng.choice(COMMANDS), time.time()), False),
+    'get_cooldowns': (lambda db, rng, n: db.get_cooldowns(rng.randint(1, n), COMMANDS), False),
+    # claims ignore the running cooldowns so every call takes the write path
+    'claim_grind': (lambda db, rng, n: db.claim_grind(
+        rng.randint(1, n), {rng.choice(list(Config.GRINDERS)): time.time() + 60}, float('inf'),
+        coins=100, items={rng.choice(ITEMS): 1}, experience=1, logs=[("Bench", 100)]
+    ), False),
+    'get_badges': (lambda db, rng, n: db.get_badges(rng.randint(1, n)), False),
+    'add_badge': (lambda db, rng, n: db.add_badge(rng.randint(1, n), 'bench'), False),
+    'remove_badge': (lambda db, rng, n: db.remove_badge(rng.randint(1, n), 'bench'), False),
+    'get_stock_price': (lambda db, rng, n: db.get_stock_price(), False),
+    'set_stock_price': (lambda db, rng, n: db.set_stock_price(rng.randint(50000, 150000)), False),
+    'get_leaderboard': (lambda db, rng, n: db.get_leaderboard(10), True),
+    'get_item_leaderboard': (lambda db, rng, n: db.get_item_leaderboard(rng.choice(ITEMS), 5), True),
+    'get_boost': (lambda db, rng, n: db.get_boost(rng.randint(1, n)), False),
+    'set_boost': (lambda db, rng, n: db.set_boost(rng.randint(1, n), 2, int(time.time()) + 3600), False),
+    'remove_boost': (lambda db, rng, n: db.remove_boost(rng.randint(1, n)), False),
+    'hold_coins': (lambda db, rng, n: db.hold_coins(rng.randint(1, n), 100, time.time() + 30), False),
+    'hold_items': (lambda db, rng, n: db.hold_items(rng.randint(1, n), rng.choice(ITEMS), 1, time.time() + 30), False),
+    'capture_hold': (lambda db, rng, n: db.capture_hold(
+        SEEDED['holds'].pop(), rng.randint(1, n), coins=100, logs=[(1, "Bench", 100)]
+    ), False),
+    'release_hold': (lambda db, rng, n: db.release_hold(SEEDED['holds'].pop()), False),
+    'expire_holds': (lambda db, rng, n: db.expire_holds(time.time() - 60), False),
+    'add_pending_action': (lambda db, rng, n: db.add_pending_action(rng.randint(1, n), 'bench', '{}', time.time() + 30), False),
+    'set_pending_message': (lambda db, rng, n: db.set_pending_message(rng.randint(1, n), 1, 1), False),
+    'get_pending_action': (lambda db, rng, n: db.get_pending_action(rng.randint(1, n)), False),
+    'claim_pending_action': (lambda db, rng, n: db.claim_pending_action(*SEEDED['actions'].pop(), time.time()), False),
+    'expire_pending_actions': (lambda db, rng, n: db.expire_pending_actions(time.time() - 60), False),
+    'log_transaction': (lambda db, rng, n: db.log_transaction(rng.randint(1, n), "Bench", 100), False),
+    'get_currency_log': (lambda db, rng, n: db.get_currency_log(rng.randint(1, n), 10), False),
+    'wipe_user': (lambda db, rng, n: db.wipe_user(rng.randint(1, n)), False),
+}
+
+# lifecycle/maintenance methods that aren't per-request work
+SKIPPED = {
+    'connect', 'close', 'setup', 'init_shop_items', 'migrate_item_ids', 'ensure_cooldown_columns', 'flush', 'checkpoint'
+}
+
+
+def uncovered_methods() -> List[str]:
+    """Public coroutine methods of Database without a benchmark case"""
+    return sorted(
+        name for name in dir(Database)
+        if not name.startswith('_') and name not in SKIPPED and name not in CASES
+        and asyncio.iscoroutinefunction(getattr(Database, name))
+    )
+
+
+async def populate(db: Database, users: int, seed: int, settles: int):
+    """
+    Bulk-load users with balances, inventories and a currency log in one
+    transaction, plus `settles` open holds and pending actions per case that
+    consumes them
+    """
+    rng = random.Random(seed)
+    conn = await db.connect()
+    ids = range(1, users + 1)
+
+    await conn.executemany(
+        "INSERT INTO balances (user_id, wallet, bank) VALUES (?, ?, ?)",
+        ((i, rng.randint(0, 10_000_000), rng.randint(0, 10_000_000)) for i in ids)
+    )
+    await conn.executemany("INSERT INTO levels (user_id) VALUES (?)", ((i,) for i in ids))
+    await conn.executemany("INSERT INTO cooldowns (user_id) VALUES (?)", ((i,) for i in ids))
+    await conn.executemany(
+        "INSERT OR IGNORE INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)",
+        ((i, db.item_id(rng.choice(ITEMS)), rng.randint(1, 50)) for i in ids for _ in range(3))
+    )
+    await conn.executemany(
+        "INSERT INTO currencylog (user_id, action, amount) VALUES (?, ?, ?)",
+        ((rng.randint(1, users), "Begged", rng.randint(1000, 10000)) for _ in range(users * 5))
+    )
+
+    # capture_hold and release_hold each settle one hold per call, half coins and half items
+    expires = time.time() + 3600
+    await conn.executemany(
+        "INSERT INTO holds (user_id, item_id, amount, expires) VALUES (?, ?, ?, ?)",
+        (
+            (rng.randint(1, users), db.item_id(rng.choice(ITEMS)) if i % 2 else None, 1 if i % 2 else 100, expires)
+            for i in range(2 * settles)
+        )
+    )
+    await conn.executemany(
+        "INSERT INTO pending_actions (user_id, kind, payload, expires) VALUES (?, 'bench', '{}', ?)",
+        ((rng.randint(1, users), expires) for _ in range(settles))
+    )
+    await conn.commit()
+
+    async with conn.execute("SELECT id FROM holds") as cursor:
+        SEEDED['holds'] = [row[0] for row in await cursor.fetchall()]
+    async with conn.execute("SELECT id, user_id FROM pending_actions") as cursor:
+        SEEDED['actions'] = [(row[0], row[1]) for row in await cursor.fetchall()]
+    rng.shuffle(SEEDED['holds'])
+    rng.shuffle(SEEDED['actions'])
+
+
+async def bench_size(db_path: str, users: int, args) -> Dict[str, Dict[str, float]]:
+    """Time every case against one database size"""
+    db = Database(db_path)
+    await db.setup()
+    # warm-up plus every timed call of a non-heavy case
+    await populate(db, users, args.seed, settles=5 + args.iterations * args.repeat)
+
+    rng = random.Random(args.seed)
+    results = {}
+    for name, (case, heavy) in CASES.items():
+        if args.only and name not in args.only:
+            continue
+
+        iterations = max(10, args.iterations // 10) if heavy else args.iterations
+        for _ in range(min(5, iterations)):
+            await case(db, rng, users)  # warm up caches
+
+        # keep the quietest of several rounds, like timeit, so background
+        # noise on the machine doesn't read as a regression
+        rounds = []
+        for _ in range(args.repeat):
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                await case(db, rng, users)
+                timings.append(time.perf_counter() - start)
+            rounds.append(timings)
+        timings = min(rounds, key=lambda timings: percentile(timings, 50))
+
+        results[name] = {
+            'iterations': iterations,
+            'mean_ms': round(sum(timings) / len(timings) * 1000, 4),
+            'p50_ms': round(percentile(timings, 50) * 1000, 4),
+            'p95_ms': round(percentile(timings, 95) * 1000, 4),
+        }
+
+    await db.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, floor_ms: float) -> List[str]:
+    """Methods whose median regressed past the tolerance"""
+    regressions = []
+    for size, methods in results.items():
+        for name, stats in methods.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            limit = base['p50_ms'] * (1 + tolerance)
+            # sub-floor differences are timer noise, not regressions
+            if stats['p50_ms'] > limit and stats['p50_ms'] - base['p50_ms'] > floor_ms:
+                regressions.append(
+                    f"{name} @ {size} users: p50 {stats['p50_ms']}ms vs baseline {base['p50_ms']}ms "
+                    f"(+{(stats['p50_ms'] / base['p50_ms'] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000', help="Comma-separated user counts")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3, help="Rounds per method, the fastest one counts")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', type=lambda s: set(s.split(',')), help="Only these methods")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed median slowdown (0.5 = 50%%)")
+    parser.add_argument('--floor-ms', type=float, default=0.25, help="Ignore slowdowns smaller than this")
+    parser.add_argument('--update-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    missing = uncovered_methods()
+    if missing:
+        print(f"warning: no benchmark case for {', '.join(missing)}")
+
+    results = {}
+    for users in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            results[str(users)] = asyncio.run(bench_size(os.path.join(tmp, 'bench.db'), users, args))
+
+        print(f"\n== {users} users")
+        for name, stats in results[str(users)].items():
+            print(f"  {name:<22} p50 {stats['p50_ms']:>9}ms  p95 {stats['p95_ms']:>9}ms  mean {stats['mean_ms']:>9}ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --update-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance, args.floor_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
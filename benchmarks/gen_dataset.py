@@ -0,0 +1,213 @@
+"""
+Generate large, reproducible economy databases for benchmarking
+
+The schema comes from Database.setup(); rows are bulk-inserted with plain
+sqlite3 inside a single transaction. Inventories, activity and balances follow
+power laws - most users own a few cheap items, a handful own a lot.
+
+Usage:
+    python benchmarks/gen_dataset.py bench.db --users 1000000 --log-rows 20000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import catalog  # noqa: E402
+from utils.config import Config  # noqa: E402
+from utils.database import Database  # noqa: E402
+
+CHUNK = 50_000
+COOLDOWN_COMMANDS = ['beg', 'search', 'fetch', 'fish', 'hunt', 'stake', 'dice']
+LOG_ACTIONS = [
+    ("Begged", 1000, 10000),
+    ("Fetched", 1000, 10000),
+    ("Fished", 100, 50000),
+    ("Hunted", 500, 5000),
+    ("Staked", 500, 5000),
+    ("Searched street", 500, 5000),
+    ("Bought 1x beard", -10000, -10000),
+    ("Sold 1x bone", 5000, 5000),
+]
+
+
+def item_weights(alpha: float) -> Tuple[List[int], List[float]]:
+    """Item ids and cumulative popularity weights - cheaper items are more common"""
+    # ids were registered by Database.setup() in create_schema
+    items = list(catalog.catalog())
+    weights = [1 / (item.price or Config.STOCK_INITIAL_PRICE) ** alpha for item in items]
+    return [item.id for item in items], list(accumulate(weights))
+
+
+def user_activity(rng: random.Random, users: int) -> List[float]:
+    """Cumulative per-user activity weights following a Zipf-like distribution"""
+    ranks = list(range(1, users + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1 / rank ** 0.8 for rank in ranks))
+
+
+def balance_rows(rng: random.Random, users: int) -> Iterator[tuple]:
+    for user_id in range(1, users + 1):
+        # pareto-distributed wealth, capped so sums stay inside 64 bits
+        wallet = min(int(1000 * rng.paretovariate(1.2)), 10 ** 12)
+        bank = min(int(1000 * rng.paretovariate(1.5)), 10 ** 12)
+        yield (user_id, wallet, bank)
+
+
+def level_rows(rng: random.Random, users: int) -> Iterator[tuple]:
+    for user_id in range(1, users + 1):
+        level = min(1 + int(rng.expovariate(0.3)), 40)
+        yield (user_id, level, rng.randint(0, level * level * 10), int(rng.random() < 0.02))
+
+
+def cooldown_rows(rng: random.Random, users: int, now: float) -> Iterator[tuple]:
+    for user_id in range(1, users + 1):
+        # most cooldowns expired long ago, a few users are mid-grind
+        yield (user_id, *(
+            now + rng.uniform(0, 150) if rng.random() < 0.05 else now - rng.uniform(0, 86400 * 30)
+            for _ in COOLDOWN_COMMANDS
+        ))
+
+
+def inventory_rows(rng: random.Random, users: int, alpha: float) -> Iterator[tuple]:
+    items, cum_weights = item_weights(alpha)
+    for user_id in range(1, users + 1):
+        # number of distinct items per user is heavy-tailed, 0 for many users
+        distinct = min(int(rng.paretovariate(1.3)) - 1, len(items))
+        if distinct <= 0:
+            continue
+        # dict, not set - set order depends on string hash randomization
+        owned = dict.fromkeys(rng.choices(items, cum_weights=cum_weights, k=distinct))
+        for item_id in owned:
+            yield (user_id, item_id, max(1, int(rng.paretovariate(1.1))))
+
+
+def log_rows(rng: random.Random, users: int, rows: int, start: int, days: int) -> Iterator[tuple]:
+    cum_activity = user_activity(rng, users)
+    user_ids = range(1, users + 1)
+    span = days * 86400
+    random_ = rng.random
+
+    for offset in range(0, rows, CHUNK):
+        count = min(CHUNK, rows - offset)
+        chosen = rng.choices(user_ids, cum_weights=cum_activity, k=count)
+        actions = rng.choices(LOG_ACTIONS, k=count)
+        # timestamps (unix seconds, formatted by SQLite) increase with the row id, like the live table
+        for i, (user_id, (action, low, high)) in enumerate(zip(chosen, actions), offset):
+            yield (user_id, action, low + int(random_() * (high - low + 1)), start + i * span // rows)
+
+
+def bulk_insert(conn: sqlite3.Connection, sql: str, rows: Iterator[tuple]) -> int:
+    """executemany in fixed-size chunks so memory stays flat"""
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK:
+            conn.executemany(sql, chunk)
+            total += len(chunk)
+            chunk.clear()
+    if chunk:
+        conn.executemany(sql, chunk)
+        total += len(chunk)
+    return total
+
+
+async def create_schema(path: str):
+    """Create tables and static rows exactly as the bot does"""
+    db = Database(path)
+    await db.setup()
+    await db.checkpoint()
+    await db.close()
+
+
+def generate(path: str, users: int, log_rows_count: int, seed: int = 1, alpha: float = 0.35, days: int = 90) -> dict:
+    """Build a database at `path` and return row counts per table"""
+    asyncio.run(create_schema(path))
+    rng = random.Random(seed)
+    start = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+    now = start + days * 86400
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    counts = {}
+    try:
+        conn.execute("BEGIN")
+        counts['balances'] = bulk_insert(
+            conn, "INSERT INTO balances (user_id, wallet, bank) VALUES (?, ?, ?)", balance_rows(rng, users)
+        )
+        counts['levels'] = bulk_insert(
+            conn, "INSERT INTO levels (user_id, level, experience, rebirth_level) VALUES (?, ?, ?, ?)",
+            level_rows(rng, users)
+        )
+        columns = ", ".join(f"{command}_cooldown" for command in COOLDOWN_COMMANDS)
+        counts['cooldowns'] = bulk_insert(
+            conn, f"INSERT INTO cooldowns (user_id, {columns}) VALUES (?{', ?' * len(COOLDOWN_COMMANDS)})",
+            cooldown_rows(rng, users, now)
+        )
+        counts['inventory'] = bulk_insert(
+            conn, "INSERT INTO inventory (user_id, item_id, quantity) VALUES (?, ?, ?)",
+            inventory_rows(rng, users, alpha)
+        )
+        counts['currencylog'] = bulk_insert(
+            conn, "INSERT INTO currencylog (user_id, action, amount, timestamp) VALUES (?, ?, ?, datetime(?, 'unixepoch'))",
+            log_rows(rng, users, log_rows_count, start, days)
+        )
+        conn.commit()
+        conn.execute("ANALYZE")
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    # hand the file over in the journal mode the bot expects
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help="Database file to create")
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--log-rows', type=int, help="currencylog rows (default: 20 per user)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--alpha', type=float, default=0.35, help="Item popularity skew (higher = cheap items dominate)")
+    parser.add_argument('--days', type=int, default=90, help="Days of history the currency log spans")
+    parser.add_argument('--force', action='store_true', help="Overwrite an existing file")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        if not args.force:
+            raise SystemExit(f"{args.output} already exists, pass --force to overwrite it")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.output + suffix):
+                os.remove(args.output + suffix)
+
+    log_rows_count = args.log_rows if args.log_rows is not None else args.users * 20
+
+    start = time.perf_counter()
+    counts = generate(args.output, args.users, log_rows_count, args.seed, args.alpha, args.days)
+    elapsed = time.perf_counter() - start
+
+    for table, count in counts.items():
+        print(f"  {table:<12} {count:>12,} rows")
+    size_mb = os.path.getsize(args.output) / 1024 / 1024
+    total = sum(counts.values())
+    print(f"{total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s), {size_mb:,.1f} MiB -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Compare the default asyncio loop against uvloop on the bot's command mix
+
+Each simulated command replays the Database calls the matching cog command
+makes, against a throwaway SQLite file, from many concurrent users.
+
+Usage:
+    python benchmarks/loop_bench.py --users 200 --commands 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database  # noqa: E402
+
+
+async def cmd_balance(db: Database, user_id: int):
+    await db.get_balance(user_id)
+    await db.get_net_worth(user_id)
+
+
+async def cmd_inventory(db: Database, user_id: int):
+    await db.get_inventory(user_id)
+    await db.get_stock_price()
+
+
+async def cmd_beg(db: Database, user_id: int):
+    await db.get_cooldown(user_id, 'beg')
+    await db.set_cooldown(user_id, 'beg', 0)
+    amount = random.randint(1000, 10000)
+    await db.add_coins(user_id, amount)
+    await db.log_transaction(user_id, "Begged", amount)
+
+
+async def cmd_fetch(db: Database, user_id: int):
+    await db.get_cooldown(user_id, 'fetch')
+    await db.set_cooldown(user_id, 'fetch', 0)
+    await db.add_coins(user_id, 5000)
+    await db.log_transaction(user_id, "Fetched", 5000)
+    await db.add_item(user_id, 'bone', 1)
+
+
+async def cmd_buy(db: Database, user_id: int):
+    await db.get_balance(user_id)
+    await db.get_balance(user_id)
+    if await db.remove_coins(user_id, 10000):
+        await db.add_item(user_id, 'beard', 1)
+        await db.log_transaction(user_id, "Bought 1x beard", -10000)
+
+
+async def cmd_sell(db: Database, user_id: int):
+    await db.get_item_quantity(user_id, 'bone')
+    await db.get_item_quantity(user_id, 'bone')
+    if await db.remove_item(user_id, 'bone', 1):
+        await db.add_coins(user_id, 5000)
+        await db.log_transaction(user_id, "Sold 1x bone", 5000)
+
+
+COMMAND_MIX = {
+    'balance': (cmd_balance, 25),
+    'inventory': (cmd_inventory, 15),
+    'beg': (cmd_beg, 25),
+    'fetch': (cmd_fetch, 15),
+    'buy': (cmd_buy, 10),
+    'sell': (cmd_sell, 10),
+}
+
+
+async def run_mix(db_path: str, users: int, total: int, concurrency: int, seed: int) -> dict:
+    """Run the command mix and return throughput and per-command latencies"""
+    rng = random.Random(seed)
+    names = list(COMMAND_MIX)
+    weights = [COMMAND_MIX[name][1] for name in names]
+    plan = [(rng.choices(names, weights)[0], rng.randint(1, users)) for _ in range(total)]
+
+    db = Database(db_path)
+    await db.setup()
+
+    latencies = {name: [] for name in names}
+    lag_samples = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    async def worker():
+        while not queue.empty():
+            name, user_id = queue.get_nowait()
+            start = time.perf_counter()
+            await COMMAND_MIX[name][0](db, user_id)
+            latencies[name].append(time.perf_counter() - start)
+
+    async def lag_probe():
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + 0.01
+            await asyncio.sleep(0.01)
+            lag_samples.append(max(0.0, loop.time() - expected))
+
+    probe = asyncio.create_task(lag_probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    probe.cancel()
+    await db.close()
+
+    return {
+        'commands': total,
+        'seconds': round(elapsed, 4),
+        'throughput': round(total / elapsed, 1),
+        'loop_lag_p99_ms': round(percentile(lag_samples, 99) * 1000, 3),
+        'latency_ms': {
+            name: {
+                'p50': round(percentile(values, 50) * 1000, 3),
+                'p95': round(percentile(values, 95) * 1000, 3),
+                'p99': round(percentile(values, 99) * 1000, 3),
+            }
+            for name, values in latencies.items() if values
+        }
+    }
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_with_loop(loop_name: str, args) -> dict:
+    """Run the benchmark on a fresh database using the given loop implementation"""
+    if loop_name == 'uvloop':
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    else:
+        asyncio.set_event_loop_policy(None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        try:
+            return asyncio.run(run_mix(db_path, args.users, args.commands, args.concurrency, args.seed))
+        finally:
+            asyncio.set_event_loop_policy(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--commands', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    loops = ['asyncio']
+    try:
+        import uvloop  # noqa: F401
+        loops.append('uvloop')
+    except ImportError:
+        print("uvloop is not installed, only benchmarking the default loop")
+
+    results = {name: run_with_loop(name, args) for name in loops}
+
+    for name, result in results.items():
+        print(f"\n== {name}: {result['throughput']} cmd/s, loop lag p99 {result['loop_lag_p99_ms']}ms")
+        for command, stats in result['latency_ms'].items():
+            print(f"  {command:<10} p50 {stats['p50']:>8}ms  p95 {stats['p95']:>8}ms  p99 {stats['p99']:>8}ms")
+
+    if len(results) == 2:
+        speedup = results['uvloop']['throughput'] / results['asyncio']['throughput']
+        print(f"\nuvloop throughput: {speedup:.2f}x the default loop")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Compiled item catalog - typed item records, integer ids and a flat price table
+
+Items keep their string keys ('beard', 'stock') everywhere users see them; the
+database stores the small integer ids. Ids are persisted in the shop_items
+table and adopted by Database.init_shop_items(), so they never change or get
+reused. The catalog is rebuilt from Config on every game data reload.
+"""
+
+import logging
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.config import Config
+
+logger = logging.getLogger('EconomyBot.Catalog')
+
+
+class Item(NamedTuple):
+    """One shop item. Immutable - a reload builds new records"""
+    id: int
+    key: str
+    name: str
+    price: Optional[int]  # None = dynamic (stock)
+    buyable: bool
+    sellable: bool
+    description: str
+
+
+def _loot_box_description(box_id: str) -> str:
+    """Describe a loot box from its outcome table, so the text can't drift from the odds"""
+    lines = ["**When used:**"]
+    for item_id, chance, quantity in Config.LOOT_BOXES[box_id]:
+        if item_id is None:
+            reward = "nothing"
+        else:
+            name = Config.SHOP_ITEMS[item_id]['name']
+            reward = f"x{quantity} {name}" if quantity > 1 else name
+        lines.append(f"- {chance * 100:g}% Chance of {reward}")
+    return "\n".join(lines)
+
+
+class Catalog:
+    """Every item of one version of the game data, by key and by id"""
+
+    __slots__ = ('by_key', 'items', 'prices', 'stock_id')
+
+    def __init__(self, ids: Dict[str, int], stock_price: int):
+        self.by_key: Dict[str, Item] = {}
+        for key, data in Config.SHOP_ITEMS.items():
+            if key in Config.LOOT_BOXES:
+                description = _loot_box_description(key)
+            else:
+                description = Config.ITEM_DESCRIPTIONS.get(key, '')
+            self.by_key[key] = Item(
+                ids[key], key, data['name'], data['price'],
+                data.get('buyable', True), data.get('sellable', True), description
+            )
+
+        # indexed by id; ids of items no longer in the game data stay empty
+        size = max(ids.values(), default=0) + 1
+        self.items: List[Optional[Item]] = [None] * size
+        self.prices = array('q', bytes(8 * size))
+        for item in self.by_key.values():
+            self.items[item.id] = item
+            self.prices[item.id] = item.price or 0
+
+        stock = self.by_key.get('stock')
+        self.stock_id = stock.id if stock else 0
+        if stock:
+            self.prices[stock.id] = stock_price
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self.by_key.values())
+
+    def __len__(self) -> int:
+        return len(self.by_key)
+
+    def get(self, key: str) -> Optional[Item]:
+        return self.by_key.get(key)
+
+    def by_id(self, item_id: int) -> Optional[Item]:
+        return self.items[item_id] if 0 <= item_id < len(self.items) else None
+
+    def price(self, item_id: int) -> int:
+        """Current price by id, live for stock, 0 for unknown items"""
+        return self.prices[item_id] if 0 <= item_id < len(self.prices) else 0
+
+    def value(self, rows: Iterable[Tuple[int, int]]) -> int:
+        """Total worth of (item id, quantity) rows"""
+        prices = self.prices
+        size = len(prices)
+        return sum(prices[item_id] * quantity for item_id, quantity in rows if 0 <= item_id < size)
+
+
+# every item key ever persisted -> id; keys dropped from the game data keep theirs
+_ids: Dict[str, int] = {}
+_stock_price: int = Config.STOCK_INITIAL_PRICE
+_catalog: Optional[Catalog] = None
+
+
+def compile_catalog():
+    """Rebuild the catalog from Config and swap it in (a Config reload hook)"""
+    global _catalog
+    # new items get fresh ids after the highest one ever used
+    next_id = max(_ids.values(), default=0) + 1
+    ids = dict(_ids)
+    for key in Config.SHOP_ITEMS:
+        if key not in ids:
+            ids[key] = next_id
+            next_id += 1
+
+    catalog = Catalog(ids, _stock_price)
+    _ids.update(ids)
+    _catalog = catalog
+    logger.debug(f"Compiled {len(catalog)} items")
+
+
+def register_ids(ids: Dict[str, int]):
+    """Adopt the ids persisted in the database, replacing provisional ones"""
+    _ids.clear()
+    _ids.update(ids)
+    compile_catalog()
+
+
+def set_stock_price(price: int):
+    """Update the live stock price slot"""
+    global _stock_price
+    _stock_price = price
+    if _catalog.stock_id:
+        _catalog.prices[_catalog.stock_id] = price
+
+
+def catalog() -> Catalog:
+    return _catalog
+
+
+compile_catalog()
+Config.add_reload_hook(compile_catalog)
@@ -3,7 +3,15 @@ Configuration management for the bot
 """
 
 import os
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import tomllib
+except ImportError:  # python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
 
 
 class Config:
@@ -41,6 +49,67 @@ class Config:
     # database
     DATABASE_URL: str = os.getenv('DATABASE_URL', 'sqlite:///economy.db')
     
+    # admission control - (tokens per second, burst size)
+    RATE_LIMIT_USER: tuple = (
+        float(os.getenv('RATE_LIMIT_USER_RATE', '1')),
+        float(os.getenv('RATE_LIMIT_USER_BURST', '5'))
+    )
+    RATE_LIMIT_GUILD: tuple = (
+        float(os.getenv('RATE_LIMIT_GUILD_RATE', '20')),
+        float(os.getenv('RATE_LIMIT_GUILD_BURST', '40'))
+    )
+    RATE_LIMIT_GLOBAL: tuple = (
+        float(os.getenv('RATE_LIMIT_GLOBAL_RATE', '50')),
+        float(os.getenv('RATE_LIMIT_GLOBAL_BURST', '100'))
+    )
+    
+    # bot-initiated messages, paced per channel - (messages per second, burst size)
+    OUTBOUND_CHANNEL_LIMIT: tuple = (
+        float(os.getenv('OUTBOUND_CHANNEL_RATE', '1')),
+        float(os.getenv('OUTBOUND_CHANNEL_BURST', '5'))
+    )
+    OUTBOUND_RETRIES: int = int(os.getenv('OUTBOUND_RETRIES', '4'))
+    
+    # non-essential commands dropped first when the loop or database falls behind
+    SHEDDABLE_COMMANDS: List[str] = ['leaderboard', 'itemleaderboard', 'adminleaderboard', 'currencylog', 'loottable', 'help']
+    SHED_LOOP_LAG: float = float(os.getenv('SHED_LOOP_LAG', '0.25'))  # seconds
+    SHED_DB_QUEUE: int = int(os.getenv('SHED_DB_QUEUE', '50'))  # queued statements
+    
+    # seconds to wait for running commands on shutdown
+    SHUTDOWN_TIMEOUT: float = float(os.getenv('SHUTDOWN_TIMEOUT', '35'))
+    
+    # buy/sell/pay confirmation prompts, persisted so they survive restarts
+    CONFIRM_TIMEOUT: float = float(os.getenv('CONFIRM_TIMEOUT', '30'))
+    
+    # metrics endpoint (disabled unless a port is set)
+    METRICS_HOST: str = os.getenv('METRICS_HOST', '127.0.0.1')
+    METRICS_PORT: Optional[int] = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+    
+    # command tracing (0 disables, 1 traces every invocation)
+    TRACE_SAMPLE_RATE: float = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+    TRACE_SLOW_MS: float = float(os.getenv('TRACE_SLOW_MS', '1000'))
+    TRACE_FILE: str = os.getenv('TRACE_FILE', 'traces.jsonl')
+    
+    # per-command database round trip counting (N+1 detector)
+    QUERY_STATS: bool = os.getenv('QUERY_STATS', '').lower() in ('1', 'true', 'yes')
+    QUERY_BUDGET: int = int(os.getenv('QUERY_BUDGET', '10'))  # statements per invocation
+    QUERY_BUDGETS: dict = {}  # per-command overrides, e.g. {'search': 15}
+    
+    # optional TOML file overriding the game data tables below, reloadable at runtime
+    GAME_DATA_FILE: str = os.getenv('GAME_DATA_FILE', 'gamedata.toml')
+    
+    # where admin profiling commands write pstats, folded stacks and memory snapshots
+    PROFILE_DIR: str = os.getenv('PROFILE_DIR', 'profiles')
+    
+    # whole-economy valuation snapshots (leaderboard, economy stats, dupe alerts)
+    VALUATION_INTERVAL: float = float(os.getenv('VALUATION_INTERVAL', '300'))  # seconds, 0 disables
+    DUPE_ALERT_GAIN: int = int(os.getenv('DUPE_ALERT_GAIN', '500000000'))  # net worth gain between snapshots
+    
+    # event loop monitoring
+    USE_UVLOOP: bool = os.getenv('USE_UVLOOP', '').lower() in ('1', 'true', 'yes')
+    LOOP_MONITOR_INTERVAL: float = float(os.getenv('LOOP_MONITOR_INTERVAL', '0.5'))
+    LOOP_SLOW_CALLBACK_MS: float = float(os.getenv('LOOP_SLOW_CALLBACK_MS', '100'))  # 0 disables
+    
     # shop items with prices and properties
     SHOP_ITEMS = {
         'beard': {
@@ -227,6 +296,16 @@ class Config:
         }
     }
     
+    # extra text for `item`, loot boxes are described from LOOT_BOXES
+    ITEM_DESCRIPTIONS = {
+        'banana': '**When used:**\n- Notifies xily u ate his bana (Item not consumed on use)',
+        'leash': "**When used:**\n- Times out Robert for 5 minutes. Item consumed on use",
+        'kuppy': '**When used:**\n- Mention a user to timeout them for 5 minutes. Item consumed on use',
+        'stock': '**When used:**\n- Price changes every 2-5 minutes, maximum is +- 30k. if it goes to 0 all stocks get deleted.',
+        'nicx': '**When used:**\n- 1% Chance of transforming into an Enchanted Nicx Crown. 99% Chance of being consumed without transforming.',
+        'tren': '**When used:**\n- Grants a 2x XP boost for 48 hours'
+    }
+    
     # search locations with their loot tables
     SEARCH_LOCATIONS = {
         'outside': {
@@ -310,6 +389,77 @@ class Config:
         }
     }
     
+    # grinding commands, each one run by the same executor. a new entry needs a cog reload.
+    # loot outcomes are exclusive: (item_id, chance, quantity), at most one drops, chances sum to <= 1.
+    # templates get {coins}, one random pick of each `choices` list and {fish}/{size} for catch = 'fish'
+    GRINDERS = {
+        'beg': {
+            'help': 'Beg for coins',
+            'cooldown': 60,
+            'success_chance': 0.75,
+            'coins': (1000, 10000),
+            'choices': {'owner': ['sid', 'sunny', 'robert', 'nicx', 'deep', 'mohamed', 'weltan', 'xily']},
+            'xp': 1,
+            'log': 'Begged',
+            'title': 'Success!',
+            'message': 'You begged so hard and {owner} gave you **⏣{coins}**!',
+            'fail_title': 'Failed',
+            'fail_message': 'Your begging attempt was unsuccessful. Better luck next time!'
+        },
+        'fetch': {
+            'help': 'Fetch like a good doggy for coins and items',
+            'cooldown': 75,
+            'coins': (1000, 10000),
+            'loot': [
+                ('bone', 0.30, 1),
+                ('leash', 0.15, 1),
+                ('dogfood', 0.05, 1)
+            ],
+            'xp': 1,
+            'log': 'Fetched',
+            'title': 'Fetch Complete',
+            'message': 'You fetched like a good doggy and found **⏣{coins}**!'
+        },
+        'fish': {
+            'help': 'Go fishing for valuable fish',
+            'cooldown': 60,
+            'catch': 'fish',
+            'xp': 1,
+            'log': 'Fished',
+            'title': 'Fishing Success',
+            'message': 'You caught a **{fish}** ({size} inches) and earned **⏣{coins}**!'
+        },
+        'hunt': {
+            'help': 'Hunt for coins and items',
+            'cooldown': 60,
+            'coins': (500, 5000),
+            'loot': [
+                ('duck', 20 / 300, 1),
+                ('cat', 1 / 300, 1),
+                ('temple', 9 / 300, 1),
+                ('legendarylootbox', 10 / 300, 1)
+            ],
+            'xp': 1,
+            'log': 'Hunted',
+            'title': 'Hunt Complete',
+            'message': 'You went hunting and earned **⏣{coins}**!'
+        },
+        'stake': {
+            'help': 'Gamble on stake.com for coins and loot boxes',
+            'cooldown': 150,
+            'coins': (500, 5000),
+            'loot': [
+                ('bestlootbox', 0.01, 1),
+                ('legendarylootbox', 0.04, 1),
+                ('rarelootbox', 0.15, 1)
+            ],
+            'xp': 1,
+            'log': 'Staked',
+            'title': 'Stake Complete',
+            'message': 'You gambled on stake.com all night and made **⏣{coins}**!'
+        }
+    }
+    
     # fish types with size ranges and spawn rates
     FISH_TYPES = [
         ('🐠 Clownfish', 2, 4, 0.30),
@@ -322,6 +472,34 @@ class Config:
         ('🐋 Blue Whale', 840, 1080, 0.0025)
     ]
     
+    # loot box outcomes: (item_id, chance, quantity), None = nothing. chances sum to 1
+    LOOT_BOXES = {
+        'rarelootbox': [
+            (None, 0.50, 0),
+            ('beard', 0.30, 1),
+            ('sarthak', 0.15, 1),
+            ('dog', 0.05, 1)
+        ],
+        'legendarylootbox': [
+            ('sarthak', 0.50, 1),
+            (None, 0.30, 0),
+            ('sun', 0.15, 1),
+            ('skull', 0.05, 1)
+        ],
+        'bestlootbox': [
+            ('skull', 0.30, 1),
+            (None, 0.20, 0),
+            ('bestlootbox', 0.20, 2),
+            ('banana', 0.10, 1),
+            ('beard', 0.09, 1),
+            ('bolb', 0.11, 1)
+        ],
+        'godbox': [
+            (None, 0.50, 0),
+            ('enicx', 0.50, 1)
+        ]
+    }
+    
     FISH_BASE_PRICE = 100
     FISH_GROWTH_FACTOR = 1.0073
     
@@ -348,3 +526,203 @@ class Config:
         if level < 22:
             return 0
         return int(150000000 * (1.2 ** (level - 21)))
+        
+    # game data reloading
+    
+    # TOML section -> Config attribute
+    DATA_SECTIONS = {
+        'shop_items': 'SHOP_ITEMS',
+        'search_locations': 'SEARCH_LOCATIONS',
+        'grinders': 'GRINDERS',
+        'fish_types': 'FISH_TYPES',
+        'loot_boxes': 'LOOT_BOXES',
+        'fish_base_price': 'FISH_BASE_PRICE',
+        'fish_growth_factor': 'FISH_GROWTH_FACTOR',
+        'level_rewards': 'LEVEL_REWARDS',
+    }
+    
+    # callables that rebuild structures compiled from the game data
+    _reload_hooks: List[Callable[[], None]] = []
+    
+    @classmethod
+    def add_reload_hook(cls, hook: Callable[[], None]):
+        """Run `hook` after every game data change (it should rebuild, then swap in one assignment)"""
+        cls._reload_hooks.append(hook)
+        
+    # callables that raise ValueError for game data the loaded code can't accept
+    _data_checks: List[Callable[[Dict[str, Any]], None]] = []
+    
+    @classmethod
+    def add_data_check(cls, check: Callable[[Dict[str, Any]], None]):
+        """Run `check` on every game data file after the built-in validation"""
+        cls._data_checks.append(check)
+        
+    @classmethod
+    def remove_data_check(cls, check: Callable[[Dict[str, Any]], None]):
+        if check in cls._data_checks:
+            cls._data_checks.remove(check)
+            
+    @classmethod
+    def read_data(cls, path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse and validate the game data file.
+        Returns {attribute: value} for the sections it contains ({} if there is no file).
+        """
+        path = path or cls.GAME_DATA_FILE
+        if not os.path.exists(path):
+            return {}
+        if tomllib is None:
+            raise RuntimeError(f"Reading {path} needs Python 3.11+ or the tomli package")
+            
+        with open(path, 'rb') as f:
+            raw = tomllib.load(f)
+            
+        unknown = set(raw) - set(cls.DATA_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown sections in {path}: {', '.join(sorted(unknown))}")
+            
+        data = {}
+        if 'shop_items' in raw:
+            data['SHOP_ITEMS'] = {
+                item_id: {
+                    'name': item['name'],
+                    'price': item.get('price'),  # no price = dynamic (stock)
+                    'id': item_id,
+                    'buyable': item.get('buyable', True),
+                    'sellable': item.get('sellable', True)
+                }
+                for item_id, item in raw['shop_items'].items()
+            }
+        if 'search_locations' in raw:
+            data['SEARCH_LOCATIONS'] = {
+                name: {
+                    **location,
+                    'base_coins': tuple(location['base_coins']),
+                    'loot': [tuple(loot) for loot in location.get('loot', [])]
+                }
+                for name, location in raw['search_locations'].items()
+            }
+        if 'grinders' in raw:
+            data['GRINDERS'] = {
+                name: {
+                    **grinder,
+                    **({'coins': tuple(grinder['coins'])} if 'coins' in grinder else {}),
+                    'loot': [tuple(loot) for loot in grinder.get('loot', [])]
+                }
+                for name, grinder in raw['grinders'].items()
+            }
+        if 'fish_types' in raw:
+            data['FISH_TYPES'] = [tuple(fish) for fish in raw['fish_types']]
+        if 'loot_boxes' in raw:
+            # TOML has no null, an empty item id means "nothing"
+            data['LOOT_BOXES'] = {
+                box_id: [(item_id or None, chance, quantity) for item_id, chance, quantity in outcomes]
+                for box_id, outcomes in raw['loot_boxes'].items()
+            }
+        if 'fish_base_price' in raw:
+            data['FISH_BASE_PRICE'] = raw['fish_base_price']
+        if 'fish_growth_factor' in raw:
+            data['FISH_GROWTH_FACTOR'] = raw['fish_growth_factor']
+        if 'level_rewards' in raw:
+            data['LEVEL_REWARDS'] = {
+                int(level): {
+                    **reward,
+                    **({'items': [tuple(item) for item in reward['items']]} if 'items' in reward else {})
+                }
+                for level, reward in raw['level_rewards'].items()
+            }
+            
+        cls.validate_data({**{attr: getattr(cls, attr) for attr in cls.DATA_SECTIONS.values()}, **data})
+        return data
+        
+    @classmethod
+    def validate_data(cls, data: Dict[str, Any]):
+        """Raise ValueError if the game data tables are inconsistent"""
+        items = data['SHOP_ITEMS']
+        for item_id, item in items.items():
+            if item['price'] is not None and (not isinstance(item['price'], int) or item['price'] < 0):
+                raise ValueError(f"Item {item_id} has an invalid price {item['price']!r}")
+                
+        for name, location in data['SEARCH_LOCATIONS'].items():
+            low, high = location['base_coins']
+            if low > high:
+                raise ValueError(f"Search location {name} has base_coins {low} > {high}")
+            # drops are compiled into one table over every combination of them
+            if len(location['loot']) > 12:
+                raise ValueError(f"Search location {name} has more than 12 drops")
+            for item_id, chance, quantity in location['loot']:
+                if item_id not in items:
+                    raise ValueError(f"Search location {name} drops unknown item {item_id}")
+                if not 0 <= chance <= 1 or quantity < 1:
+                    raise ValueError(f"Search location {name} has an invalid drop for {item_id}")
+                    
+        for name, grinder in data['GRINDERS'].items():
+            # the name becomes a command and a cooldowns column
+            if not name.isidentifier() or not name.islower():
+                raise ValueError(f"Grinder name {name!r} must be a lower-case identifier")
+            if grinder.get('cooldown', 0) <= 0 or 'message' not in grinder or 'log' not in grinder:
+                raise ValueError(f"Grinder {name} needs a positive cooldown, a message and a log action")
+            if grinder.get('catch') not in (None, 'fish'):
+                raise ValueError(f"Grinder {name} has an unknown catch {grinder['catch']!r}")
+            if grinder.get('catch') is None:
+                low, high = grinder.get('coins', (0, 0))
+                if not 0 <= low <= high:
+                    raise ValueError(f"Grinder {name} has an invalid coin range")
+            if not 0 <= grinder.get('success_chance', 1) <= 1:
+                raise ValueError(f"Grinder {name} has an invalid success chance")
+            total = 0
+            for item_id, chance, quantity in grinder.get('loot', []):
+                if item_id not in items or chance < 0 or quantity < 1:
+                    raise ValueError(f"Grinder {name} has an invalid drop {item_id}")
+                total += chance
+            if total > 1 + 1e-9:
+                raise ValueError(f"Grinder {name} drop chances must sum to at most 1 (got {total})")
+                
+        total = 0
+        for fish_name, min_size, max_size, chance in data['FISH_TYPES']:
+            if min_size > max_size or chance < 0:
+                raise ValueError(f"Fish {fish_name} has an invalid size range or chance")
+            total += chance
+        if not data['FISH_TYPES'] or total > 1 + 1e-9:
+            raise ValueError(f"Fish chances must sum to at most 1 (got {total})")
+            
+        for box_id, outcomes in data['LOOT_BOXES'].items():
+            if box_id not in items:
+                raise ValueError(f"Loot box {box_id} is not an item")
+            total = 0
+            for item_id, chance, quantity in outcomes:
+                if item_id is not None and (item_id not in items or quantity < 1):
+                    raise ValueError(f"Loot box {box_id} has an invalid outcome {item_id}")
+                if chance < 0:
+                    raise ValueError(f"Loot box {box_id} has a negative chance for {item_id}")
+                total += chance
+            if abs(total - 1) > 1e-9:
+                raise ValueError(f"Loot box {box_id} chances must sum to 1 (got {total})")
+                
+        for level, reward in data['LEVEL_REWARDS'].items():
+            for item_id, _ in reward.get('items', []):
+                if item_id not in items:
+                    raise ValueError(f"Level {level} rewards unknown item {item_id}")
+                    
+        for check in cls._data_checks:
+            check(data)
+            
+    @classmethod
+    def apply_data(cls, data: Dict[str, Any]):
+        """
+        Swap in new game data and rebuild everything compiled from it.
+        If a rebuild fails the previous data is restored, so readers never see a mix.
+        """
+        previous = {attr: getattr(cls, attr) for attr in data}
+        for attr, value in data.items():
+            setattr(cls, attr, value)
+            
+        try:
+            for hook in cls._reload_hooks:
+                hook()
+        except Exception:
+            for attr, value in previous.items():
+                setattr(cls, attr, value)
+            for hook in cls._reload_hooks:
+                hook()
+            raise
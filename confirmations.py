@@ -0,0 +1,255 @@
+"""
+Persistent confirmations - Yes/No prompts that survive restarts
+
+A prompt is a row in the pending_actions table plus a message whose buttons
+carry the row id in their custom_id. Nothing waits in memory while the user
+decides: one dynamic button item matches every confirmation button and the
+dispatcher claims the row and runs the handler registered for its kind.
+Expired rows are swept periodically and their handlers told about the timeout.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Set
+
+import discord
+
+from utils.helpers import create_error_embed
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger('EconomyBot.Confirmations')
+
+CONFIRMATIONS = REGISTRY.counter(
+    'economybot_confirmations_total',
+    'Confirmation prompts resolved, by outcome',
+    ('outcome',)
+)
+
+
+class PendingAction(NamedTuple):
+    """A confirmation waiting for its user"""
+    id: int
+    user_id: int
+    kind: str
+    payload: Dict[str, Any]
+    expires: float
+    channel_id: Optional[int]
+    message_id: Optional[int]
+
+    @classmethod
+    def from_row(cls, row) -> 'PendingAction':
+        return cls(
+            row['id'], row['user_id'], row['kind'], json.loads(row['payload']),
+            row['expires'], row['channel_id'], row['message_id']
+        )
+
+
+# (action, True = yes / False = no / None = timed out) -> embed the prompt is replaced with
+Handler = Callable[[PendingAction, Optional[bool]], Awaitable[discord.Embed]]
+
+
+class ConfirmButton(discord.ui.DynamicItem[discord.ui.Button], template=r'confirm:(?P<action>[0-9]+):(?P<choice>yes|no)'):
+    """Yes or No button of any confirmation, matched by custom_id after restarts too"""
+
+    def __init__(self, action_id: int, confirmed: bool):
+        super().__init__(discord.ui.Button(
+            label="Yes" if confirmed else "No",
+            style=discord.ButtonStyle.green if confirmed else discord.ButtonStyle.red,
+            custom_id=f"confirm:{action_id}:{'yes' if confirmed else 'no'}"
+        ))
+        self.action_id = action_id
+        self.confirmed = confirmed
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match) -> 'ConfirmButton':
+        return cls(int(match['action']), match['choice'] == 'yes')
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.client.confirmations.resolve(interaction, self.action_id, self.confirmed)
+
+
+class ConfirmationDispatcher:
+    """Creates confirmation prompts and resolves every click and timeout"""
+
+    def __init__(self, bot, timeout: float = 30.0, sweep_interval: float = 5.0):
+        self.bot = bot
+        self.timeout = timeout
+        self.sweep_interval = sweep_interval
+        self.handlers: Dict[str, Handler] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.running: Set[asyncio.Task] = set()
+
+    @property
+    def db(self):
+        return self.bot.db
+
+    def register(self, kind: str, handler: Handler):
+        """Set the handler for a kind of action (a reloaded cog replaces its own)"""
+        self.handlers[kind] = handler
+
+    def unregister(self, *kinds: str):
+        for kind in kinds:
+            self.handlers.pop(kind, None)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._sweep_loop(), name='confirmation-sweeper')
+
+    @property
+    def accepting(self) -> bool:
+        """False once shutdown has started - nothing new may touch the database"""
+        return getattr(self.bot, 'accepting_commands', True)
+
+    @contextmanager
+    def _busy(self):
+        """Track the current task so stop() waits for it"""
+        task = asyncio.current_task()
+        self.running.add(task)
+        try:
+            yield
+        finally:
+            self.running.discard(task)
+
+    async def stop(self, timeout: float = 5.0):
+        """
+        Stop sweeping and let clicks and sweeps that are already running finish.
+        Called once accepting_commands is False, so none start after this.
+        """
+        if self.task:
+            # an idle sweeper is asleep; a busy one is in self.running
+            if self.task not in self.running:
+                self.task.cancel()
+            self.task = None
+        if self.running:
+            await asyncio.wait(self.running, timeout=timeout)
+
+    def hold_expires(self) -> float:
+        """
+        Expiry for an escrow hold backing a new prompt. Holds outlive their prompt
+        by a couple of sweeps, so the timeout handler normally releases them and
+        expire_holds only catches holds whose prompt was lost.
+        """
+        return time.time() + self.timeout + 2 * self.sweep_interval
+
+    async def create(self, user_id: int, kind: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> int:
+        """Persist a pending action and return its id"""
+        expires = time.time() + (timeout if timeout is not None else self.timeout)
+        return await self.db.add_pending_action(user_id, kind, json.dumps(payload), expires)
+
+    def view(self, action_id: int) -> discord.ui.View:
+        """The Yes/No buttons of an action, to send with the prompt"""
+        view = discord.ui.View(timeout=None)
+        view.add_item(ConfirmButton(action_id, True))
+        view.add_item(ConfirmButton(action_id, False))
+        # a finished view is sent as plain components and never stored per message;
+        # clicks reach ConfirmButton through its custom_id template instead
+        view.stop()
+        return view
+
+    async def prompt(self, ctx, kind: str, payload: Dict[str, Any], embed: discord.Embed) -> int:
+        """Create an action for the command's author and send its prompt"""
+        action_id = await self.create(ctx.author.id, kind, payload)
+        message = await ctx.send(embed=embed, view=self.view(action_id))
+        if message is not None:
+            # lets the sweeper edit the prompt when it times out
+            await self.db.set_pending_message(action_id, message.channel.id, message.id)
+        return action_id
+
+    async def claim(self, action_id: int, user_id: int) -> Optional[PendingAction]:
+        """
+        Take the action for `user_id`, or None if it is gone (answered, expired
+        or never existed). Raises PermissionError for someone else's action.
+        """
+        row = await self.db.get_pending_action(action_id)
+        if row is None:
+            return None
+        if row['user_id'] != user_id:
+            raise PermissionError("This confirmation is not for you!")
+
+        # the claim deletes the row, so a double click or a racing sweep runs nothing twice
+        if not await self.db.claim_pending_action(action_id, user_id, time.time()):
+            return None
+        return PendingAction.from_row(row)
+
+    async def handle(self, action: PendingAction, confirmed: Optional[bool]) -> Optional[discord.Embed]:
+        """Run the handler of a claimed action. None if no loaded cog handles its kind"""
+        handler = self.handlers.get(action.kind)
+        if handler is None:
+            logger.warning(f"No handler for confirmation kind '{action.kind}', dropping action {action.id}")
+            CONFIRMATIONS.inc(outcome='orphaned')
+            return None
+
+        CONFIRMATIONS.inc(outcome={True: 'confirmed', False: 'cancelled', None: 'timeout'}[confirmed])
+        return await handler(action, confirmed)
+
+    async def run(self, action_id: int, user_id: int, confirmed: bool) -> Optional[discord.Embed]:
+        """Answer an action as `user_id` would by clicking its button"""
+        action = await self.claim(action_id, user_id)
+        return await self.handle(action, confirmed) if action else None
+
+    async def resolve(self, interaction: discord.Interaction, action_id: int, confirmed: bool):
+        """Button click entry point"""
+        # the row is left alone, so the button works again after the restart
+        if not self.accepting:
+            await interaction.response.send_message("The bot is restarting, please try again in a moment.", ephemeral=True)
+            return
+
+        with self._busy():
+            await self._resolve(interaction, action_id, confirmed)
+
+    async def _resolve(self, interaction: discord.Interaction, action_id: int, confirmed: bool):
+        try:
+            action = await self.claim(action_id, interaction.user.id)
+        except PermissionError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+
+        if action is None:
+            await interaction.response.edit_message(view=None)
+            await interaction.followup.send("This confirmation has expired.", ephemeral=True)
+            return
+
+        # the handler may wait on user locks, don't let the 3s interaction deadline pass
+        await interaction.response.defer()
+        try:
+            embed = await self.handle(action, confirmed)
+        except Exception as e:
+            logger.error(f"Confirmation {action.kind} {action.id} failed: {e}", exc_info=e)
+            embed = create_error_embed("Error", "An unexpected error occurred. Please try again later.")
+        if embed is None:
+            embed = create_error_embed("Unavailable", "This action can't be completed right now.")
+        await interaction.edit_original_response(embed=embed, view=None)
+
+    async def sweep(self) -> int:
+        """Expire overdue actions, tell their handlers and update their prompts"""
+        expired = await self.db.expire_pending_actions(time.time())
+        for row in expired:
+            action = PendingAction.from_row(row)
+            try:
+                embed = await self.handle(action, None)
+                if embed is not None and action.message_id:
+                    channel = self.bot.get_partial_messageable(action.channel_id)
+                    await channel.get_partial_message(action.message_id).edit(embed=embed, view=None)
+            except discord.HTTPException as e:
+                logger.debug(f"Could not update expired confirmation {action.id}: {e}")
+            except Exception as e:
+                logger.error(f"Timeout handler for confirmation {action.id} failed: {e}", exc_info=e)
+
+        released = await self.db.expire_holds(time.time())
+        if released:
+            logger.warning(f"Released {released} escrow holds left behind by lost confirmations")
+        return len(expired)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            if not self.accepting:
+                return
+            try:
+                with self._busy():
+                    await self.sweep()
+            except Exception as e:
+                logger.error(f"Confirmation sweep failed: {e}", exc_info=e)
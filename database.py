@@ -4,10 +4,11 @@ Database management using aiosqlite
 
 import aiosqlite
 import logging
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Sequence, Tuple, Dict, Any
 from datetime import datetime
 
 from utils.config import Config
+from utils import catalog
 
 logger = logging.getLogger('EconomyBot.Database')
 
@@ -15,6 +16,24 @@ logger = logging.getLogger('EconomyBot.Database')
 class Database:
     """Async database handler for the economy bot"""
     
+    # inventory rows reference shop_items.id, the catalog's integer item ids
+    SHOP_ITEMS_SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS shop_items (
+            id INTEGER PRIMARY KEY,
+            item_key TEXT NOT NULL UNIQUE,
+            name TEXT,
+            price INTEGER
+        )
+    '''
+    INVENTORY_SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS inventory (
+            user_id INTEGER,
+            item_id INTEGER,
+            quantity INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, item_id)
+        ) WITHOUT ROWID
+    '''
+    
     def __init__(self, db_path: str = "economy.db"):
         self.db_path = db_path
         self.conn: Optional[aiosqlite.Connection] = None
@@ -24,8 +43,24 @@ class Database:
         if self.conn is None:
             self.conn = await aiosqlite.connect(self.db_path)
             self.conn.row_factory = aiosqlite.Row
+            await self.conn.execute("PRAGMA journal_mode=WAL")
         return self.conn
         
+    def queue_depth(self) -> int:
+        """Number of requests waiting for the connection's worker thread"""
+        queue = getattr(self.conn, '_tx', None)
+        return queue.qsize() if queue is not None else 0
+        
+    async def flush(self):
+        """Commit any open transaction"""
+        if self.conn and self.conn.in_transaction:
+            await self.conn.commit()
+            
+    async def checkpoint(self):
+        """Fold the write-ahead log back into the main database file"""
+        if self.conn:
+            await self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            
     async def close(self):
         """Close database connection"""
         if self.conn:
@@ -35,6 +70,7 @@ class Database:
     async def setup(self):
         """Initialize database tables"""
         conn = await self.connect()
+        await self.migrate_item_ids()
         
         # levels table
         await conn.execute('''
@@ -81,23 +117,10 @@ class Database:
         ''')
         
         # inventory table
-        await conn.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                user_id INTEGER,
-                item_id TEXT,
-                quantity INTEGER DEFAULT 0,
-                PRIMARY KEY (user_id, item_id)
-            )
-        ''')
+        await conn.execute(self.INVENTORY_SCHEMA)
         
-        # shop items table
-        await conn.execute('''
-            CREATE TABLE IF NOT EXISTS shop_items (
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                price INTEGER
-            )
-        ''')
+        # shop items table, also the registry of item ids
+        await conn.execute(self.SHOP_ITEMS_SCHEMA)
         
         # currency log table
         await conn.execute('''
@@ -109,6 +132,10 @@ class Database:
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        # per-user history pages walk this index by id (keyset pagination)
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_currencylog_user ON currencylog (user_id, id)"
+        )
         
         # stock price table
         await conn.execute('''
@@ -135,33 +162,131 @@ class Database:
             )
         ''')
         
+        # confirmation prompts waiting for a button click, see utils.confirmations
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS pending_actions (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                expires REAL NOT NULL,
+                channel_id INTEGER,
+                message_id INTEGER
+            )
+        ''')
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_pending_actions_expires ON pending_actions (expires)"
+        )
+        
+        # coins (item_id NULL) or items moved out of a user's balance until a trade settles
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS holds (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                item_id INTEGER,
+                amount INTEGER NOT NULL,
+                expires REAL NOT NULL
+            )
+        ''')
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_holds_expires ON holds (expires)"
+        )
+        
         await conn.commit()
         
         # initialize shop items
         await self.init_shop_items()
         
+        # grinders added in the game data get their cooldown column
+        await self.ensure_cooldown_columns(Config.GRINDERS)
+        
         # initialize stock price
         await conn.execute(
             "INSERT OR IGNORE INTO stock_price (item_id, price) VALUES (?, ?)",
             ('stock', Config.STOCK_INITIAL_PRICE)
         )
         await conn.commit()
+        catalog.set_stock_price(await self.get_stock_price())
         
         logger.info("Database setup complete")
         
     async def init_shop_items(self):
-        """Initialize shop items in database"""
+        """Register the catalog's items and sync their names and prices"""
         conn = await self.connect()
         
-        for item_id, item_data in Config.SHOP_ITEMS.items():
-            if item_data['price'] is not None:
-                await conn.execute(
-                    "INSERT OR REPLACE INTO shop_items (id, name, price) VALUES (?, ?, ?)",
-                    (item_id, item_data['name'], item_data['price'])
-                )
-                
+        # adopt the persisted ids first so existing inventories keep their items
+        async with conn.execute("SELECT item_key, id FROM shop_items") as cursor:
+            persisted = {row['item_key']: row['id'] for row in await cursor.fetchall()}
+        catalog.register_ids(persisted)
+        
+        await conn.executemany('''
+            INSERT INTO shop_items (id, item_key, name, price) VALUES (?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET name = excluded.name, price = excluded.price
+        ''', [(item.id, item.key, item.name, item.price) for item in catalog.catalog()])
+        
+        # retired items keep their row so the id isn't reused, but are worth nothing,
+        # as in the catalog's price table
+        items = catalog.catalog()
+        await conn.executemany(
+            "UPDATE shop_items SET price = NULL WHERE id = ?",
+            [(item_id,) for key, item_id in persisted.items() if items.get(key) is None]
+        )
+        
         await conn.commit()
         
+    async def migrate_item_ids(self):
+        """One-off migration of inventory rows keyed by TEXT item ids to integer ids"""
+        conn = await self.connect()
+        
+        async with conn.execute("PRAGMA table_info(inventory)") as cursor:
+            types = {row['name']: row['type'].upper() for row in await cursor.fetchall()}
+        if types.get('item_id') != 'TEXT':
+            return
+            
+        logger.info("Migrating inventory to integer item ids")
+        await conn.execute("BEGIN")
+        try:
+            await conn.execute("ALTER TABLE inventory RENAME TO inventory_text")
+            await conn.execute("ALTER TABLE shop_items RENAME TO shop_items_text")
+            await conn.execute(self.SHOP_ITEMS_SCHEMA)
+            await conn.execute(self.INVENTORY_SCHEMA)
+            
+            # current items in catalog order, then keys only old rows still mention
+            catalog.register_ids({})
+            await conn.executemany(
+                "INSERT INTO shop_items (id, item_key, name, price) VALUES (?, ?, ?, ?)",
+                [(item.id, item.key, item.name, item.price) for item in catalog.catalog()]
+            )
+            await conn.execute('''
+                INSERT INTO shop_items (item_key, name, price)
+                SELECT keys.item_key, keys.item_key, shop_items_text.price
+                FROM (
+                    SELECT item_id AS item_key FROM inventory_text
+                    UNION SELECT id FROM shop_items_text
+                ) AS keys
+                LEFT JOIN shop_items_text ON shop_items_text.id = keys.item_key
+                WHERE keys.item_key NOT IN (SELECT item_key FROM shop_items)
+            ''')
+            await conn.execute('''
+                INSERT INTO inventory (user_id, item_id, quantity)
+                SELECT inventory_text.user_id, shop_items.id, inventory_text.quantity
+                FROM inventory_text
+                JOIN shop_items ON shop_items.item_key = inventory_text.item_id
+            ''')
+            await conn.execute("DROP TABLE inventory_text")
+            await conn.execute("DROP TABLE shop_items_text")
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+            
+    def item_id(self, key: str) -> int:
+        """Integer id of an item key. Raises ValueError for unknown items"""
+        item = catalog.catalog().get(key)
+        if item is None:
+            raise ValueError(f"Unknown item {key!r}")
+        return item.id
+        
     # user management
     async def ensure_user(self, user_id: int):
         """Ensure user exists in all tables"""
@@ -236,45 +361,41 @@ class Database:
         balance = await self.get_balance(user_id)
         wallet = balance['wallet']
         
-        # calculate inventory worth
-        async with conn.execute('''
-            SELECT SUM(
-                CASE 
-                    WHEN inventory.item_id = 'stock' THEN 
-                        (SELECT price FROM stock_price WHERE item_id = 'stock') * quantity
-                    ELSE 
-                        shop_items.price * quantity
-                END
-            ) as inventory_worth
-            FROM inventory
-            LEFT JOIN shop_items ON inventory.item_id = shop_items.id
-            WHERE inventory.user_id = ?
-        ''', (user_id,)) as cursor:
-            row = await cursor.fetchone()
-            inventory_worth = row['inventory_worth'] if row and row['inventory_worth'] else 0
+        # price the inventory with the catalog's price table, no join needed
+        async with conn.execute(
+            "SELECT item_id, quantity FROM inventory WHERE user_id = ?",
+            (user_id,)
+        ) as cursor:
+            inventory_worth = catalog.catalog().value(await cursor.fetchall())
             
         return wallet + inventory_worth
         
     # inventory operations
     async def get_inventory(self, user_id: int) -> List[Tuple[str, int]]:
-        """Get user's inventory"""
+        """Get user's inventory as (item key, quantity)"""
         await self.ensure_user(user_id)
         conn = await self.connect()
         
         async with conn.execute(
-            "SELECT item_id, quantity FROM inventory WHERE user_id = ? AND quantity > 0 ORDER BY quantity DESC",
+            "SELECT item_key, quantity FROM inventory "
+            "JOIN shop_items ON shop_items.id = inventory.item_id "
+            "WHERE user_id = ? AND quantity > 0 ORDER BY quantity DESC",
             (user_id,)
         ) as cursor:
-            return await cursor.fetchall()
+            return [(row['item_key'], row['quantity']) for row in await cursor.fetchall()]
             
     async def get_item_quantity(self, user_id: int, item_id: str) -> int:
         """Get quantity of specific item"""
         await self.ensure_user(user_id)
         conn = await self.connect()
         
+        item = catalog.catalog().get(item_id)
+        if item is None:
+            return 0
+            
         async with conn.execute(
             "SELECT quantity FROM inventory WHERE user_id = ? AND item_id = ?",
-            (user_id, item_id)
+            (user_id, item.id)
         ) as cursor:
             row = await cursor.fetchone()
             return row['quantity'] if row else 0
@@ -289,7 +410,7 @@ class Database:
             VALUES (?, ?, ?)
             ON CONFLICT(user_id, item_id) DO UPDATE SET
             quantity = quantity + ?
-        ''', (user_id, item_id, quantity, quantity))
+        ''', (user_id, self.item_id(item_id), quantity, quantity))
         
         await conn.commit()
         
@@ -303,11 +424,37 @@ class Database:
         conn = await self.connect()
         await conn.execute(
             "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ?",
-            (quantity, user_id, item_id)
+            (quantity, user_id, self.item_id(item_id))
         )
         await conn.commit()
         return True
         
+    async def exchange_items(self, user_id: int, item_id: str, quantity: int, rewards: Dict[str, int]) -> bool:
+        """
+        Use up `quantity` of an item and add `rewards` ({item_id: quantity}) with one commit.
+        Returns False, changing nothing, if the user doesn't have enough.
+        """
+        await self.ensure_user(user_id)
+        conn = await self.connect()
+        
+        # check and debit in one statement so a concurrent spend can't slip in between
+        cursor = await conn.execute(
+            "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
+            (quantity, user_id, self.item_id(item_id), quantity)
+        )
+        if cursor.rowcount == 0:
+            return False
+            
+        await conn.executemany('''
+            INSERT INTO inventory (user_id, item_id, quantity)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id, item_id) DO UPDATE SET
+            quantity = quantity + excluded.quantity
+        ''', [(user_id, self.item_id(reward_id), amount) for reward_id, amount in rewards.items()])
+        
+        await conn.commit()
+        return True
+        
     # level operations
     async def get_level_data(self, user_id: int) -> Dict[str, int]:
         """Get user's level data"""
@@ -372,6 +519,90 @@ class Database:
         )
         await conn.commit()
         
+    async def ensure_cooldown_columns(self, commands: Sequence[str]):
+        """Add the cooldowns column of every command that doesn't have one yet"""
+        conn = await self.connect()
+        
+        async with conn.execute("PRAGMA table_info(cooldowns)") as cursor:
+            columns = {row['name'] for row in await cursor.fetchall()}
+            
+        missing = [command for command in commands if f"{command}_cooldown" not in columns]
+        for command in missing:
+            await conn.execute(f"ALTER TABLE cooldowns ADD COLUMN {command}_cooldown REAL DEFAULT 0")
+        if missing:
+            await conn.commit()
+            
+    async def get_cooldowns(self, user_id: int, commands: Sequence[str]) -> Dict[str, float]:
+        """Cooldown expiry of several commands from one read"""
+        conn = await self.connect()
+        
+        columns = ", ".join(f"{command}_cooldown" for command in commands)
+        async with conn.execute(f"SELECT {columns} FROM cooldowns WHERE user_id = ?", (user_id,)) as cursor:
+            row = await cursor.fetchone()
+        return {command: row[f"{command}_cooldown"] if row else 0 for command in commands}
+        
+    async def claim_grind(
+        self,
+        user_id: int,
+        cooldowns: Dict[str, float],
+        now: float,
+        coins: int = 0,
+        items: Optional[Dict[str, int]] = None,
+        experience: int = 0,
+        logs: Sequence[Tuple[str, int]] = ()
+    ) -> bool:
+        """
+        Start the cooldowns ({command: expires}) of grinding commands and pay out
+        their rewards with one commit: `coins`, `items` ({item_id: quantity}),
+        `experience` and `logs` ((action, amount)) currency log rows.
+        Returns False, changing nothing, if any of the cooldowns is still running at `now`.
+        """
+        conn = await self.connect()
+        
+        # resolve item ids first, an unknown item must fail before anything is written
+        credits = [(user_id, self.item_id(item_id), quantity) for item_id, quantity in (items or {}).items()]
+        
+        for table in ('balances', 'levels', 'cooldowns'):
+            await conn.execute(f"INSERT OR IGNORE INTO {table} (user_id) VALUES (?)", (user_id,))
+            
+        # checking and starting the cooldowns is one statement, so concurrent invocations can't both pass
+        commands = list(cooldowns)
+        cursor = await conn.execute(
+            f"UPDATE cooldowns SET {', '.join(f'{command}_cooldown = ?' for command in commands)} "
+            f"WHERE user_id = ? AND {' AND '.join(f'{command}_cooldown <= ?' for command in commands)}",
+            (*cooldowns.values(), user_id, *(now for _ in commands))
+        )
+        if cursor.rowcount == 0:
+            # only the user rows were written, keep them
+            await conn.commit()
+            return False
+            
+        if coins:
+            await conn.execute(
+                "UPDATE balances SET wallet = wallet + ? WHERE user_id = ?",
+                (coins, user_id)
+            )
+        if experience:
+            await conn.execute(
+                "UPDATE levels SET experience = experience + ? WHERE user_id = ?",
+                (experience, user_id)
+            )
+        if credits:
+            await conn.executemany('''
+                INSERT INTO inventory (user_id, item_id, quantity)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, item_id) DO UPDATE SET
+                quantity = quantity + excluded.quantity
+            ''', credits)
+        if logs:
+            await conn.executemany(
+                "INSERT INTO currencylog (user_id, action, amount) VALUES (?, ?, ?)",
+                [(user_id, action, amount) for action, amount in logs]
+            )
+            
+        await conn.commit()
+        return True
+        
     # badge operations
     async def get_badges(self, user_id: int) -> List[str]:
         """Get user's badges"""
@@ -425,9 +656,10 @@ class Database:
             (price,)
         )
         await conn.commit()
+        catalog.set_stock_price(price)
         
     # leaderboard operations
-    async def get_leaderboard(self, limit: int = 10) -> List[Tuple[int, int]]:
+    async def get_leaderboard(self, limit: int = 10, offset: int = 0) -> List[Tuple[int, int]]:
         """Get top users by net worth"""
         conn = await self.connect()
         
@@ -437,7 +669,7 @@ class Database:
                 wallet + COALESCE((
                     SELECT SUM(
                         CASE 
-                            WHEN inventory.item_id = 'stock' THEN 
+                            WHEN inventory.item_id = ? THEN 
                                 (SELECT price FROM stock_price WHERE item_id = 'stock') * quantity
                             ELSE 
                                 shop_items.price * quantity
@@ -449,21 +681,25 @@ class Database:
                 ), 0) as net_worth
             FROM balances
             ORDER BY net_worth DESC
-            LIMIT ?
-        ''', (limit,)) as cursor:
+            LIMIT ? OFFSET ?
+        ''', (catalog.catalog().stock_id, limit, offset)) as cursor:
             return await cursor.fetchall()
             
     async def get_item_leaderboard(self, item_id: str, limit: int = 5) -> List[Tuple[int, int]]:
         """Get top holders of a specific item"""
         conn = await self.connect()
         
+        item = catalog.catalog().get(item_id)
+        if item is None:
+            return []
+            
         async with conn.execute('''
             SELECT user_id, quantity
             FROM inventory
             WHERE item_id = ?
             ORDER BY quantity DESC
             LIMIT ?
-        ''', (item_id, limit)) as cursor:
+        ''', (item.id, limit)) as cursor:
             return await cursor.fetchall()
             
     # boost operations
@@ -505,6 +741,199 @@ class Database:
         )
         await conn.commit()
         
+    # escrow holds
+    async def hold_coins(self, user_id: int, amount: int, expires: float) -> Optional[int]:
+        """
+        Move `amount` out of the wallet into a hold, so it can't be promised twice.
+        Returns the hold id, or None (changing nothing) if the wallet is short.
+        """
+        conn = await self.connect()
+        
+        cursor = await conn.execute(
+            "UPDATE balances SET wallet = wallet - ? WHERE user_id = ? AND wallet >= ?",
+            (amount, user_id, amount)
+        )
+        if cursor.rowcount == 0:
+            return None
+            
+        cursor = await conn.execute(
+            "INSERT INTO holds (user_id, item_id, amount, expires) VALUES (?, NULL, ?, ?)",
+            (user_id, amount, expires)
+        )
+        await conn.commit()
+        return cursor.lastrowid
+        
+    async def hold_items(self, user_id: int, item_id: str, quantity: int, expires: float) -> Optional[int]:
+        """Like hold_coins, for `quantity` of an inventory item"""
+        conn = await self.connect()
+        
+        item = catalog.catalog().get(item_id)
+        if item is None:
+            return None
+            
+        cursor = await conn.execute(
+            "UPDATE inventory SET quantity = quantity - ? WHERE user_id = ? AND item_id = ? AND quantity >= ?",
+            (quantity, user_id, item.id, quantity)
+        )
+        if cursor.rowcount == 0:
+            return None
+            
+        cursor = await conn.execute(
+            "INSERT INTO holds (user_id, item_id, amount, expires) VALUES (?, ?, ?, ?)",
+            (user_id, item.id, quantity, expires)
+        )
+        await conn.commit()
+        return cursor.lastrowid
+        
+    async def _credit_hold(self, conn: aiosqlite.Connection, user_id: int, item_id: Optional[int], amount: int):
+        """Put held coins or items into a user's balance (no commit)"""
+        if item_id is None:
+            await conn.execute("INSERT OR IGNORE INTO balances (user_id) VALUES (?)", (user_id,))
+            await conn.execute(
+                "UPDATE balances SET wallet = wallet + ? WHERE user_id = ?",
+                (amount, user_id)
+            )
+        else:
+            await conn.execute('''
+                INSERT INTO inventory (user_id, item_id, quantity)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, item_id) DO UPDATE SET
+                quantity = quantity + excluded.quantity
+            ''', (user_id, item_id, amount))
+            
+    async def _take_hold(self, conn: aiosqlite.Connection, hold_id: int) -> Optional[aiosqlite.Row]:
+        """Delete a hold and return it, or None if it was already settled (no commit)"""
+        async with conn.execute("SELECT * FROM holds WHERE id = ?", (hold_id,)) as cursor:
+            hold = await cursor.fetchone()
+        if hold is None:
+            return None
+            
+        # the delete is the claim - only one of a capture, release or sweep gets the row
+        cursor = await conn.execute("DELETE FROM holds WHERE id = ?", (hold_id,))
+        return hold if cursor.rowcount else None
+        
+    async def capture_hold(
+        self,
+        hold_id: int,
+        recipient: Optional[int] = None,
+        coins: int = 0,
+        items: Optional[Dict[str, int]] = None,
+        logs: Sequence[Tuple[int, str, int]] = ()
+    ) -> bool:
+        """
+        Settle a hold with one commit: the held coins or items go to `recipient`
+        (or are spent if there is none), the holder receives `coins` and `items`,
+        and `logs` ((user_id, action, amount)) are written to the currency log.
+        Returns False, changing nothing, if the hold was already released.
+        """
+        conn = await self.connect()
+        
+        # resolve item ids first, an unknown item must fail before anything is written
+        credits = [(self.item_id(item_id), quantity) for item_id, quantity in (items or {}).items()]
+        
+        hold = await self._take_hold(conn, hold_id)
+        if hold is None:
+            return False
+            
+        if recipient is not None:
+            await self._credit_hold(conn, recipient, hold['item_id'], hold['amount'])
+        if coins:
+            await self._credit_hold(conn, hold['user_id'], None, coins)
+        for item_id, quantity in credits:
+            await self._credit_hold(conn, hold['user_id'], item_id, quantity)
+        if logs:
+            await conn.executemany(
+                "INSERT INTO currencylog (user_id, action, amount) VALUES (?, ?, ?)",
+                logs
+            )
+            
+        await conn.commit()
+        return True
+        
+    async def release_hold(self, hold_id: int) -> bool:
+        """Give held coins or items back to their owner. False if already settled"""
+        conn = await self.connect()
+        
+        hold = await self._take_hold(conn, hold_id)
+        if hold is None:
+            return False
+            
+        await self._credit_hold(conn, hold['user_id'], hold['item_id'], hold['amount'])
+        await conn.commit()
+        return True
+        
+    async def expire_holds(self, now: float) -> int:
+        """Release every hold that expired by `now`, in one commit. Returns how many"""
+        conn = await self.connect()
+        
+        async with conn.execute("SELECT id FROM holds WHERE expires <= ?", (now,)) as cursor:
+            hold_ids = [row['id'] for row in await cursor.fetchall()]
+            
+        released = 0
+        for hold_id in hold_ids:
+            hold = await self._take_hold(conn, hold_id)
+            if hold is not None:
+                await self._credit_hold(conn, hold['user_id'], hold['item_id'], hold['amount'])
+                released += 1
+        if hold_ids:
+            await conn.commit()
+        return released
+        
+    # pending confirmations
+    async def add_pending_action(self, user_id: int, kind: str, payload: str, expires: float) -> int:
+        """Store a confirmation prompt's action. Returns its id"""
+        conn = await self.connect()
+        
+        cursor = await conn.execute(
+            "INSERT INTO pending_actions (user_id, kind, payload, expires) VALUES (?, ?, ?, ?)",
+            (user_id, kind, payload, expires)
+        )
+        await conn.commit()
+        return cursor.lastrowid
+        
+    async def set_pending_message(self, action_id: int, channel_id: int, message_id: int):
+        """Remember which message shows an action's prompt"""
+        conn = await self.connect()
+        
+        await conn.execute(
+            "UPDATE pending_actions SET channel_id = ?, message_id = ? WHERE id = ?",
+            (channel_id, message_id, action_id)
+        )
+        await conn.commit()
+        
+    async def get_pending_action(self, action_id: int) -> Optional[Dict[str, Any]]:
+        """A pending action by id, expired or not"""
+        conn = await self.connect()
+        
+        async with conn.execute("SELECT * FROM pending_actions WHERE id = ?", (action_id,)) as cursor:
+            row = await cursor.fetchone()
+        return dict(row) if row else None
+        
+    async def claim_pending_action(self, action_id: int, user_id: int, now: float) -> bool:
+        """Delete an unexpired action of `user_id`. Returns False if it was already gone"""
+        conn = await self.connect()
+        
+        cursor = await conn.execute(
+            "DELETE FROM pending_actions WHERE id = ? AND user_id = ? AND expires > ?",
+            (action_id, user_id, now)
+        )
+        await conn.commit()
+        return cursor.rowcount == 1
+        
+    async def expire_pending_actions(self, now: float) -> List[Dict[str, Any]]:
+        """Delete and return every action that expired by `now`"""
+        conn = await self.connect()
+        
+        async with conn.execute(
+            "SELECT * FROM pending_actions WHERE expires <= ? ORDER BY id",
+            (now,)
+        ) as cursor:
+            rows = [dict(row) for row in await cursor.fetchall()]
+        if rows:
+            await conn.execute("DELETE FROM pending_actions WHERE expires <= ?", (now,))
+            await conn.commit()
+        return rows
+        
     # utility functions
     async def log_transaction(self, user_id: int, action: str, amount: int):
         """Log a currency transaction"""
@@ -516,17 +945,18 @@ class Database:
         )
         await conn.commit()
         
-    async def get_currency_log(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get user's recent currency transactions"""
+    async def get_currency_log(self, user_id: int, limit: int = 10, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get user's currency transactions, newest first, older than `before_id` if given"""
         conn = await self.connect()
         
+        # ids grow with time, so they order like the timestamps and make a stable page key
         async with conn.execute('''
-            SELECT action, amount, timestamp
+            SELECT id, action, amount, timestamp
             FROM currencylog
-            WHERE user_id = ?
-            ORDER BY timestamp DESC
+            WHERE user_id = ? AND id < ?
+            ORDER BY id DESC
             LIMIT ?
-        ''', (user_id, limit)) as cursor:
+        ''', (user_id, before_id if before_id is not None else 2 ** 63 - 1, limit)) as cursor:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
             
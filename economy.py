@@ -5,15 +5,115 @@ Economy commands - balance, shop, inventory, etc.
 import discord
 from discord import app_commands
 from discord.ext import commands
-from typing import Optional
+from typing import List, Optional
 import time
 
 from utils.config import Config
 from utils.helpers import (
     format_number, create_embed, create_success_embed,
     create_error_embed, get_item_info, get_item_description,
-    ConfirmView
+    LazyPaginator, PageSource
 )
+from utils import autocomplete
+from utils.catalog import catalog
+from utils.confirmations import PendingAction
+from utils.loot import open_loot_boxes
+
+PAGE_SIZE = 10
+
+
+def item_choices(current: str, accept=None) -> List[app_commands.Choice[str]]:
+    """Autocomplete suggestions for an item argument"""
+    return [
+        app_commands.Choice(name=label[:100], value=key)
+        for key, label in autocomplete.items().complete(current, accept=accept)
+    ]
+
+
+def invalid_item_embed(item: str) -> discord.Embed:
+    """Unknown item error, suggesting the closest item id"""
+    message = "That item doesn't exist!"
+    suggestion = autocomplete.items().resolve(item)
+    if suggestion:
+        message += f" Did you mean `{suggestion}`?"
+    return create_error_embed("Invalid Item", message)
+
+
+class LeaderboardSource(PageSource):
+    """Net worth ranking, from the valuation snapshot or the database until there is one"""
+    
+    def __init__(self, db, valuation=None):
+        self.db = db
+        self.valuation = valuation
+        self.count: Optional[int] = None
+        if valuation is not None:
+            self.count = -(-len(valuation) // PAGE_SIZE)
+            
+    def page_count(self) -> Optional[int]:
+        return self.count
+        
+    async def get_page(self, page: int) -> Optional[discord.Embed]:
+        offset = page * PAGE_SIZE
+        if self.valuation is not None:
+            rows = self.valuation.leaderboard(PAGE_SIZE, offset)
+        else:
+            # one extra row tells whether there is a next page
+            rows = [(row['user_id'], row['net_worth']) for row in await self.db.get_leaderboard(PAGE_SIZE + 1, offset)]
+            if len(rows) <= PAGE_SIZE:
+                self.count = page + 1 if rows else page
+            rows = rows[:PAGE_SIZE]
+            
+        if not rows:
+            return None
+            
+        description = ""
+        for rank, (user_id, net_worth) in enumerate(rows, offset + 1):
+            description += f"**{rank}.** <@{user_id}> | ⏣ {format_number(net_worth)}\n"
+            
+        embed = create_embed(title="🏆 Richest Users", description=description, color=discord.Color.gold())
+        footer = f"Page {page + 1}" + (f"/{self.count}" if self.count else "")
+        if self.valuation is not None:
+            footer += f" • Updated {int(time.time() - self.valuation.taken_at) // 60} min ago"
+        embed.set_footer(text=footer)
+        return embed
+
+
+class CurrencyLogSource(PageSource):
+    """A user's transactions, newest first, one keyset query per page"""
+    
+    def __init__(self, db, user):
+        self.db = db
+        self.user = user
+        # id to page before for every page reached so far
+        self.keys: List[Optional[int]] = [None]
+        self.count: Optional[int] = None
+        
+    def page_count(self) -> Optional[int]:
+        return self.count
+        
+    async def get_page(self, page: int) -> Optional[discord.Embed]:
+        # pages are reached one step at a time, so the key is always known
+        if page >= len(self.keys):
+            return None
+            
+        rows = await self.db.get_currency_log(self.user.id, PAGE_SIZE + 1, self.keys[page])
+        if len(rows) > PAGE_SIZE:
+            rows = rows[:PAGE_SIZE]
+            if page + 1 == len(self.keys):
+                self.keys.append(rows[-1]['id'])
+        else:
+            self.count = page + 1 if rows else page
+            
+        if not rows:
+            return None
+            
+        description = ""
+        for row in rows:
+            description += f"`{row['timestamp']}` {row['action']} | ⏣ {format_number(row['amount'])}\n"
+            
+        embed = create_embed(title=f"{self.user.name}'s Transactions", description=description, color=discord.Color.blue())
+        embed.set_footer(text=f"Page {page + 1}" + (f"/{self.count}" if self.count else ""))
+        return embed
 
 
 class Economy(commands.Cog):
@@ -23,6 +123,15 @@ class Economy(commands.Cog):
         self.bot = bot
         self.db = bot.db
         
+        # prompts are answered by button clicks long after the command returned
+        bot.confirmations.register('buy', self.confirm_buy)
+        bot.confirmations.register('sell', self.confirm_sell)
+        bot.confirmations.register('pay', self.confirm_pay)
+        
+    def cog_unload(self):
+        # clicks on prompts of an unloaded cog are dropped instead of running stale code
+        self.bot.confirmations.unregister('buy', 'sell', 'pay')
+        
     @commands.hybrid_command(name="balance", aliases=["bal"])
     @app_commands.describe(user="The user to check balance for (optional)")
     async def balance(self, ctx: commands.Context, user: Optional[discord.Member] = None):
@@ -55,19 +164,15 @@ class Economy(commands.Cog):
             color=discord.Color.blue()
         )
         
-        # get current stock price
-        stock_price = await self.db.get_stock_price()
+        # prices come from the catalog's price table, stock included
+        items = catalog()
         
         description = ""
-        for item_id, item_data in Config.SHOP_ITEMS.items():
-            if not item_data.get('buyable', True):
+        for item in items:
+            if not item.buyable:
                 continue
                 
-            price = item_data['price']
-            if item_id == 'stock':
-                price = stock_price
-                
-            description += f"{item_data['name']} | ⏣ {format_number(price)} | `{item_id}`\n"
+            description += f"{item.name} | ⏣ {format_number(items.price(item.id))} | `{item.key}`\n"
             
         embed.description = description
         await ctx.send(embed=embed)
@@ -88,9 +193,6 @@ class Economy(commands.Cog):
             await ctx.send(embed=embed)
             return
             
-        # get stock price for calculations
-        stock_price = await self.db.get_stock_price()
-        
         # calculate values
         items_with_value = []
         total_value = 0
@@ -100,13 +202,8 @@ class Economy(commands.Cog):
             if not item_info:
                 continue
                 
-            if item_id == 'stock':
-                price = stock_price
-            else:
-                price = item_info['price']
-                
-            item_value = price * quantity
-            items_with_value.append((item_info['name'], quantity, item_value))
+            item_value = catalog().price(item_info.id) * quantity
+            items_with_value.append((item_info.name, quantity, item_value))
             total_value += item_value
             
         # sort by value
@@ -126,6 +223,23 @@ class Economy(commands.Cog):
         embed.description = description
         await ctx.send(embed=embed)
         
+    @commands.hybrid_command(name="leaderboard", aliases=["lb"])
+    async def leaderboard(self, ctx: commands.Context):
+        """View the richest users by net worth"""
+        # no snapshot yet (or valuations are disabled) means the database ranks each page
+        source = LeaderboardSource(self.db, self.bot.valuation.snapshot())
+        await LazyPaginator(source, ctx.author.id).start(
+            ctx, create_error_embed("Empty Leaderboard", "Nobody has any money yet.")
+        )
+        
+    @commands.hybrid_command(name="currencylog")
+    async def currencylog(self, ctx: commands.Context):
+        """View your transaction history"""
+        source = CurrencyLogSource(self.db, ctx.author)
+        await LazyPaginator(source, ctx.author.id).start(
+            ctx, create_error_embed("No Transactions", "You haven't earned or spent anything yet.")
+        )
+        
     @commands.hybrid_command(name="buy")
     @app_commands.describe(
         item="The item ID to buy",
@@ -138,10 +252,10 @@ class Economy(commands.Cog):
         # validate item
         item_info = get_item_info(item)
         if not item_info:
-            await ctx.send(embed=create_error_embed("Invalid Item", "That item doesn't exist!"))
+            await ctx.send(embed=invalid_item_embed(item))
             return
             
-        if not item_info.get('buyable', True):
+        if not item_info.buyable:
             await ctx.send(embed=create_error_embed("Not Buyable", "That item is not available for purchase!"))
             return
             
@@ -159,66 +273,59 @@ class Economy(commands.Cog):
                 ))
                 return
         else:
-            price = item_info['price']
+            price = item_info.price
             
         total_price = price * amount
         
-        # check balance
-        balance = await self.db.get_balance(ctx.author.id)
-        if balance['wallet'] < total_price:
+        # reserve the coins now, so the same funds can't back several open prompts
+        hold = await self.db.hold_coins(ctx.author.id, total_price, self.bot.confirmations.hold_expires())
+        if hold is None:
+            balance = await self.db.get_balance(ctx.author.id)
             await ctx.send(embed=create_error_embed(
                 "Insufficient Funds",
                 f"You need ⏣{format_number(total_price)} but only have ⏣{format_number(balance['wallet'])}!"
             ))
             return
             
-        # confirmation
-        view = ConfirmView(ctx.author.id)
-        confirm_msg = await ctx.send(
-            embed=create_embed(
+        # nothing waits here - the click runs confirm_buy, even after a restart
+        await self.bot.confirmations.prompt(
+            ctx, 'buy', {'item': item, 'amount': amount, 'price': total_price, 'hold': hold},
+            create_embed(
                 title="Confirm Purchase",
-                description=f"Buy **{amount}x {item_info['name']}** for ⏣{format_number(total_price)}?",
+                description=f"Buy **{amount}x {item_info.name}** for ⏣{format_number(total_price)}?",
                 color=discord.Color.orange()
-            ),
-            view=view
+            )
         )
         
-        await view.wait()
+    @buy.autocomplete('item')
+    async def buy_item_autocomplete(self, interaction: discord.Interaction, current: str):
+        return item_choices(current, accept=lambda key: catalog().get(key).buyable)
         
-        if view.value is None:
-            await confirm_msg.edit(
-                embed=create_error_embed("Timeout", "Purchase confirmation timed out."),
-                view=None
-            )
-            return
-            
-        if not view.value:
-            await confirm_msg.edit(
-                embed=create_error_embed("Cancelled", "Purchase cancelled."),
-                view=None
+    async def confirm_buy(self, action: PendingAction, confirmed: Optional[bool]) -> discord.Embed:
+        """Finish a purchase once its prompt is answered"""
+        item, amount, total_price, hold = (action.payload[key] for key in ('item', 'amount', 'price', 'hold'))
+        item_info = get_item_info(item)
+        if not confirmed or not item_info:
+            await self.db.release_hold(hold)
+            if confirmed is None:
+                return create_error_embed("Timeout", "Purchase confirmation timed out.")
+            if not confirmed:
+                return create_error_embed("Cancelled", "Purchase cancelled.")
+            # removed by a game data reload while the prompt was up
+            return create_error_embed("Invalid Item", "That item doesn't exist anymore!")
+            
+        # the coins were taken when the prompt was sent, the purchase can't bounce now
+        async with self.bot.locks.hold(action.user_id, operation='buy'):
+            captured = await self.db.capture_hold(
+                hold, items={item: amount}, logs=[(action.user_id, f"Bought {amount}x {item}", -total_price)]
             )
-            return
             
-        # double check balance
-        balance = await self.db.get_balance(ctx.author.id)
-        if balance['wallet'] < total_price:
-            await confirm_msg.edit(
-                embed=create_error_embed("Insufficient Funds", "You don't have enough coins anymore!"),
-                view=None
-            )
-            return
+        if not captured:
+            return create_error_embed("Expired", "This purchase expired, nothing was charged.")
             
-        # process purchase
-        await self.db.remove_coins(ctx.author.id, total_price)
-        await self.db.add_item(ctx.author.id, item, amount)
-        await self.db.log_transaction(ctx.author.id, f"Bought {amount}x {item}", -total_price)
-        
-        await confirm_msg.edit(
-            embed=create_success_embed(
-                "Purchase Complete",
-                f"You bought **{amount}x {item_info['name']}** for ⏣{format_number(total_price)}!"
-            ),
-            view=None
+        return create_success_embed(
+            "Purchase Complete",
+            f"You bought **{amount}x {item_info.name}** for ⏣{format_number(total_price)}!"
         )
         
     @commands.hybrid_command(name="sell")
@@ -233,10 +340,10 @@ class Economy(commands.Cog):
         # validate item
         item_info = get_item_info(item)
         if not item_info:
-            await ctx.send(embed=create_error_embed("Invalid Item", "That item doesn't exist!"))
+            await ctx.send(embed=invalid_item_embed(item))
             return
             
-        if not item_info.get('sellable', True):
+        if not item_info.sellable:
             await ctx.send(embed=create_error_embed("Not Sellable", "That item cannot be sold!"))
             return
             
@@ -244,70 +351,58 @@ class Economy(commands.Cog):
             await ctx.send(embed=create_error_embed("Invalid Amount", "Amount must be positive!"))
             return
             
-        # check inventory
-        quantity = await self.db.get_item_quantity(ctx.author.id, item)
-        if quantity < amount:
-            await ctx.send(embed=create_error_embed(
-                "Insufficient Items",
-                f"You only have {quantity}x {item_info['name']}!"
-            ))
-            return
-            
         # get price
         if item == 'stock':
             price = await self.db.get_stock_price()
         else:
-            price = item_info['price']
+            price = item_info.price
             
         total_price = price * amount
         
-        # confirmation
-        view = ConfirmView(ctx.author.id)
-        confirm_msg = await ctx.send(
-            embed=create_embed(
+        # reserve the items now, like buy does with coins
+        hold = await self.db.hold_items(ctx.author.id, item, amount, self.bot.confirmations.hold_expires())
+        if hold is None:
+            quantity = await self.db.get_item_quantity(ctx.author.id, item)
+            await ctx.send(embed=create_error_embed(
+                "Insufficient Items",
+                f"You only have {quantity}x {item_info.name}!"
+            ))
+            return
+            
+        await self.bot.confirmations.prompt(
+            ctx, 'sell', {'item': item, 'amount': amount, 'price': total_price, 'hold': hold},
+            create_embed(
                 title="Confirm Sale",
-                description=f"Sell **{amount}x {item_info['name']}** for ⏣{format_number(total_price)}?",
+                description=f"Sell **{amount}x {item_info.name}** for ⏣{format_number(total_price)}?",
                 color=discord.Color.orange()
-            ),
-            view=view
+            )
         )
         
-        await view.wait()
-        
-        if view.value is None:
-            await confirm_msg.edit(
-                embed=create_error_embed("Timeout", "Sale confirmation timed out."),
-                view=None
+    @sell.autocomplete('item')
+    async def sell_item_autocomplete(self, interaction: discord.Interaction, current: str):
+        return item_choices(current, accept=lambda key: catalog().get(key).sellable)
+        
+    async def confirm_sell(self, action: PendingAction, confirmed: Optional[bool]) -> discord.Embed:
+        """Finish a sale once its prompt is answered"""
+        item, amount, total_price, hold = (action.payload[key] for key in ('item', 'amount', 'price', 'hold'))
+        if not confirmed:
+            await self.db.release_hold(hold)
+            if confirmed is None:
+                return create_error_embed("Timeout", "Sale confirmation timed out.")
+            return create_error_embed("Cancelled", "Sale cancelled.")
+            
+        async with self.bot.locks.hold(action.user_id, operation='sell'):
+            captured = await self.db.capture_hold(
+                hold, coins=total_price, logs=[(action.user_id, f"Sold {amount}x {item}", total_price)]
             )
-            return
             
-        if not view.value:
-            await confirm_msg.edit(
-                embed=create_error_embed("Cancelled", "Sale cancelled."),
-                view=None
-            )
-            return
+        if not captured:
+            return create_error_embed("Expired", "This sale expired, your items were returned.")
             
-        # double check quantity
-        quantity = await self.db.get_item_quantity(ctx.author.id, item)
-        if quantity < amount:
-            await confirm_msg.edit(
-                embed=create_error_embed("Insufficient Items", "You don't have enough items anymore!"),
-                view=None
-            )
-            return
-            
-        # process sale
-        await self.db.remove_item(ctx.author.id, item, amount)
-        await self.db.add_coins(ctx.author.id, total_price)
-        await self.db.log_transaction(ctx.author.id, f"Sold {amount}x {item}", total_price)
-        
-        await confirm_msg.edit(
-            embed=create_success_embed(
-                "Sale Complete",
-                f"You sold **{amount}x {item_info['name']}** for ⏣{format_number(total_price)}!"
-            ),
-            view=None
+        item_info = get_item_info(item)
+        return create_success_embed(
+            "Sale Complete",
+            f"You sold **{amount}x {item_info.name if item_info else item}** for ⏣{format_number(total_price)}!"
         )
         
     @commands.hybrid_command(name="item")
@@ -318,14 +413,14 @@ class Economy(commands.Cog):
         
         item_info = get_item_info(item)
         if not item_info:
-            await ctx.send(embed=create_error_embed("Invalid Item", "That item doesn't exist!"))
+            await ctx.send(embed=invalid_item_embed(item))
             return
             
         # get price
         if item == 'stock':
             price = await self.db.get_stock_price()
         else:
-            price = item_info['price']
+            price = item_info.price
             
         # get user quantity
         quantity = await self.db.get_item_quantity(ctx.author.id, item)
@@ -336,10 +431,10 @@ class Economy(commands.Cog):
             color=discord.Color.blue()
         )
         
-        description = f"**{item_info['name']}** `{item}`\n"
+        description = f"**{item_info.name}** `{item}`\n"
         description += f"Price: **⏣{format_number(price)}**\n"
-        description += f"Sellable? `{'yes' if item_info.get('sellable', True) else 'no'}`\n"
-        description += f"Buyable? `{'yes' if item_info.get('buyable', True) else 'no'}`\n"
+        description += f"Sellable? `{'yes' if item_info.sellable else 'no'}`\n"
+        description += f"Buyable? `{'yes' if item_info.buyable else 'no'}`\n"
         description += f"You own: `{quantity}`\n"
         description += f"Worth: `⏣{format_number(total_worth)}`\n"
         
@@ -351,6 +446,61 @@ class Economy(commands.Cog):
         embed.description = description
         await ctx.send(embed=embed)
         
+    @item.autocomplete('item')
+    async def item_autocomplete(self, interaction: discord.Interaction, current: str):
+        return item_choices(current)
+        
+    @commands.hybrid_command(name="open")
+    @app_commands.describe(
+        box="The loot box ID to open",
+        amount="How many to open, or 'all' to keep opening any boxes of the same kind you find"
+    )
+    async def open(self, ctx: commands.Context, box: str, amount: str = "1"):
+        """Open loot boxes, any number at once"""
+        box = box.lower()
+        
+        box_info = get_item_info(box)
+        if not box_info or box not in Config.LOOT_BOXES:
+            await ctx.send(embed=create_error_embed("Invalid Item", "That isn't a loot box!"))
+            return
+            
+        chain = amount.lower() == 'all'
+        if chain:
+            count = await self.db.get_item_quantity(ctx.author.id, box)
+        elif amount.isdigit():
+            count = int(amount)
+        else:
+            await ctx.send(embed=create_error_embed("Invalid Amount", "Amount must be a number or `all`!"))
+            return
+            
+        if count <= 0:
+            message = f"You don't have any {box_info.name}!" if chain else "Amount must be positive!"
+            await ctx.send(embed=create_error_embed("Invalid Amount", message))
+            return
+            
+        # every box is rolled at once, then the boxes and all rewards change in one commit
+        opened, rewards = open_loot_boxes(box, count, chain=chain)
+        async with self.bot.locks.hold(ctx.author.id, operation='open'):
+            exchanged = await self.db.exchange_items(ctx.author.id, box, count, rewards)
+            
+        if not exchanged:
+            quantity = await self.db.get_item_quantity(ctx.author.id, box)
+            await ctx.send(embed=create_error_embed(
+                "Insufficient Items",
+                f"You only have {quantity}x {box_info.name}!"
+            ))
+            return
+            
+        lines = [
+            f"**{format_number(quantity)}x** {get_item_info(item_id).name}"
+            for item_id, quantity in sorted(rewards.items(), key=lambda reward: reward[1], reverse=True)
+        ]
+        description = f"You opened **{format_number(opened)}x {box_info.name}** and found:\n"
+        description += "\n".join(lines[:25]) if lines else "Nothing!"
+        if len(lines) > 25:
+            description += f"\n...and {len(lines) - 25} more"
+        await ctx.send(embed=create_success_embed("Loot Boxes Opened", description))
+        
     @commands.hybrid_command(name="pay", aliases=["give"])
     @app_commands.describe(
         user="The user to pay",
@@ -377,107 +527,72 @@ class Economy(commands.Cog):
             item_info = get_item_info(item)
             
             if not item_info:
-                await ctx.send(embed=create_error_embed("Invalid Item", "That item doesn't exist!"))
+                await ctx.send(embed=invalid_item_embed(item))
                 return
                 
-            # check quantity
-            quantity = await self.db.get_item_quantity(ctx.author.id, item)
-            if quantity < amount:
+            hold = await self.db.hold_items(ctx.author.id, item, amount, self.bot.confirmations.hold_expires())
+            if hold is None:
+                quantity = await self.db.get_item_quantity(ctx.author.id, item)
                 await ctx.send(embed=create_error_embed(
                     "Insufficient Items",
-                    f"You only have {quantity}x {item_info['name']}!"
+                    f"You only have {quantity}x {item_info.name}!"
                 ))
                 return
                 
-            # confirmation
-            view = ConfirmView(ctx.author.id)
-            confirm_msg = await ctx.send(
-                embed=create_embed(
-                    title="Confirm Payment",
-                    description=f"Pay **{amount}x {item_info['name']}** to {user.mention}?",
-                    color=discord.Color.orange()
-                ),
-                view=view
-            )
-            
-            await view.wait()
-            
-            if view.value is None:
-                await confirm_msg.edit(
-                    embed=create_error_embed("Timeout", "Payment confirmation timed out."),
-                    view=None
-                )
-                return
-                
-            if not view.value:
-                await confirm_msg.edit(
-                    embed=create_error_embed("Cancelled", "Payment cancelled."),
-                    view=None
-                )
-                return
-                
-            # process transfer
-            await self.db.remove_item(ctx.author.id, item, amount)
-            await self.db.add_item(user.id, item, amount)
-            
-            await confirm_msg.edit(
-                embed=create_success_embed(
-                    "Payment Complete",
-                    f"{ctx.author.mention} paid {user.mention} **{amount}x {item_info['name']}**!"
-                ),
-                view=None
-            )
+            description = f"Pay **{amount}x {item_info.name}** to {user.mention}?"
         else:
             # paying coins
-            balance = await self.db.get_balance(ctx.author.id)
-            if balance['wallet'] < amount:
+            hold = await self.db.hold_coins(ctx.author.id, amount, self.bot.confirmations.hold_expires())
+            if hold is None:
+                balance = await self.db.get_balance(ctx.author.id)
                 await ctx.send(embed=create_error_embed(
                     "Insufficient Funds",
                     f"You only have ⏣{format_number(balance['wallet'])}!"
                 ))
                 return
                 
-            # confirmation
-            view = ConfirmView(ctx.author.id)
-            confirm_msg = await ctx.send(
-                embed=create_embed(
-                    title="Confirm Payment",
-                    description=f"Pay **⏣{format_number(amount)}** to {user.mention}?",
-                    color=discord.Color.orange()
-                ),
-                view=view
-            )
-            
-            await view.wait()
+            description = f"Pay **⏣{format_number(amount)}** to {user.mention}?"
+            
+        payload = {
+            'target': user.id, 'target_name': user.name, 'author_name': ctx.author.name,
+            'amount': amount, 'item': item, 'hold': hold
+        }
+        await self.bot.confirmations.prompt(
+            ctx, 'pay', payload,
+            create_embed(title="Confirm Payment", description=description, color=discord.Color.orange())
+        )
+        
+    @pay.autocomplete('item')
+    async def pay_item_autocomplete(self, interaction: discord.Interaction, current: str):
+        return item_choices(current)
+        
+    async def confirm_pay(self, action: PendingAction, confirmed: Optional[bool]) -> discord.Embed:
+        """Finish a payment once its prompt is answered"""
+        payer = action.user_id
+        target, amount, item, hold = (action.payload[key] for key in ('target', 'amount', 'item', 'hold'))
+        if not confirmed:
+            await self.db.release_hold(hold)
+            if confirmed is None:
+                return create_error_embed("Timeout", "Payment confirmation timed out.")
+            return create_error_embed("Cancelled", "Payment cancelled.")
+            
+        # process transfer - the held coins or items go straight to the target
+        logs = [] if item else [
+            (payer, f"Paid {action.payload['target_name']}", -amount),
+            (target, f"Received from {action.payload['author_name']}", amount),
+        ]
+        async with self.bot.locks.hold(payer, target, operation='pay'):
+            captured = await self.db.capture_hold(hold, recipient=target, logs=logs)
+            
+        if not captured:
+            return create_error_embed("Expired", "This payment expired, nothing was sent.")
             
-            if view.value is None:
-                await confirm_msg.edit(
-                    embed=create_error_embed("Timeout", "Payment confirmation timed out."),
-                    view=None
-                )
-                return
-                
-            if not view.value:
-                await confirm_msg.edit(
-                    embed=create_error_embed("Cancelled", "Payment cancelled."),
-                    view=None
-                )
-                return
-                
-            # process transfer
-            await self.db.remove_coins(ctx.author.id, amount)
-            await self.db.add_coins(user.id, amount)
-            await self.db.log_transaction(ctx.author.id, f"Paid {user.name}", -amount)
-            await self.db.log_transaction(user.id, f"Received from {ctx.author.name}", amount)
-            
-            await confirm_msg.edit(
-                embed=create_success_embed(
-                    "Payment Complete",
-                    f"{ctx.author.mention} paid {user.mention} **⏣{format_number(amount)}**!"
-                ),
-                view=None
-            )
-
+        if item:
+            item_info = get_item_info(item)
+            paid = f"{amount}x {item_info.name if item_info else item}"
+        else:
+            paid = f"⏣{format_number(amount)}"
+        return create_success_embed("Payment Complete", f"<@{payer}> paid <@{target}> **{paid}**!")
 
 async def setup(bot):
     await bot.add_cog(Economy(bot))
@@ -1,19 +1,56 @@
 """
 Grinding commands - beg, search, fetch, fish, hunt, etc.
+
+Everything but search is a Config.GRINDERS entry: one generic executor rolls
+its rewards and applies cooldown, coins, items, XP and log in one transaction.
 """
 
 import discord
 from discord import app_commands
 from discord.ext import commands
+import logging
 import random
 import time
-import asyncio
+from typing import Any, Dict
 
+from utils import loot
 from utils.config import Config
 from utils.helpers import (
     format_number, create_success_embed, create_error_embed,
-    get_random_fish, get_search_location_loot, get_item_info
+    get_search_location_loot, get_item_info, roll_grinder,
+    ChoiceView
 )
+from utils.tracing import span
+
+logger = logging.getLogger('EconomyBot.Grinding')
+
+
+def grinder_command(cog: 'Grinding', name: str, grinder: loot.GrinderTable) -> commands.HybridCommand:
+    """The command of one Config.GRINDERS entry"""
+    async def command(ctx: commands.Context):
+        await cog.run_grinder(ctx, name)
+        
+    command.__doc__ = grinder.help
+    return commands.hybrid_command(name=name)(command)
+
+
+def grind_text(grinder: loot.GrinderTable, success: bool, coins: int, drops, fields) -> str:
+    """Reply text of one grinder run"""
+    if not success:
+        return grinder.fail_message
+        
+    text = grinder.message.format(coins=format_number(coins), **fields)
+    for item_id, quantity in drops:
+        text += f"\nYou also found **{quantity}x {get_item_info(item_id).name}**!"
+    return text
+    
+    
+def grind_embed(grinder: loot.GrinderTable, success: bool, coins: int, drops, fields) -> discord.Embed:
+    """Result of one grinder run"""
+    text = grind_text(grinder, success, coins, drops, fields)
+    if not success:
+        return create_error_embed(grinder.fail_title, text)
+    return create_success_embed(grinder.title, text)
 
 
 class Grinding(commands.Cog):
@@ -22,8 +59,47 @@ class Grinding(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
-        self.owners = ['sid', 'sunny', 'robert', 'nicx', 'deep', 'mohamed', 'weltan', 'xily']
+        self.grinder_commands: Dict[str, commands.HybridCommand] = {}
+        
+    async def cog_load(self):
+        grinders = loot.tables().grinders
+        # a grinder added by a game data reload needs its cooldown column before first use
+        await self.db.ensure_cooldown_columns(list(grinders))
+        
+        # one command per grinder, so adding one is a Config.GRINDERS entry and a reload of this cog
+        for name, grinder in grinders.items():
+            try:
+                self.check_grinder_name(name)
+            except ValueError as e:
+                # a bad entry costs only its own command, not search and the other grinders
+                logger.error(f"Skipping grinder: {e}")
+                continue
+            command = grinder_command(self, name, grinder)
+            self.bot.add_command(command)
+            self.grinder_commands[name] = command
+            
+        Config.add_data_check(self.check_grinders)
+        
+    def cog_unload(self):
+        Config.remove_data_check(self.check_grinders)
+        for name in self.grinder_commands:
+            self.bot.remove_command(name)
+        self.grinder_commands.clear()
         
+    def check_grinder_name(self, name: str):
+        """Raise ValueError if a grinder can't be registered as command `name`"""
+        if hasattr(self, name):
+            raise ValueError(f"Grinder name {name!r} is taken by the grinding cog")
+        command = self.bot.get_command(name)
+        if command is not None and command is not self.grinder_commands.get(name):
+            raise ValueError(f"Grinder name {name!r} is taken by the {command.qualified_name} command")
+            
+    def check_grinders(self, data: Dict[str, Any]):
+        """Game data check: every grinder must be able to become a command"""
+        for name in data['GRINDERS']:
+            self.check_grinder_name(name)
+            
+
     async def check_cooldown(self, user_id: int, command: str, cooldown_seconds: int) -> tuple[bool, float]:
         """Check if user is on cooldown. Returns (on_cooldown, remaining_time)"""
         last_use = await self.db.get_cooldown(user_id, command)
@@ -33,39 +109,94 @@ class Grinding(commands.Cog):
             return (True, last_use - current_time)
         return (False, 0)
         
-    @commands.hybrid_command(name="beg")
-    async def beg(self, ctx: commands.Context):
-        """Beg for coins"""
-        # check cooldown
-        on_cooldown, remaining = await self.check_cooldown(ctx.author.id, 'beg', 60)
-        if on_cooldown:
+    async def claim_cooldown(self, user_id: int, command: str, cooldown_seconds: int) -> tuple[bool, float]:
+        """Check the cooldown and start it if it has expired. Returns (on_cooldown, remaining_time)"""
+        # serialized per user so two concurrent invocations can't both pass the check
+        async with self.bot.locks.hold(user_id, operation=command):
+            on_cooldown, remaining = await self.check_cooldown(user_id, command, cooldown_seconds)
+            if not on_cooldown:
+                await self.db.set_cooldown(user_id, command, time.time() + cooldown_seconds)
+                
+        return (on_cooldown, remaining)
+        
+    async def run_grinder(self, ctx: commands.Context, name: str):
+        """Run a grinding command: roll in memory, then write everything with one commit"""
+        grinder = loot.tables().grinders.get(name)
+        if grinder is None:
+            # removed by a game data reload, the command goes away with the next cog reload
+            await ctx.send(embed=create_error_embed("Unavailable", "This command is not available right now."))
+            return
+            
+        success, coins, drops, fields = roll_grinder(grinder)
+        now = time.time()
+        items = {}
+        for item_id, quantity in drops:
+            items[item_id] = items.get(item_id, 0) + quantity
+            
+        # the cooldown check is part of the write, there is no read before it
+        claimed = await self.db.claim_grind(
+            ctx.author.id, {name: now + grinder.cooldown}, now,
+            coins=coins, items=items, experience=grinder.xp,
+            logs=[(grinder.log, coins)] if success else []
+        )
+        if not claimed:
+            remaining = await self.db.get_cooldown(ctx.author.id, name) - now
             await ctx.send(embed=create_error_embed(
                 "Cooldown",
                 f"You can use this command again in {int(remaining)} seconds."
             ))
             return
             
-        # set cooldown
-        await self.db.set_cooldown(ctx.author.id, 'beg', time.time() + 60)
+        await ctx.send(embed=grind_embed(grinder, success, coins, drops, fields))
         
-        # roll for success (75% chance)
-        if random.random() < 0.75:
-            amount = random.randint(1000, 10000)
-            owner = random.choice(self.owners)
+    @commands.hybrid_command(name="grind")
+    async def grind(self, ctx: commands.Context):
+        """Run every grinding command that is off cooldown at once"""
+        grinders = loot.tables().grinders
+        now = time.time()
+        cooldowns = await self.db.get_cooldowns(ctx.author.id, list(grinders))
+        ready = [grinder for name, grinder in grinders.items() if cooldowns[name] <= now]
+        if not ready:
+            await ctx.send(embed=create_error_embed(
+                "Cooldown",
+                f"Nothing to grind, the next command is ready in {int(min(cooldowns.values(), default=now) - now) + 1} seconds."
+            ))
+            return
             
-            await self.db.add_coins(ctx.author.id, amount)
-            await self.db.log_transaction(ctx.author.id, "Begged", amount)
+        # roll everything in memory, then apply the combined result with one commit
+        lines = []
+        coins = 0
+        experience = 0
+        items = {}
+        logs = []
+        for grinder in ready:
+            success, earned, drops, fields = roll_grinder(grinder)
+            coins += earned
+            experience += grinder.xp
+            for item_id, quantity in drops:
+                items[item_id] = items.get(item_id, 0) + quantity
+            if success:
+                logs.append((grinder.log, earned))
+            lines.append(f"`{grinder.name}` {grind_text(grinder, success, earned, drops, fields)}")
             
-            await ctx.send(embed=create_success_embed(
-                "Success!",
-                f"You begged so hard and {owner} gave you **⏣{format_number(amount)}**!"
-            ))
-        else:
+        claimed = await self.db.claim_grind(
+            ctx.author.id, {grinder.name: now + grinder.cooldown for grinder in ready}, now,
+            coins=coins, items=items, experience=experience, logs=logs
+        )
+        if not claimed:
+            # another grinder of this user started in between, nothing was applied
             await ctx.send(embed=create_error_embed(
-                "Failed",
-                "Your begging attempt was unsuccessful. Better luck next time!"
+                "Cooldown",
+                "Some of your grinding commands just started their cooldown, try again."
             ))
+            return
             
+        skipped = len(grinders) - len(ready)
+        footer = f"\n\nTotal: **⏣{format_number(coins)}**"
+        if skipped:
+            footer += f" • {skipped} on cooldown"
+        await ctx.send(embed=create_success_embed("Grind Complete", "\n".join(lines) + footer))
+        
     @commands.hybrid_command(name="search")
     async def search(self, ctx: commands.Context):
         """Search locations for coins and items"""
@@ -82,36 +213,40 @@ class Grinding(commands.Cog):
         all_locations = list(Config.SEARCH_LOCATIONS.keys())
         locations = random.sample(all_locations, min(2, len(all_locations)))
         
-        # send location selection
-        location_text = "\n".join([f"`{loc}`" for loc in locations])
+        # send location selection - the click is routed straight to this view, nothing
+        # inspects other users' messages while we wait
+        view = ChoiceView(ctx.author.id, [(loc, loc) for loc in locations], timeout=30)
         msg = await ctx.send(embed=create_success_embed(
             "Search Locations",
-            f"Where do you want to search?\n{location_text}"
-        ))
+            "Where do you want to search?"
+        ), view=view)
         
-        # wait for response
-        def check(m):
-            return m.author == ctx.author and m.content.lower() in locations
-            
-        try:
-            response = await self.bot.wait_for('message', check=check, timeout=30)
-        except asyncio.TimeoutError:
-            await msg.edit(embed=create_error_embed("Timeout", "Search location selection timed out."))
+        with span("wait for location", wait=True):
+            await view.wait()
+        if view.value is None:
+            await msg.edit(embed=create_error_embed("Timeout", "Search location selection timed out."), view=None)
             return
             
-        location = response.content.lower()
-        
-        # set cooldown now
-        await self.db.set_cooldown(ctx.author.id, 'search', time.time() + 60)
+        location = view.value
         
+        # start cooldown now - another search may have finished while we waited
+        on_cooldown, remaining = await self.claim_cooldown(ctx.author.id, 'search', 60)
+        if on_cooldown:
+            await ctx.send(embed=create_error_embed(
+                "Cooldown",
+                f"You can use this command again in {int(remaining)} seconds."
+            ))
+            return
+            
         # get loot
-        coins, loot = get_search_location_loot(location)
+        coins, drops = get_search_location_loot(location)
         
         # special case: death in delhi
         if coins == -1:
-            balance = await self.db.get_balance(ctx.author.id)
-            coins_lost = balance['wallet'] // 2
-            await self.db.remove_coins(ctx.author.id, coins_lost)
+            async with self.bot.locks.hold(ctx.author.id, operation='search'):
+                balance = await self.db.get_balance(ctx.author.id)
+                coins_lost = balance['wallet'] // 2
+                await self.db.remove_coins(ctx.author.id, coins_lost)
             
             await ctx.send(embed=create_error_embed(
                 "Death!",
@@ -126,149 +261,12 @@ class Grinding(commands.Cog):
         result_text = f"You searched **{location}** and found **⏣{format_number(coins)}**!"
         
         # add loot
-        for item_id, quantity in loot:
+        for item_id, quantity in drops:
             await self.db.add_item(ctx.author.id, item_id, quantity)
             item_info = get_item_info(item_id)
-            result_text += f"\nYou also found **{quantity}x {item_info['name']}**!"
+            result_text += f"\nYou also found **{quantity}x {item_info.name}**!"
             
         await ctx.send(embed=create_success_embed("Search Complete", result_text))
-        
-    @commands.hybrid_command(name="fetch")
-    async def fetch(self, ctx: commands.Context):
-        """Fetch like a good doggy for coins and items"""
-        # check cooldown
-        on_cooldown, remaining = await self.check_cooldown(ctx.author.id, 'fetch', 75)
-        if on_cooldown:
-            await ctx.send(embed=create_error_embed(
-                "Cooldown",
-                f"You can use this command again in {int(remaining)} seconds."
-            ))
-            return
-            
-        # set cooldown
-        await self.db.set_cooldown(ctx.author.id, 'fetch', time.time() + 75)
-        
-        # base coins
-        coins = random.randint(1000, 10000)
-        await self.db.add_coins(ctx.author.id, coins)
-        await self.db.log_transaction(ctx.author.id, "Fetched", coins)
-        
-        result_text = f"You fetched like a good doggy and found **⏣{format_number(coins)}**!"
-        
-        # loot rolls
-        roll = random.random()
-        if roll < 0.3:
-            await self.db.add_item(ctx.author.id, 'bone', 1)
-            result_text += "\nYou also found a **:bone: Bone**!"
-        elif roll < 0.45:
-            await self.db.add_item(ctx.author.id, 'leash', 1)
-            result_text += "\nYou also found **:service_dog: Robert's Leash**!"
-        elif roll < 0.5:
-            await self.db.add_item(ctx.author.id, 'dogfood', 1)
-            result_text += "\nYou also found **:canned_food: Dog Food**!"
-            
-        await ctx.send(embed=create_success_embed("Fetch Complete", result_text))
-        
-    @commands.hybrid_command(name="fish")
-    async def fish(self, ctx: commands.Context):
-        """Go fishing for valuable fish"""
-        # check cooldown
-        on_cooldown, remaining = await self.check_cooldown(ctx.author.id, 'fish', 60)
-        if on_cooldown:
-            await ctx.send(embed=create_error_embed(
-                "Cooldown",
-                f"You can use this command again in {int(remaining)} seconds."
-            ))
-            return
-            
-        # set cooldown
-        await self.db.set_cooldown(ctx.author.id, 'fish', time.time() + 60)
-        
-        # get random fish
-        fish_name, size, value = get_random_fish()
-        
-        await self.db.add_coins(ctx.author.id, value)
-        await self.db.log_transaction(ctx.author.id, "Fished", value)
-        
-        await ctx.send(embed=create_success_embed(
-            "Fishing Success",
-            f"You caught a **{fish_name}** ({size} inches) and earned **⏣{format_number(value)}**!"
-        ))
-        
-    @commands.hybrid_command(name="hunt")
-    async def hunt(self, ctx: commands.Context):
-        """Hunt for coins and items"""
-        # check cooldown
-        on_cooldown, remaining = await self.check_cooldown(ctx.author.id, 'hunt', 60)
-        if on_cooldown:
-            await ctx.send(embed=create_error_embed(
-                "Cooldown",
-                f"You can use this command again in {int(remaining)} seconds."
-            ))
-            return
-            
-        # set cooldown
-        await self.db.set_cooldown(ctx.author.id, 'hunt', time.time() + 60)
-        
-        # base coins
-        coins = random.randint(500, 5000)
-        await self.db.add_coins(ctx.author.id, coins)
-        await self.db.log_transaction(ctx.author.id, "Hunted", coins)
-        
-        result_text = f"You went hunting and earned **⏣{format_number(coins)}**!"
-        
-        # loot rolls
-        roll = random.randint(1, 300)
-        if 1 <= roll <= 20:
-            await self.db.add_item(ctx.author.id, 'duck', 1)
-            result_text += "\nYou also found a **:swan: wise duck**!"
-        elif roll == 21:
-            await self.db.add_item(ctx.author.id, 'cat', 1)
-            result_text += "\nYou also found **<a:weltan:1249106180677308466> weltan's cat**!"
-        elif 22 <= roll <= 30:
-            await self.db.add_item(ctx.author.id, 'temple', 1)
-            result_text += "\nYou also found **:hindu_temple: sid's temple**!"
-        elif 31 <= roll <= 40:
-            await self.db.add_item(ctx.author.id, 'legendarylootbox', 1)
-            result_text += "\nYou also found a **:gift: Legendary loot box**!"
-            
-        await ctx.send(embed=create_success_embed("Hunt Complete", result_text))
-        
-    @commands.hybrid_command(name="stake")
-    async def stake(self, ctx: commands.Context):
-        """Gamble on stake.com for coins and loot boxes"""
-        # check cooldown
-        on_cooldown, remaining = await self.check_cooldown(ctx.author.id, 'stake', 150)
-        if on_cooldown:
-            await ctx.send(embed=create_error_embed(
-                "Cooldown",
-                f"You can use this command again in {int(remaining)} seconds."
-            ))
-            return
-            
-        # set cooldown
-        await self.db.set_cooldown(ctx.author.id, 'stake', time.time() + 150)
-        
-        # base coins
-        coins = random.randint(500, 5000)
-        await self.db.add_coins(ctx.author.id, coins)
-        await self.db.log_transaction(ctx.author.id, "Staked", coins)
-        
-        result_text = f"You gambled on stake.com all night and made **⏣{format_number(coins)}**!"
-        
-        # loot rolls
-        roll = random.random()
-        if roll < 0.01:
-            await self.db.add_item(ctx.author.id, 'bestlootbox', 1)
-            result_text += "\nYou also found a **:gift: Best loot box**!"
-        elif roll < 0.05:
-            await self.db.add_item(ctx.author.id, 'legendarylootbox', 1)
-            result_text += "\nYou also found a **:gift: Legendary loot box**!"
-        elif roll < 0.2:
-            await self.db.add_item(ctx.author.id, 'rarelootbox', 1)
-            result_text += "\nYou also found a **:gift: Rare loot box**!"
-            
-        await ctx.send(embed=create_success_embed("Stake Complete", result_text))
 
 
 async def setup(bot):
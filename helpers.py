@@ -4,10 +4,22 @@ Helper utility functions
 
 import discord
 import random
-from typing import Union, Optional, List, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, Optional, List, Tuple
 from discord.ext import commands
 
 from utils.config import Config
+from utils import loot
+from utils import catalog
+from utils.catalog import Item
+from utils.metrics import REGISTRY
+
+
+PAGE_CACHE = REGISTRY.counter(
+    'economybot_page_cache_total',
+    'Paginator page renders by LRU result',
+    ('result',)
+)
 
 
 def format_number(num: int) -> str:
@@ -30,24 +42,7 @@ def get_random_fish() -> Tuple[str, int, int]:
     Get a random fish with weighted probabilities
     Returns: (fish_name, size, value)
     """
-    cumulative_prob = []
-    total = 0
-    
-    for fish in Config.FISH_TYPES:
-        total += fish[3]
-        cumulative_prob.append(total)
-        
-    roll = random.random()
-    
-    for i, prob in enumerate(cumulative_prob):
-        if roll <= prob:
-            fish_name, min_size, max_size, _ = Config.FISH_TYPES[i]
-            size = random.randint(min_size, max_size)
-            value = calculate_fish_value(size)
-            return (fish_name, size, value)
-            
-    # fallback (shouldn't happen)
-    fish_name, min_size, max_size, _ = Config.FISH_TYPES[0]
+    fish_name, min_size, max_size = loot.tables().fish.sample()
     size = random.randint(min_size, max_size)
     value = calculate_fish_value(size)
     return (fish_name, size, value)
@@ -58,25 +53,33 @@ def get_search_location_loot(location: str) -> Tuple[int, List[Tuple[str, int]]]
     Roll for loot from a search location
     Returns: (coins, [(item_id, quantity)])
     """
-    location_data = Config.SEARCH_LOCATIONS.get(location)
-    if not location_data:
+    table = loot.tables().search.get(location)
+    if not table:
         return (0, [])
         
-    # base coins
-    min_coins, max_coins = location_data['base_coins']
-    coins = random.randint(min_coins, max_coins)
-    
     # check for special effects
-    if location_data.get('special') == 'death' and random.random() < 0.1:
+    if table.death_chance and random.random() < table.death_chance:
         return (-1, [])  # signal for death (handled in command)
         
-    # roll for loot
-    loot = []
-    for item_id, chance, quantity in location_data.get('loot', []):
-        if random.random() < chance:
-            loot.append((item_id, quantity))
-            
-    return (coins, loot)
+    coins = random.randint(table.min_coins, table.max_coins)
+    return (coins, list(table.drops.sample()))
+
+
+def roll_grinder(grinder: loot.GrinderTable) -> Tuple[bool, int, List[Tuple[str, int]], Dict[str, Any]]:
+    """
+    Roll one use of a grinding command
+    Returns: (success, coins, [(item_id, quantity)], message template fields)
+    """
+    if random.random() >= grinder.success_chance:
+        return (False, 0, [], {})
+        
+    fields = {key: random.choice(options) for key, options in grinder.choices.items()}
+    if grinder.catch == 'fish':
+        fish_name, size, coins = get_random_fish()
+        fields.update(fish=fish_name, size=size)
+    else:
+        coins = random.randint(grinder.min_coins, grinder.max_coins)
+    return (True, coins, list(grinder.drops.sample()), fields)
 
 
 def roll_loot_box(box_type: str) -> List[Tuple[str, int]]:
@@ -84,51 +87,10 @@ def roll_loot_box(box_type: str) -> List[Tuple[str, int]]:
     Open a loot box and return items
     Returns: [(item_id, quantity)]
     """
-    items = []
-    
-    if box_type == 'rarelootbox':
-        roll = random.random()
-        if roll < 0.5:
-            pass  # nothing
-        elif roll < 0.8:
-            items.append(('beard', 1))
-        elif roll < 0.95:
-            items.append(('sarthak', 1))
-        else:
-            items.append(('dog', 1))
-            
-    elif box_type == 'legendarylootbox':
-        roll = random.random()
-        if roll < 0.5:
-            items.append(('sarthak', 1))
-        elif roll < 0.8:
-            pass  # nothing
-        elif roll < 0.95:
-            items.append(('sun', 1))
-        else:
-            items.append(('skull', 1))
-            
-    elif box_type == 'bestlootbox':
-        roll = random.random()
-        if roll < 0.3:
-            items.append(('skull', 1))
-        elif roll < 0.5:
-            pass  # nothing
-        elif roll < 0.7:
-            items.append(('bestlootbox', 2))
-        elif roll < 0.8:
-            items.append(('banana', 1))
-        elif roll < 0.89:
-            items.append(('beard', 1))
-        else:
-            items.append(('bolb', 1))
-            
-    elif box_type == 'godbox':
-        roll = random.random()
-        if roll >= 0.5:
-            items.append(('enicx', 1))
-            
-    return items
+    table = loot.tables().loot_boxes.get(box_type)
+    if not table:
+        return []
+    return list(table.sample())
 
 
 def create_progress_bar(current: int, maximum: int, length: int = 10) -> str:
@@ -169,49 +131,15 @@ def create_info_embed(title: str, description: str = "") -> discord.Embed:
     return create_embed(title, description, discord.Color.blue())
 
 
-def get_item_info(item_id: str) -> Optional[dict]:
-    """Get item information from config"""
-    return Config.SHOP_ITEMS.get(item_id)
+def get_item_info(item_id: str) -> Optional[Item]:
+    """Get an item from the catalog"""
+    return catalog.catalog().get(item_id)
 
 
 def get_item_description(item_id: str) -> str:
     """Get special description for items"""
-    descriptions = {
-        'rarelootbox': '**When used:**\n- 50% Chance of nothing\n- 30% Chance of Mohamed ki beard\n- 15% Chance of Sarthak\n- 5% Chance of Doggy',
-        'legendarylootbox': '**When used:**\n- 50% Chance of Sarthak\n- 30% Chance of Nothing\n- 15% Chance of Sunny\n- 5% Chance of SKULL SKELETON',
-        'bestlootbox': '**When used:**\n- 30% Chance of SKULL SKELETON\n- 20% Chance of nothing\n- 20% Chance of x2 bestlootbox\n- 10% Chance of Xily ka banana\n- 9% Chance of Mohamed ki beard\n- 1% Chance of bolb',
-        'banana': '**When used:**\n- Notifies xily u ate his bana (Item not consumed on use)',
-        'leash': "**When used:**\n- Times out Robert for 5 minutes. Item consumed on use",
-        'kuppy': '**When used:**\n- Mention a user to timeout them for 5 minutes. Item consumed on use',
-        'stock': '**When used:**\n- Price changes every 2-5 minutes, maximum is +- 30k. if it goes to 0 all stocks get deleted.',
-        'nicx': '**When used:**\n- 1% Chance of transforming into an Enchanted Nicx Crown. 99% Chance of being consumed without transforming.',
-        'godbox': '**When used:**\n- 50% Chance of Enchanted Nicx Crown\n- 50% Chance of nothing',
-        'tren': '**When used:**\n- Grants a 2x XP boost for 48 hours'
-    }
-    return descriptions.get(item_id, '')
-
-
-async def send_with_retry(
-    destination: Union[discord.TextChannel, discord.User],
-    content: str = None,
-    embed: discord.Embed = None,
-    retries: int = 3
-) -> Optional[discord.Message]:
-    """Send a message with retry logic"""
-    for attempt in range(retries):
-        try:
-            return await destination.send(content=content, embed=embed)
-        except discord.Forbidden:
-            if attempt < retries - 1:
-                continue
-            else:
-                return None
-        except Exception as e:
-            if attempt < retries - 1:
-                continue
-            else:
-                raise e
-    return None
+    item = catalog.catalog().get(item_id)
+    return item.description if item else ''
 
 
 def is_admin(user_id: int) -> bool:
@@ -224,35 +152,40 @@ def chunk_list(lst: List, chunk_size: int) -> List[List]:
     return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
 
 
-class ConfirmView(discord.ui.View):
-    """Confirmation view with Yes/No buttons"""
+class ChoiceView(discord.ui.View):
+    """One button per option, resolved by the original user's click"""
     
-    def __init__(self, user_id: int, timeout: float = 30.0):
+    def __init__(self, user_id: int, options: List[Tuple[str, str]], timeout: float = 30.0):
         super().__init__(timeout=timeout)
         self.user_id = user_id
-        self.value = None
+        self.options = [value for value, _ in options]
+        self.value: Optional[str] = None
+        
+        # clicks are routed to the view by message and custom_id, no per-message predicate runs
+        for value, label in options:
+            button = discord.ui.Button(label=label[:80], style=discord.ButtonStyle.blurple, custom_id=f"choice:{value}")
+            button.callback = self._callback(value)
+            self.add_item(button)
+            
+    def _callback(self, value: str):
+        async def callback(interaction: discord.Interaction):
+            self.select(value)
+            await interaction.response.edit_message(view=None)
+        return callback
+        
+    def select(self, value: str):
+        self.value = value
+        self.stop()
         
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         """Only allow the original user to interact"""
         if interaction.user.id != self.user_id:
             await interaction.response.send_message(
-                "This confirmation is not for you!",
+                "This choice is not for you!",
                 ephemeral=True
             )
             return False
         return True
-        
-    @discord.ui.button(label="Yes", style=discord.ButtonStyle.green)
-    async def yes_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.value = True
-        self.stop()
-        await interaction.response.defer()
-        
-    @discord.ui.button(label="No", style=discord.ButtonStyle.red)
-    async def no_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.value = False
-        self.stop()
-        await interaction.response.defer()
 
 
 class Paginator(discord.ui.View):
@@ -295,3 +228,95 @@ class Paginator(discord.ui.View):
         self.current_page = min(len(self.embeds) - 1, self.current_page + 1)
         self.update_buttons()
         await interaction.response.edit_message(embed=self.embeds[self.current_page], view=self)
+
+
+class PageSource:
+    """
+    Pages for LazyPaginator, rendered only when someone asks for them.
+    
+    page_count() may return None while the total isn't known - keyset queries
+    only find the last page by running into it.
+    """
+    
+    async def get_page(self, page: int) -> Optional[discord.Embed]:
+        """Render page `page` (0-based), or None past the last page"""
+        raise NotImplementedError
+        
+    def page_count(self) -> Optional[int]:
+        return None
+
+
+class LazyPaginator(discord.ui.View):
+    """Pagination view that renders pages on demand and keeps a few recent ones"""
+    
+    def __init__(self, source: PageSource, user_id: int, timeout: float = 60.0, cache_size: int = 4):
+        super().__init__(timeout=timeout)
+        self.source = source
+        self.user_id = user_id
+        self.current_page = 0
+        self.cache_size = cache_size
+        self.pages: OrderedDict = OrderedDict()
+        
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Only allow the original user to interact"""
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message(
+                "This paginator is not for you!",
+                ephemeral=True
+            )
+            return False
+        return True
+        
+    async def render(self, page: int) -> Optional[discord.Embed]:
+        """A page from the LRU, or rendered by the source"""
+        embed = self.pages.get(page)
+        if embed is not None:
+            PAGE_CACHE.inc(result='hit')
+            self.pages.move_to_end(page)
+            return embed
+            
+        PAGE_CACHE.inc(result='miss')
+        embed = await self.source.get_page(page)
+        if embed is not None:
+            self.pages[page] = embed
+            if len(self.pages) > self.cache_size:
+                self.pages.popitem(last=False)
+        return embed
+        
+    def update_buttons(self):
+        """Update button states"""
+        count = self.source.page_count()
+        self.previous_button.disabled = self.current_page == 0
+        self.next_button.disabled = count is not None and self.current_page >= count - 1
+        
+    async def start(self, ctx: commands.Context, empty: Optional[discord.Embed] = None) -> Optional[discord.Message]:
+        """Send the first page with the buttons, or `empty` if there are no pages"""
+        embed = await self.render(0)
+        if embed is None:
+            self.stop()
+            return await ctx.send(embed=empty) if empty is not None else None
+            
+        self.update_buttons()
+        return await ctx.send(embed=embed, view=self)
+        
+    async def show(self, interaction: discord.Interaction, page: int):
+        embed = await self.render(page)
+        if embed is None:
+            # the source just found its end, stay put with "next" disabled
+            embed = await self.render(self.current_page)
+        else:
+            self.current_page = page
+        self.update_buttons()
+        await interaction.response.edit_message(embed=embed, view=self)
+        
+    async def on_timeout(self):
+        # nothing can ask for a page any more, let the rendered ones go
+        self.pages.clear()
+        
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.primary)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, max(0, self.current_page - 1))
+        
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.primary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.current_page + 1)
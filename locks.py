@@ -0,0 +1,66 @@
+"""
+Per-user async locks for serializing economy mutations
+"""
+
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from utils.metrics import REGISTRY
+
+LOCK_WAIT = REGISTRY.histogram(
+    'economybot_user_lock_wait_seconds',
+    'Time spent waiting for per-user economy locks',
+    ('operation',),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+
+class UserLockManager:
+    """
+    Hands out one asyncio.Lock per user id.
+
+    Locks live in a WeakValueDictionary, so a lock disappears as soon as
+    nobody holds or waits on it and memory stays proportional to the number
+    of users currently mid-mutation.
+    """
+
+    def __init__(self):
+        self.locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+    def get(self, user_id: int) -> asyncio.Lock:
+        """Get (or create) the lock for a user"""
+        lock = self.locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.locks[user_id] = lock
+        return lock
+
+    def __len__(self) -> int:
+        """Number of live locks"""
+        return len(self.locks)
+
+    @asynccontextmanager
+    async def hold(self, *user_ids: int, operation: str = 'other') -> AsyncIterator[None]:
+        """
+        Hold the locks of every given user.
+
+        Locks are always taken in ascending user id order, so two-party
+        operations (A pays B while B pays A) can't deadlock.
+        """
+        # keep strong references for the whole critical section
+        locks = [self.get(user_id) for user_id in sorted(set(user_ids))]
+        acquired = []
+
+        start = time.perf_counter()
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            LOCK_WAIT.observe(time.perf_counter() - start, operation=operation)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
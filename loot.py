@@ -0,0 +1,252 @@
+"""
+Precompiled samplers for the random tables - fish, search locations, grinders and loot boxes
+
+Tables are compiled from Config once at import and again after every game data
+reload, so a roll costs one random number and two list lookups however big
+the table is.
+"""
+
+import logging
+import math
+import random
+from itertools import product
+from typing import Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from utils.config import Config
+
+logger = logging.getLogger('EconomyBot.Loot')
+
+T = TypeVar('T')
+Drops = Tuple[Tuple[str, int], ...]
+
+
+class AliasTable(Generic[T]):
+    """Weighted choice in O(1) with Vose's alias method"""
+
+    __slots__ = ('outcomes', 'weights', '_probabilities', '_aliases')
+
+    def __init__(self, outcomes: Sequence[T], weights: Sequence[float]):
+        if len(outcomes) != len(weights) or not outcomes:
+            raise ValueError("An alias table needs one weight per outcome and at least one outcome")
+        total = sum(weights)
+        if total <= 0 or any(weight < 0 for weight in weights):
+            raise ValueError("Alias table weights must be non-negative with a positive sum")
+
+        n = len(outcomes)
+        self.outcomes = tuple(outcomes)
+        # normalized, kept for callers that sample many rolls at once
+        self.weights = tuple(weight / total for weight in weights)
+
+        scaled = [weight * n for weight in self.weights]
+        probabilities = [1.0] * n
+        aliases = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probabilities[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        # whatever is left is 1 up to rounding error
+
+        self._probabilities = probabilities
+        self._aliases = aliases
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def sample(self, rng: random.Random = random) -> T:
+        # column from the integer part, coin flip from the fraction
+        u = rng.random() * len(self.outcomes)
+        i = min(int(u), len(self.outcomes) - 1)
+        if u - i < self._probabilities[i]:
+            return self.outcomes[i]
+        return self.outcomes[self._aliases[i]]
+
+
+class SearchTable:
+    """One search location: coin range, death chance and every drop combination"""
+
+    __slots__ = ('min_coins', 'max_coins', 'death_chance', 'drops')
+
+    def __init__(self, location: dict):
+        self.min_coins, self.max_coins = location['base_coins']
+        self.death_chance = 0.1 if location.get('special') == 'death' else 0.0
+
+        # each drop is rolled independently, so enumerate every hit/miss combination
+        loot = location.get('loot', [])
+        outcomes: List[Drops] = []
+        weights: List[float] = []
+        for hits in product((False, True), repeat=len(loot)):
+            weight = 1.0
+            for hit, (_, chance, _) in zip(hits, loot):
+                weight *= chance if hit else 1 - chance
+            if weight > 0:
+                outcomes.append(tuple((item_id, quantity) for hit, (item_id, _, quantity) in zip(hits, loot) if hit))
+                weights.append(weight)
+        self.drops: AliasTable[Drops] = AliasTable(outcomes, weights)
+
+
+class GrinderTable:
+    """One grinding command: its rewards, drop sampler and message templates"""
+
+    __slots__ = (
+        'name', 'cooldown', 'success_chance', 'min_coins', 'max_coins', 'catch', 'choices',
+        'xp', 'log', 'title', 'message', 'fail_title', 'fail_message', 'help', 'drops'
+    )
+
+    def __init__(self, name: str, grinder: dict):
+        self.name = name
+        self.cooldown = grinder['cooldown']
+        self.success_chance = grinder.get('success_chance', 1.0)
+        self.min_coins, self.max_coins = grinder.get('coins', (0, 0))
+        self.catch = grinder.get('catch')
+        self.choices = {key: tuple(options) for key, options in grinder.get('choices', {}).items()}
+        self.xp = grinder.get('xp', 0)
+        self.log = grinder['log']
+        self.help = grinder.get('help', name)
+        self.title = grinder.get('title', name.capitalize())
+        self.message = grinder['message']
+        self.fail_title = grinder.get('fail_title', 'Failed')
+        self.fail_message = grinder.get('fail_message', '')
+
+        # drops are exclusive, the chance left over drops nothing
+        loot = grinder.get('loot', [])
+        self.drops: AliasTable[Drops] = AliasTable(
+            [((item_id, quantity),) for item_id, _, quantity in loot] + [()],
+            [chance for _, chance, _ in loot] + [max(0.0, 1 - sum(chance for _, chance, _ in loot))]
+        )
+
+
+class LootTables:
+    """Everything compiled from one version of the game data"""
+
+    __slots__ = ('fish', 'search', 'grinders', 'loot_boxes')
+
+    def __init__(self):
+        # fish chances may sum to less than 1, the rest went to the first fish
+        fish_weights = [chance for *_, chance in Config.FISH_TYPES]
+        fish_weights[0] += max(0.0, 1 - sum(fish_weights))
+        self.fish: AliasTable[Tuple[str, int, int]] = AliasTable(
+            [(name, min_size, max_size) for name, min_size, max_size, _ in Config.FISH_TYPES], fish_weights
+        )
+
+        self.search: Dict[str, SearchTable] = {
+            name: SearchTable(location) for name, location in Config.SEARCH_LOCATIONS.items()
+        }
+
+        self.grinders: Dict[str, GrinderTable] = {
+            name: GrinderTable(name, grinder) for name, grinder in Config.GRINDERS.items()
+        }
+
+        self.loot_boxes: Dict[str, AliasTable[Drops]] = {
+            box_id: AliasTable(
+                [((item_id, quantity),) if item_id else () for item_id, _, quantity in outcomes],
+                [chance for _, chance, _ in outcomes]
+            )
+            for box_id, outcomes in Config.LOOT_BOXES.items()
+        }
+
+
+def binomial(n: int, p: float, rng: random.Random = random) -> int:
+    """
+    Successes in n trials with probability p.
+
+    Uses random.binomialvariate where it exists (Python 3.12+). Otherwise it
+    counts geometric gaps between successes, exact and O(n * min(p, 1 - p)),
+    and switches to the normal approximation once the variance is large
+    enough for it to be indistinguishable.
+    """
+    if n <= 0 or p <= 0:
+        return 0
+    if p >= 1:
+        return n
+    if hasattr(rng, 'binomialvariate'):
+        return rng.binomialvariate(n, p)
+    if p > 0.5:
+        return n - binomial(n, 1 - p, rng)
+
+    if n * p > 1000:
+        variance = n * p * (1 - p)
+        return min(n, max(0, round(rng.gauss(n * p, math.sqrt(variance)))))
+
+    log_q = math.log(1 - p)
+    successes = 0
+    position = 0
+    while True:
+        position += int(math.log(1 - rng.random()) / log_q) + 1
+        if position > n:
+            return successes
+        successes += 1
+
+
+def multinomial(n: int, table: AliasTable[T], rng: random.Random = random) -> List[Tuple[T, int]]:
+    """Split n rolls of a table across its outcomes with one binomial draw per outcome"""
+    counts = []
+    remaining = n
+    mass = 1.0
+    last = len(table.outcomes) - 1
+    for i, (outcome, weight) in enumerate(zip(table.outcomes, table.weights)):
+        if remaining <= 0:
+            break
+        # conditional on the rolls not taken by the earlier outcomes
+        count = remaining if i == last else binomial(remaining, min(1.0, weight / mass), rng)
+        if count:
+            counts.append((outcome, count))
+        remaining -= count
+        mass -= weight
+    return counts
+
+
+def open_loot_boxes(box_id: str, count: int, chain: bool = False,
+                    rng: random.Random = random) -> Tuple[int, Dict[str, int]]:
+    """
+    Open `count` boxes at once. Returns (boxes opened, {item_id: quantity}).
+
+    With `chain`, boxes of the same kind that drop (bestlootbox gives x2) are
+    opened too, round after round, instead of being returned as rewards.
+    """
+    table = tables().loot_boxes.get(box_id)
+    if not table:
+        return (0, {})
+
+    opened = 0
+    rewards: Dict[str, int] = {}
+    pending = count
+    # a box that always drops itself would never finish, stop after enough rounds
+    for _ in range(100):
+        if pending <= 0:
+            break
+        opened += pending
+        for drops, times in multinomial(pending, table, rng):
+            for item_id, quantity in drops:
+                rewards[item_id] = rewards.get(item_id, 0) + quantity * times
+        pending = rewards.pop(box_id, 0) if chain else 0
+    if pending:
+        rewards[box_id] = rewards.get(box_id, 0) + pending
+
+    return (opened, rewards)
+
+
+_tables: Optional[LootTables] = None
+
+
+def compile_tables():
+    """Rebuild the samplers from Config and swap them in (a Config reload hook)"""
+    global _tables
+    # build fully before assigning, so a failed compile leaves the old tables in place
+    tables = LootTables()
+    _tables = tables
+    logger.debug(
+        f"Compiled {len(tables.search)} search locations, {len(tables.grinders)} grinders, "
+        f"{len(tables.loot_boxes)} loot boxes"
+    )
+
+
+def tables() -> LootTables:
+    return _tables
+
+
+compile_tables()
+Config.add_reload_hook(compile_tables)
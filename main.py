@@ -5,17 +5,53 @@ A feature-rich economy bot with leveling, gambling, and more!
 
 import os
 import sys
+import time
+
+# --profile-startup[=FILE] has to hook imports before discord and the cogs load,
+# so the profiler module is loaded by path, without importing the utils package
+STARTED = time.perf_counter()
+startup_profiler = None
+for arg in sys.argv[1:]:
+    if arg.split('=', 1)[0] == '--profile-startup':
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(
+            'utils.startup', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils', 'startup.py')
+        )
+        startup = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(startup)
+        startup_profiler = startup.StartupProfiler(STARTED, arg.split('=', 1)[1] if '=' in arg else None)
+        startup_profiler.imports.install()
+        break
+
 import asyncio
 import logging
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Set
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
+# Config reads its settings from the environment when utils.config is imported,
+# so .env has to be loaded before any utils module
+load_dotenv()
+
 from utils.database import Database
 from utils.config import Config
+from utils import metrics, tracing
+from utils.querystats import QueryProfiler
+from utils.monitor import LoopMonitor, install_uvloop
+from utils.locks import UserLockManager
+from utils.ratelimit import AdmissionController, AdmissionRejected
+from utils.outbound import SendScheduler
+from utils.confirmations import ConfirmButton, ConfirmationDispatcher
+from utils.profiling import CpuProfiler, MemoryTracker
+from utils.valuation import ValuationService
+from utils.helpers import is_admin
+
+if startup_profiler:
+    startup_profiler.imports_done()
 
 # setup logging
 logging.basicConfig(
@@ -29,10 +65,15 @@ logging.basicConfig(
 logger = logging.getLogger('EconomyBot')
 
 
+class ShuttingDown(commands.CheckFailure):
+    """Raised for commands invoked after shutdown has started"""
+    pass
+
+
 class EconomyBot(commands.Bot):
     """Custom bot class with additional functionality"""
     
-    def __init__(self):
+    def __init__(self, startup_profiler=None):
         # bot intents - we need most of them for full functionality
         intents = discord.Intents.all()
         
@@ -47,28 +88,139 @@ class EconomyBot(commands.Bot):
         self.config = Config
         self.db: Optional[Database] = None
         self.start_time = discord.utils.utcnow()
+        self.startup_profiler = startup_profiler
+        self.locks = UserLockManager()
+        self.metrics_server: Optional[metrics.MetricsServer] = None
+        self.loop_monitor = LoopMonitor(Config.LOOP_MONITOR_INTERVAL, Config.LOOP_SLOW_CALLBACK_MS)
+        self.tracer = tracing.Tracer(Config.TRACE_SAMPLE_RATE, Config.TRACE_SLOW_MS / 1000, Config.TRACE_FILE)
+        
+        # state shared across cog reloads lives on the bot, never on a cog
+        self.cpu_profiler = CpuProfiler(Config.PROFILE_DIR)
+        self.memory_tracker = MemoryTracker(Config.PROFILE_DIR)
+        self.valuation = ValuationService(Config.VALUATION_INTERVAL, Config.DUPE_ALERT_GAIN)
+        self.outbound = SendScheduler(*Config.OUTBOUND_CHANNEL_LIMIT, retries=Config.OUTBOUND_RETRIES)
+        self.confirmations = ConfirmationDispatcher(self, Config.CONFIRM_TIMEOUT)
+        self.query_profiler: Optional[QueryProfiler] = (
+            QueryProfiler(Config.QUERY_BUDGET, Config.QUERY_BUDGETS) if Config.QUERY_STATS else None
+        )
+        
+        # shutdown state
+        self.accepting_commands = True
+        self.inflight: Set[commands.Context] = set()
+        self.shutdown_task: Optional[asyncio.Task] = None
+        
+        self.admission = AdmissionController(
+            Config.RATE_LIMIT_USER,
+            Config.RATE_LIMIT_GUILD,
+            Config.RATE_LIMIT_GLOBAL,
+            sheddable=Config.SHEDDABLE_COMMANDS,
+            max_loop_lag=Config.SHED_LOOP_LAG,
+            max_db_queue=Config.SHED_DB_QUEUE,
+            loop_lag=lambda: self.loop_monitor.lag,
+            db_queue=lambda: self.db.queue_depth() if self.db else 0,
+            exempt=is_admin
+        )
+        
+        # global hooks for every prefix and slash invocation
+        self.add_check(self.accepting_check)
+        self.add_check(self.admission.check)
+        self.before_invoke(self.before_command)
+        self.after_invoke(self.after_command)
         
     async def setup_hook(self):
         """Called when the bot is starting up"""
         logger.info("Starting bot setup...")
         
+        # watch for event loop stalls from the very start
+        self.loop_monitor.start()
+        
+        # game data overrides, before anything reads the tables
+        data = Config.read_data()
+        if data:
+            Config.apply_data(data)
+            logger.info(f"Loaded game data from {Config.GAME_DATA_FILE}: {', '.join(sorted(data))}")
+            
         # initialize database
         self.db = Database()
-        await self.db.setup()
+        with self.startup_phase("Database.setup"):
+            await self.db.setup()
         logger.info("Database initialized")
         
+        # confirmation buttons are matched by custom_id, prompts from before a restart included
+        self.add_dynamic_items(ConfirmButton)
+        self.confirmations.start()
+        
+        # periodic net worth snapshot of every user, read on its own connection
+        self.valuation.start(self.db.db_path)
+        
+        # optional per-command statement counting
+        if self.query_profiler:
+            self.query_profiler.instrument(self.db.conn)
+        
+        # optional metrics endpoint
+        if Config.METRICS_PORT:
+            metrics.instrument_database(self.db)
+            self.metrics_server = metrics.MetricsServer(Config.METRICS_HOST, Config.METRICS_PORT)
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                logger.error(f"Could not start metrics endpoint on {Config.METRICS_HOST}:{Config.METRICS_PORT}: {e}")
+                self.metrics_server = None
+            
+        # optional sampled tracing of database and discord calls
+        if self.tracer.enabled:
+            tracing.instrument_database(self.db)
+            tracing.instrument_discord(self)
+        
         # load all cogs
         await self.load_cogs()
         
         # sync commands if guild id is provided
-        if Config.GUILD_ID:
-            guild = discord.Object(id=Config.GUILD_ID)
-            self.tree.copy_global_to(guild=guild)
-            await self.tree.sync(guild=guild)
-            logger.info(f"Commands synced to guild {Config.GUILD_ID}")
-        else:
-            await self.tree.sync()
-            logger.info("Commands synced globally")
+        with self.startup_phase("tree sync"):
+            if Config.GUILD_ID:
+                guild = discord.Object(id=Config.GUILD_ID)
+                self.tree.copy_global_to(guild=guild)
+                await self.tree.sync(guild=guild)
+                logger.info(f"Commands synced to guild {Config.GUILD_ID}")
+            else:
+                await self.tree.sync()
+                logger.info("Commands synced globally")
+                
+    async def reload_game_data(self) -> List[str]:
+        """Re-read GAME_DATA_FILE and swap it in. Returns the tables that were replaced."""
+        loop = asyncio.get_running_loop()
+        # parse and validate off the loop; a bad file raises before anything changes
+        data = await loop.run_in_executor(None, Config.read_data)
+        Config.apply_data(data)
+        
+        # new items need persisted ids, leaderboards read prices from shop_items
+        if self.db and 'SHOP_ITEMS' in data:
+            await self.db.init_shop_items()
+        # grind reads every grinder's cooldown column, including ones added just now
+        if self.db and 'GRINDERS' in data:
+            await self.db.ensure_cooldown_columns(Config.GRINDERS)
+            
+        logger.info(f"Reloaded game data: {', '.join(sorted(data)) or 'no overrides'}")
+        return sorted(data)
+        
+    def startup_phase(self, name: str):
+        """Time a startup step when running with --profile-startup"""
+        if self.startup_profiler is None:
+            return nullcontext()
+        return self.startup_profiler.phase(name)
+        
+    def report_startup(self):
+        """Log the startup breakdown once, on the first on_ready"""
+        profiler, self.startup_profiler = self.startup_profiler, None
+        if profiler is None:
+            return
+            
+        profiler.mark("on_ready")
+        profiler.finish()
+        for line in profiler.report():
+            logger.info(line)
+        if profiler.output:
+            logger.info(f"Startup flamegraph stacks written to {profiler.output}")
             
     async def load_cogs(self):
         """Load all cog modules"""
@@ -84,7 +236,8 @@ class EconomyBot(commands.Bot):
                 
             cog_name = f"cogs.{file.stem}"
             try:
-                await self.load_extension(cog_name)
+                with self.startup_phase(f"load {cog_name}"):
+                    await self.load_extension(cog_name)
                 logger.info(f"Loaded cog: {cog_name}")
             except Exception as e:
                 logger.error(f"Failed to load cog {cog_name}: {e}")
@@ -94,6 +247,7 @@ class EconomyBot(commands.Bot):
         logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
         logger.info(f"Connected to {len(self.guilds)} guilds")
         logger.info("Bot is ready!")
+        self.report_startup()
         
         # set activity
         activity = discord.Activity(
@@ -102,46 +256,162 @@ class EconomyBot(commands.Bot):
         )
         await self.change_presence(activity=activity)
         
+    def accepting_check(self, ctx: commands.Context) -> bool:
+        """Global check that rejects new commands once shutdown has started"""
+        if not self.accepting_commands:
+            raise ShuttingDown("Bot is shutting down")
+        return True
+        
+    async def on_command(self, ctx: commands.Context):
+        """Called when a command is invoked"""
+        self.tracer.start_trace(ctx)
+        
+    async def before_command(self, ctx: commands.Context):
+        """Runs right before every command callback"""
+        ctx.command_started = time.perf_counter()
+        self.inflight.add(ctx)
+        
+        # runs inside the command's task, so child spans attach to this trace
+        self.tracer.activate(ctx)
+        if self.query_profiler:
+            self.query_profiler.begin(ctx)
+        
+    async def after_command(self, ctx: commands.Context):
+        """Runs after every command callback that completed"""
+        self.inflight.discard(ctx)
+        
+    async def on_command_completion(self, ctx: commands.Context):
+        """Called after a command finished successfully"""
+        self.inflight.discard(ctx)
+        metrics.observe_command(ctx, 'success')
+        self.tracer.finish_trace(ctx, 'success')
+        if self.query_profiler:
+            self.query_profiler.finish(ctx)
+        
     async def on_command_error(self, ctx: commands.Context, error: commands.CommandError):
         """Global error handler for text commands"""
+        # hybrid slash commands skip the after-invoke hook when they raise
+        self.inflight.discard(ctx)
+        metrics.observe_command(ctx, 'error')
+        self.tracer.finish_trace(ctx, 'error')
+        if self.query_profiler:
+            self.query_profiler.finish(ctx)
+        
         if isinstance(error, commands.CommandNotFound):
             return
             
+        if isinstance(error, AdmissionRejected):
+            if self.admission.should_notify(ctx.author.id, error.retry_after):
+                await self.notify(ctx, f"⏳ Slow down! Try again in {error.retry_after:.0f}s.")
+            return
+            
+        if isinstance(error, ShuttingDown):
+            await self.notify(ctx, "🔄 The bot is restarting, try again in a moment.")
+            return
+            
         if isinstance(error, commands.MissingRequiredArgument):
-            await ctx.send(f"❌ Missing required argument: `{error.param.name}`")
+            await self.notify(ctx, f"❌ Missing required argument: `{error.param.name}`")
             return
             
         if isinstance(error, commands.BadArgument):
-            await ctx.send(f"❌ Invalid argument provided")
+            await self.notify(ctx, f"❌ Invalid argument provided")
             return
             
         if isinstance(error, commands.CommandOnCooldown):
-            await ctx.send(f"⏰ This command is on cooldown. Try again in {error.retry_after:.1f}s")
+            await self.notify(ctx, f"⏰ This command is on cooldown. Try again in {error.retry_after:.1f}s")
             return
             
-        if isinstance(error, commands.MissingPermissions):
-            await ctx.send("❌ You don't have permission to use this command")
+        if isinstance(error, (commands.MissingPermissions, commands.CheckFailure)):
+            await self.notify(ctx, "❌ You don't have permission to use this command")
             return
             
         # log unexpected errors
         logger.error(f"Unexpected error in command {ctx.command}: {error}", exc_info=error)
-        await ctx.send("❌ An unexpected error occurred. Please try again later.")
+        await self.notify(ctx, "❌ An unexpected error occurred. Please try again later.")
         
-    async def close(self):
-        """Cleanup when bot is shutting down"""
+    async def notify(self, ctx: commands.Context, content: str):
+        """Short status reply to a command; prefix replies are queued so a burst in one channel merges"""
+        if ctx.interaction is not None:
+            # interactions must be answered on the interaction itself
+            await ctx.send(content)
+            return
+            
+        self.outbound.post(ctx.channel, content, coalesce=True)
+        
+    async def drain_commands(self, timeout: float):
+        """Wait until in-flight commands finish or the deadline passes"""
+        deadline = time.monotonic() + timeout
+        
+        if self.inflight:
+            logger.info(f"Waiting up to {timeout:.0f}s for {len(self.inflight)} in-flight commands")
+            
+        while self.inflight and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+            
+        if self.inflight:
+            names = ", ".join(sorted(str(ctx.command) for ctx in self.inflight))
+            logger.warning(f"Shutdown deadline passed with {len(self.inflight)} commands still running: {names}")
+            
+    async def shutdown(self):
+        """Drain commands and flush state before the connection goes away"""
         logger.info("Shutting down bot...")
         
+        phases = [
+            ("stop accepting commands", self.stop_accepting),
+            ("drain in-flight commands", lambda: self.drain_commands(Config.SHUTDOWN_TIMEOUT)),
+            ("finish confirmations", self.confirmations.stop),
+            ("flush outbound messages", self.outbound.close),
+            ("stop monitoring", self.stop_monitoring),
+            ("flush traces", self.tracer.flush),
+            ("report query stats", self.report_query_stats),
+        ]
         if self.db:
-            await self.db.close()
+            phases += [
+                ("flush database writes", self.db.flush),
+                ("checkpoint WAL", self.db.checkpoint),
+                ("close database", self.db.close),
+            ]
+            
+        for name, phase in phases:
+            start = time.perf_counter()
+            try:
+                await phase()
+            except Exception as e:
+                logger.error(f"Shutdown phase '{name}' failed: {e}", exc_info=e)
+            logger.info(f"Shutdown phase '{name}' took {time.perf_counter() - start:.3f}s")
+            
+    async def stop_accepting(self):
+        """Make the global check reject every new command"""
+        self.accepting_commands = False
+        
+    async def report_query_stats(self):
+        """Log the per-command statement counts collected this run"""
+        if not self.query_profiler:
+            return
+            
+        for line in self.query_profiler.report():
+            logger.info(f"Query stats: {line}")
             
+    async def stop_monitoring(self):
+        """Stop the loop monitor, valuations and the metrics server"""
+        self.loop_monitor.stop()
+        self.valuation.stop()
+        
+        if self.metrics_server:
+            await self.metrics_server.stop()
+            
+    async def close(self):
+        """Cleanup when bot is shutting down"""
+        # close() can be called more than once (signal + run() teardown)
+        if self.shutdown_task is None:
+            self.shutdown_task = asyncio.create_task(self.shutdown())
+        await asyncio.shield(self.shutdown_task)
+        
         await super().close()
 
 
 def main():
     """Main entry point"""
-    # load environment variables
-    load_dotenv()
-    
     # check for token
     token = os.getenv('DISCORD_TOKEN')
     if not token:
@@ -149,8 +419,12 @@ def main():
         logger.error("Please create a .env file with your bot token")
         sys.exit(1)
         
+    # optionally swap the event loop implementation before one is created
+    if Config.USE_UVLOOP:
+        install_uvloop()
+        
     # create and run bot
-    bot = EconomyBot()
+    bot = EconomyBot(startup_profiler)
     
     try:
         bot.run(token, log_handler=None)  # we set up our own logging
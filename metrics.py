@@ -0,0 +1,300 @@
+"""
+Lightweight Prometheus-style metrics and an optional local HTTP exporter
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger('EconomyBot.Metrics')
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    """Render a label set like {command="beg",status="ok"}"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Base class for a named metric with an optional label set"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Turn keyword labels into a tuple key in declaration order"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        """Return rendered sample lines"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render HELP, TYPE and all samples"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the counter"""
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Current value for a label set"""
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        """Set the gauge"""
+        self.values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        """Decrease the gauge"""
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Cumulative histogram with fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # key -> [bucket counts..., sum, count]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """Record an observation"""
+        key = self._key(labels)
+        data = self.values.get(key)
+        if data is None:
+            data = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                data[i] += 1
+                break
+        data[-2] += value
+        data[-1] += 1
+
+    def count(self, **labels) -> int:
+        """Number of observations for a label set"""
+        data = self.values.get(self._key(labels))
+        return data[-1] if data else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, data in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, data):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(data[-2])}")
+            lines.append(f"{self.name}_count{labels} {data[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric to the registry"""
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+COMMAND_INVOCATIONS = REGISTRY.counter(
+    'economybot_command_invocations_total',
+    'Command invocations by command and outcome',
+    ('command', 'status')
+)
+COMMAND_LATENCY = REGISTRY.histogram(
+    'economybot_command_latency_seconds',
+    'Command latency from invoke to completion',
+    ('command',)
+)
+DB_QUERIES = REGISTRY.counter(
+    'economybot_db_queries_total',
+    'Database method calls by method and outcome',
+    ('method', 'status')
+)
+DB_QUERY_LATENCY = REGISTRY.histogram(
+    'economybot_db_query_latency_seconds',
+    'Database method latency',
+    ('method',)
+)
+LOOP_LAG = REGISTRY.histogram(
+    'economybot_event_loop_lag_seconds',
+    'Delay between when a loop callback was due and when it ran',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+
+
+def observe_command(ctx, status: str):
+    """Record a finished command invocation"""
+    if ctx.command is None:
+        return
+
+    name = ctx.command.qualified_name
+    COMMAND_INVOCATIONS.inc(command=name, status=status)
+
+    started = getattr(ctx, 'command_started', None)
+    if started is not None:
+        COMMAND_LATENCY.observe(time.perf_counter() - started, command=name)
+
+
+def _timed_method(name: str, method):
+    """Wrap a bound Database coroutine method with latency/count metrics"""
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            return await method(*args, **kwargs)
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            DB_QUERY_LATENCY.observe(time.perf_counter() - start, method=name)
+            DB_QUERIES.inc(method=name, status=status)
+
+    return wrapper
+
+
+def instrument_database(db) -> None:
+    """Time every public coroutine method of a Database instance"""
+    for name in dir(type(db)):
+        if name.startswith('_') or name == 'connect':
+            continue
+
+        method = getattr(db, name)
+        if asyncio.iscoroutinefunction(method):
+            setattr(db, name, _timed_method(name, method))
+
+
+class MetricsServer:
+    """Serves the registry at /metrics on a local aiohttp server"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9100, registry: MetricsRegistry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.runner: Optional[web.AppRunner] = None
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Return the current metrics snapshot"""
+        return web.Response(
+            body=self.registry.render().encode('utf-8'),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
+
+    async def start(self):
+        """Start listening"""
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        try:
+            await site.start()
+        except OSError:
+            await self.runner.cleanup()
+            self.runner = None
+            raise
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        """Stop the server"""
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
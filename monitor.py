@@ -0,0 +1,119 @@
+"""
+Event loop health monitoring - scheduling lag, slow callbacks and uvloop
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from utils.metrics import LOOP_LAG, REGISTRY
+
+logger = logging.getLogger('EconomyBot.Monitor')
+
+SLOW_CALLBACKS = REGISTRY.counter(
+    'economybot_slow_callbacks_total',
+    'Event loop callbacks that blocked longer than the slow callback threshold'
+)
+SLOW_CALLBACK_DURATION = REGISTRY.histogram(
+    'economybot_slow_callback_seconds',
+    'Duration of callbacks that exceeded the slow callback threshold',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+
+def install_uvloop() -> bool:
+    """Switch the event loop policy to uvloop. Returns True if it is now active."""
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("USE_UVLOOP is set but uvloop is not installed, using the default asyncio loop")
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
+    return True
+
+
+def describe_callback(handle: asyncio.Handle) -> str:
+    """Name the coroutine (and the line it stopped at) behind a loop callback"""
+    callback = handle._callback
+    task = getattr(callback, '__self__', None)
+
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        code = getattr(coro, 'cr_code', None)
+        if code is None:
+            return f"{task.get_name()} {coro!r}"
+
+        # the frame is still alive while the coroutine is suspended, which
+        # is where the slow step handed control back to the loop
+        frame = getattr(coro, 'cr_frame', None)
+        line = frame.f_lineno if frame else code.co_firstlineno
+        name = getattr(code, 'co_qualname', code.co_name)
+        return f"{task.get_name()} {name} ({code.co_filename}:{line})"
+
+    return repr(handle)
+
+
+class LoopMonitor:
+    """Measures event loop scheduling lag and reports callbacks that block it"""
+
+    def __init__(self, interval: float = 0.5, slow_callback_ms: Optional[float] = 100):
+        self.interval = interval
+        self.slow_callback = slow_callback_ms / 1000 if slow_callback_ms else None
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.task: Optional[asyncio.Task] = None
+        self._original_run = None
+
+    async def _measure(self):
+        """Sleep for the interval and record how late we woke up"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            LOOP_LAG.observe(self.lag)
+
+    def _install_slow_callback_hook(self):
+        """Time every asyncio handle and log the ones over the threshold"""
+        if not isinstance(asyncio.get_running_loop(), asyncio.BaseEventLoop):
+            # uvloop runs its handles natively, so only lag is available there
+            logger.info("Slow callback reporting is only available on the default asyncio loop")
+            return
+
+        original_run = asyncio.events.Handle._run
+        threshold = self.slow_callback
+
+        def _run(handle):
+            start = time.perf_counter()
+            original_run(handle)
+            duration = time.perf_counter() - start
+            if duration >= threshold:
+                SLOW_CALLBACKS.inc()
+                SLOW_CALLBACK_DURATION.observe(duration)
+                logger.warning(f"Slow callback took {duration * 1000:.1f}ms: {describe_callback(handle)}")
+
+        self._original_run = original_run
+        asyncio.events.Handle._run = _run
+
+    def start(self):
+        """Start monitoring the running loop"""
+        if self.task is not None:
+            return
+
+        if self.slow_callback:
+            self._install_slow_callback_hook()
+        self.task = asyncio.create_task(self._measure(), name='loop-monitor')
+
+    def stop(self):
+        """Stop monitoring and remove the slow callback hook"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
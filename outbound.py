@@ -0,0 +1,268 @@
+"""
+Outbound message scheduling - per-channel queues paced to Discord's limits
+
+Messages the bot sends on its own (not replies to an interaction) go through
+one queue per channel. Each queue drains at the channel's message rate, so a
+burst waits here instead of piling up 429s, and queued text can be merged
+into a single message. Failures are retried with exponential backoff and
+jitter; errors that can never succeed (missing permissions, deleted
+channels) drop the message instead.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import discord
+
+from utils.metrics import REGISTRY
+from utils.ratelimit import TokenBucket
+
+logger = logging.getLogger('EconomyBot.Outbound')
+
+OUTBOUND_MESSAGES = REGISTRY.counter(
+    'economybot_outbound_messages_total',
+    'Queued outbound messages by outcome',
+    ('outcome',)
+)
+OUTBOUND_RETRIES = REGISTRY.counter(
+    'economybot_outbound_retries_total',
+    'Outbound send attempts retried, by reason',
+    ('reason',)
+)
+OUTBOUND_QUEUED = REGISTRY.gauge(
+    'economybot_outbound_queued',
+    'Messages waiting in outbound channel queues'
+)
+
+# Discord's per-message limits, merged messages must stay inside them
+MAX_CONTENT = 2000
+MAX_EMBEDS = 10
+
+
+class _Pending:
+    """One queued message and the future its sender waits on"""
+
+    __slots__ = ('content', 'embeds', 'coalesce', 'future')
+
+    def __init__(self, content: Optional[str], embeds: List[discord.Embed], coalesce: bool, future: asyncio.Future):
+        self.content = content
+        self.embeds = embeds
+        self.coalesce = coalesce
+        self.future = future
+
+
+class _Channel:
+    """Queue, pacing bucket and worker task of one destination"""
+
+    __slots__ = ('destination', 'queue', 'bucket', 'worker')
+
+    def __init__(self, destination: discord.abc.Messageable, rate: float, burst: float):
+        self.destination = destination
+        self.queue: Deque[_Pending] = deque()
+        self.bucket = TokenBucket(rate, burst, time.monotonic())
+        self.worker: Optional[asyncio.Task] = None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds Discord asked us to wait, for rate limit errors"""
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    if isinstance(error, discord.HTTPException) and error.status == 429:
+        headers = getattr(error.response, 'headers', None) or {}
+        try:
+            return float(headers.get('Retry-After', 1))
+        except ValueError:
+            return 1.0
+    return None
+
+
+def _retriable(error: Exception) -> bool:
+    """Server errors and connection problems may pass, 4xx responses won't"""
+    if isinstance(error, discord.HTTPException):
+        return error.status >= 500
+    return isinstance(error, (OSError, asyncio.TimeoutError))
+
+
+class SendScheduler:
+    """Per-channel outbound queues with pacing, retries and coalescing"""
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 5,
+        retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        max_queue: int = 50
+    ):
+        # Discord allows about 5 messages per 5 seconds per channel
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.channels: Dict[int, _Channel] = {}
+        self.closed = False
+
+    def queued(self) -> int:
+        return sum(len(channel.queue) for channel in self.channels.values())
+
+    def post(
+        self,
+        destination: discord.abc.Messageable,
+        content: Optional[str] = None,
+        embed: Optional[discord.Embed] = None,
+        coalesce: bool = False
+    ) -> asyncio.Future:
+        """
+        Queue a message and return a future for the sent message.
+
+        The future resolves to None if the message was dropped. Messages posted
+        with `coalesce=True` may be merged with other such messages queued for
+        the same channel; they all resolve to the merged message.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self.closed:
+            OUTBOUND_MESSAGES.inc(outcome='dropped')
+            future.set_result(None)
+            return future
+
+        channel = self.channels.get(destination.id)
+        if channel is None:
+            channel = self.channels[destination.id] = _Channel(destination, self.rate, self.burst)
+
+        if len(channel.queue) >= self.max_queue:
+            # a channel this far behind won't catch up, shed the newest message
+            OUTBOUND_MESSAGES.inc(outcome='dropped')
+            logger.warning(f"Outbound queue for {destination.id} is full, dropping a message")
+            future.set_result(None)
+            return future
+
+        channel.queue.append(_Pending(content, [embed] if embed else [], coalesce, future))
+        OUTBOUND_QUEUED.inc()
+        if channel.worker is None:
+            channel.worker = asyncio.create_task(self._drain(destination.id, channel), name=f'outbound-{destination.id}')
+        return future
+
+    async def send(
+        self,
+        destination: discord.abc.Messageable,
+        content: Optional[str] = None,
+        embed: Optional[discord.Embed] = None,
+        coalesce: bool = False
+    ) -> Optional[discord.Message]:
+        """Queue a message and wait until it was sent (None if it was dropped)"""
+        return await asyncio.shield(self.post(destination, content, embed, coalesce))
+
+    def _take(self, channel: _Channel) -> List[_Pending]:
+        """The next message, merged with the coalescable ones right behind it"""
+        batch = [channel.queue.popleft()]
+        if not batch[0].coalesce:
+            return batch
+
+        length = len(batch[0].content or '')
+        embeds = len(batch[0].embeds)
+        while channel.queue and channel.queue[0].coalesce:
+            following = channel.queue[0]
+            extra = len(following.content or '') + 1 if following.content else 0
+            if length + extra > MAX_CONTENT or embeds + len(following.embeds) > MAX_EMBEDS:
+                break
+            batch.append(channel.queue.popleft())
+            length += extra
+            embeds += len(following.embeds)
+        return batch
+
+    async def _drain(self, key: int, channel: _Channel):
+        """Worker of one channel, exits (and forgets the channel) once its queue is empty"""
+        try:
+            while channel.queue:
+                wait = channel.bucket.wait_time(time.monotonic())
+                if wait:
+                    await asyncio.sleep(wait)
+                    continue
+                channel.bucket.take()
+
+                batch = self._take(channel)
+                OUTBOUND_QUEUED.dec(len(batch))
+                if len(batch) > 1:
+                    OUTBOUND_MESSAGES.inc(len(batch) - 1, outcome='coalesced')
+
+                content = "\n".join(pending.content for pending in batch if pending.content) or None
+                embeds = [embed for pending in batch for embed in pending.embeds]
+                try:
+                    message = await self._deliver(channel, content, embeds)
+                except Exception as e:
+                    for pending in batch:
+                        if not pending.future.done():
+                            pending.future.set_exception(e)
+                            # nobody may be awaiting a posted message, don't warn about it
+                            pending.future.exception()
+                    continue
+
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_result(message)
+        finally:
+            channel.worker = None
+            if self.channels.get(key) is channel and not channel.queue:
+                del self.channels[key]
+
+    async def _deliver(self, channel: _Channel, content: Optional[str], embeds: List[discord.Embed]) -> Optional[discord.Message]:
+        """Send with retries. Returns None for a dropped message, raises once retries run out"""
+        attempt = 0
+        while True:
+            try:
+                message = await channel.destination.send(content=content, embeds=embeds)
+                OUTBOUND_MESSAGES.inc(outcome='sent')
+                return message
+            except (discord.Forbidden, discord.NotFound) as e:
+                # no permission or no channel - retrying can't fix that
+                OUTBOUND_MESSAGES.inc(outcome='dropped')
+                logger.info(f"Dropping message to {channel.destination.id}: {e}")
+                return None
+            except Exception as e:
+                retry_after = _retry_after(e)
+                if (retry_after is None and not _retriable(e)) or attempt >= self.retries:
+                    OUTBOUND_MESSAGES.inc(outcome='failed')
+                    logger.warning(f"Giving up on message to {channel.destination.id} after {attempt + 1} attempts: {e}")
+                    raise
+
+                if retry_after is not None:
+                    # the whole channel waits out the rate limit, nothing else is sent to it meanwhile
+                    OUTBOUND_RETRIES.inc(reason='ratelimited')
+                    delay = retry_after
+                else:
+                    # full jitter keeps retries from many channels from lining up
+                    OUTBOUND_RETRIES.inc(reason='error')
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def close(self, timeout: float = 5.0):
+        """Stop accepting messages and give the queued ones `timeout` seconds to go out"""
+        self.closed = True
+        workers = [channel.worker for channel in self.channels.values() if channel.worker]
+        if not workers:
+            return
+
+        done, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+        dropped = 0
+        for channel in list(self.channels.values()):
+            while channel.queue:
+                pending_message = channel.queue.popleft()
+                if not pending_message.future.done():
+                    pending_message.future.set_result(None)
+                dropped += 1
+        if dropped:
+            OUTBOUND_QUEUED.dec(dropped)
+            OUTBOUND_MESSAGES.inc(dropped, outcome='dropped')
+            logger.warning(f"Dropped {dropped} queued messages on shutdown")
+        self.channels.clear()
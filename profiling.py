@@ -0,0 +1,226 @@
+"""
+On-demand profiling of the running bot - cProfile, a sampling profiler and
+tracemalloc snapshot diffs
+"""
+
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger('EconomyBot.Profiling')
+
+
+class ProfilerBusy(Exception):
+    """Raised when a CPU profile is requested while another one is running"""
+    pass
+
+
+def _profile_path(directory: str, kind: str, extension: str) -> str:
+    """Timestamped output file in the profile directory"""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class CpuProfiler:
+    """Time-boxed profiles of the event loop thread, one at a time"""
+
+    def __init__(self, directory: str = 'profiles'):
+        self.directory = directory
+        self.running = False
+
+    async def profile(self, seconds: float) -> Tuple[str, List[str]]:
+        """
+        Run cProfile for `seconds` and write a pstats file.
+
+        Everything the event loop executes in the window is captured, since
+        the whole bot runs on this one thread. Returns (path, top functions).
+        """
+        if self.running:
+            raise ProfilerBusy("A CPU profile is already running")
+
+        self.running = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+            self.running = False
+
+        path = _profile_path(self.directory, 'cpu', 'pstats')
+        loop = asyncio.get_running_loop()
+        lines = await loop.run_in_executor(None, self._dump, profiler, path)
+        logger.info(f"CPU profile ({seconds}s) written to {path}")
+        return path, lines
+
+    def _dump(self, profiler: cProfile.Profile, path: str, top: int = 10) -> List[str]:
+        """Write the stats and summarize them (off the event loop)"""
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler)
+
+        lines = []
+        for (filename, line, name), (_, calls, _, cumulative, _) in sorted(
+            stats.stats.items(), key=lambda item: item[1][3], reverse=True
+        )[:top]:
+            lines.append(f"{cumulative * 1000:>9.1f}ms {calls:>7} {name} ({os.path.basename(filename)}:{line})")
+        return lines
+
+    async def sample(self, seconds: float, interval: float = 0.005) -> Tuple[str, List[str]]:
+        """
+        Sample the event loop thread's stack every `interval` seconds of CPU time.
+
+        Much cheaper than cProfile, so it can run for longer under real load.
+        Writes folded stacks (for flamegraph tools) and returns (path, hottest frames).
+        """
+        if self.running:
+            raise ProfilerBusy("A CPU profile is already running")
+
+        self.running = True
+        stacks: Counter = Counter()
+
+        def record(frame):
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                stacks[";".join(reversed(stack))] += 1
+
+        try:
+            if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+                await self._sample_with_timer(seconds, interval, record)
+            else:
+                await self._sample_with_thread(seconds, interval, record)
+        finally:
+            self.running = False
+
+        loop = asyncio.get_running_loop()
+        path = _profile_path(self.directory, 'sample', 'folded')
+        lines = await loop.run_in_executor(None, self._write_samples, stacks, path)
+        logger.info(f"Sampled profile ({seconds}s, {sum(stacks.values())} samples) written to {path}")
+        return path, lines
+
+    async def _sample_with_timer(self, seconds: float, interval: float, record):
+        """
+        SIGPROF fires after every `interval` of CPU time and its handler runs
+        between bytecodes of the loop thread, so it sees exactly what was running
+        """
+        previous = signal.signal(signal.SIGPROF, lambda signum, frame: record(frame))
+        signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, previous)
+
+    async def _sample_with_thread(self, seconds: float, interval: float, record):
+        """
+        Fallback for platforms without setitimer - reads the loop thread's frame
+        from a helper thread. Biased towards GIL release points like select().
+        """
+        target = threading.get_ident()
+        stop = threading.Event()
+
+        def sampler():
+            while not stop.wait(interval):
+                record(sys._current_frames().get(target))
+
+        thread = threading.Thread(target=sampler, name='profile-sampler', daemon=True)
+        thread.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+
+    def _write_samples(self, stacks: Counter, path: str, top: int = 10) -> List[str]:
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # leaf frames approximate self time
+        leaves: Counter = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [f"{count / total:>6.1%} {frame}" for frame, count in leaves.most_common(top)]
+
+
+class MemoryTracker:
+    """tracemalloc snapshots, each compared with the previous one"""
+
+    def __init__(self, directory: str = 'profiles'):
+        self.directory = directory
+        self.previous: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10):
+        """Start tracing allocations (costs memory and some CPU until stopped)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.previous = None
+
+    def stop(self):
+        tracemalloc.stop()
+        self.previous = None
+
+    async def snapshot(self, top: int = 10) -> Tuple[str, List[str]]:
+        """
+        Take and save a snapshot.
+
+        Returns (path, lines): the biggest allocation growth since the last
+        snapshot, or the biggest allocation sites for the first one.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("Memory tracing is not running")
+
+        loop = asyncio.get_running_loop()
+        # the walk over every traced block takes a while on a big heap
+        snapshot = await loop.run_in_executor(None, self._take)
+        path = _profile_path(self.directory, 'memory', 'snapshot')
+        lines = await loop.run_in_executor(None, self._summarize, snapshot, self.previous, path, top)
+        self.previous = snapshot
+        logger.info(f"Memory snapshot written to {path}")
+        return path, lines
+
+    def _take(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def _summarize(self, snapshot, previous, path: str, top: int) -> List[str]:
+        snapshot.dump(path)
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)"]
+
+        if previous is None:
+            for stat in snapshot.statistics('lineno')[:top]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size / 1024:>9.1f} KiB {stat.count:>7} {os.path.basename(frame.filename)}:{frame.lineno}")
+            return lines
+
+        for stat in snapshot.compare_to(previous, 'lineno')[:top]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size_diff / 1024:>+9.1f} KiB {stat.count_diff:>+7} "
+                f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            )
+        return lines
@@ -0,0 +1,161 @@
+"""
+Per-invocation database round trip accounting - statements, commits and rows
+per command, with a budget that flags N+1 style regressions
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger('EconomyBot.QueryStats')
+
+STATEMENTS_PER_COMMAND = REGISTRY.histogram(
+    'economybot_db_statements_per_command',
+    'SQL statements executed by one command invocation',
+    ('command',),
+    buckets=(1, 2, 4, 6, 8, 10, 15, 20, 30, 50, 100)
+)
+QUERY_BUDGET_EXCEEDED = REGISTRY.counter(
+    'economybot_db_query_budget_exceeded_total',
+    'Command invocations that executed more statements than their budget',
+    ('command',)
+)
+
+# stats of the invocation running in the current task
+current_stats: ContextVar[Optional['QueryStats']] = ContextVar('current_stats', default=None)
+
+_STATEMENT_CALLS = {'execute', 'executemany', 'executescript'}
+_FETCH_CALLS = {'fetchall', 'fetchmany'}
+
+
+class QueryStats:
+    """Round trips made by a single command invocation"""
+
+    __slots__ = ('statements', 'commits', 'rows')
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self.rows = 0
+
+    def record(self, name: str, result):
+        """Account for one call that went through the connection's worker thread"""
+        if name in _STATEMENT_CALLS:
+            self.statements += 1
+            # rows changed by writes (-1 for queries)
+            self.rows += max(getattr(result, 'rowcount', 0), 0)
+        elif name == 'commit':
+            self.commits += 1
+        elif name == 'fetchone':
+            self.rows += result is not None
+        elif name in _FETCH_CALLS:
+            self.rows += len(result)
+
+
+class CommandQueryStats:
+    """Totals for every recorded invocation of one command"""
+
+    __slots__ = ('invocations', 'statements', 'commits', 'rows', 'max_statements', 'over_budget')
+
+    def __init__(self):
+        self.invocations = 0
+        self.statements = 0
+        self.commits = 0
+        self.rows = 0
+        self.max_statements = 0
+        self.over_budget = 0
+
+    def add(self, stats: QueryStats, over_budget: bool):
+        self.invocations += 1
+        self.statements += stats.statements
+        self.commits += stats.commits
+        self.rows += stats.rows
+        self.max_statements = max(self.max_statements, stats.statements)
+        self.over_budget += over_budget
+
+    def to_dict(self) -> Dict[str, float]:
+        """Totals plus per-invocation averages"""
+        n = self.invocations or 1
+        return {
+            'invocations': self.invocations,
+            'statements_avg': round(self.statements / n, 2),
+            'statements_max': self.max_statements,
+            'commits_avg': round(self.commits / n, 2),
+            'rows_avg': round(self.rows / n, 2),
+            'over_budget': self.over_budget,
+        }
+
+
+class QueryProfiler:
+    """Counts the database work each command invocation does and flags commands over budget"""
+
+    def __init__(self, budget: int = 10, budgets: Optional[Dict[str, int]] = None):
+        self.budget = budget
+        self.budgets = budgets or {}
+        self.commands: Dict[str, CommandQueryStats] = {}
+
+    def budget_for(self, command: str) -> int:
+        """Statement budget of a command"""
+        return self.budgets.get(command, self.budget)
+
+    def instrument(self, conn) -> None:
+        """Count every call an aiosqlite connection hands to its worker thread"""
+        # Connection._execute is awaited from the calling task, so the
+        # invocation's stats are still the current context there
+        execute = conn._execute
+
+        async def counted_execute(fn, *args, **kwargs):
+            result = await execute(fn, *args, **kwargs)
+            stats = current_stats.get()
+            if stats is not None:
+                stats.record(getattr(fn, '__name__', ''), result)
+            return result
+
+        conn._execute = counted_execute
+
+    def begin(self, ctx):
+        """Start counting for an invocation - call from the task running the command"""
+        ctx.query_stats = QueryStats()
+        current_stats.set(ctx.query_stats)
+
+    def finish(self, ctx) -> Optional[QueryStats]:
+        """Fold an invocation's counts into its command's totals"""
+        stats = getattr(ctx, 'query_stats', None)
+        if stats is None or ctx.command is None:
+            return None
+        # on_command_completion and on_command_error can both run for one invocation
+        ctx.query_stats = None
+
+        name = ctx.command.qualified_name
+        budget = self.budget_for(name)
+        over_budget = stats.statements > budget
+
+        self.commands.setdefault(name, CommandQueryStats()).add(stats, over_budget)
+        STATEMENTS_PER_COMMAND.observe(stats.statements, command=name)
+
+        if over_budget:
+            QUERY_BUDGET_EXCEEDED.inc(command=name)
+            logger.warning(
+                f"Command {name} ran {stats.statements} statements "
+                f"({stats.commits} commits, {stats.rows} rows), budget is {budget}"
+            )
+        return stats
+
+    def report(self) -> List[str]:
+        """Per-command summary lines, heaviest commands first"""
+        rows = sorted(
+            self.commands.items(),
+            key=lambda item: item[1].statements / item[1].invocations,
+            reverse=True
+        )
+        lines = []
+        for name, totals in rows:
+            data = totals.to_dict()
+            lines.append(
+                f"{name:<16} x{data['invocations']:<6} statements avg {data['statements_avg']:>6} "
+                f"max {data['statements_max']:>4}  commits avg {data['commits_avg']:>5}  "
+                f"rows avg {data['rows_avg']:>6}  over budget {data['over_budget']}"
+            )
+        return lines
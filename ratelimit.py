@@ -0,0 +1,157 @@
+"""
+Admission control - token buckets per user, per guild and globally, plus load shedding
+"""
+
+import time
+from typing import Callable, Dict, Hashable, Iterable, Tuple
+
+from discord.ext import commands
+
+from utils.metrics import REGISTRY
+
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    'economybot_admission_rejections_total',
+    'Commands rejected before running, by reason',
+    ('reason',)
+)
+
+
+class AdmissionRejected(commands.CheckFailure):
+    """Raised by the global check when a command is not admitted"""
+
+    def __init__(self, reason: str, retry_after: float = 0.0):
+        super().__init__(f"Command rejected ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float, amount: float = 1) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)"""
+        self.refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float = 1):
+        """Remove tokens - call after wait_time() returned 0"""
+        self.tokens -= amount
+
+
+class BucketMap:
+    """Token buckets created on demand per key, with idle buckets evicted"""
+
+    def __init__(self, rate: float, capacity: float, sweep_every: int = 1000):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets: Dict[Hashable, TokenBucket] = {}
+        self.sweep_every = sweep_every
+        self.calls = 0
+
+    def get(self, key: Hashable, now: float) -> TokenBucket:
+        """Get (or create) the key's bucket"""
+        self.calls += 1
+        if self.calls >= self.sweep_every:
+            self.calls = 0
+            self.sweep(now)
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.capacity, now)
+        return bucket
+
+    def sweep(self, now: float):
+        """Drop buckets that have refilled completely - they're equivalent to new ones"""
+        idle_after = self.capacity / self.rate
+        self.buckets = {
+            key: bucket for key, bucket in self.buckets.items()
+            if now - bucket.updated < idle_after
+        }
+
+
+class AdmissionController:
+    """Decides whether a command may run, based on rate limits and current load"""
+
+    def __init__(
+        self,
+        user_limit: Tuple[float, float],
+        guild_limit: Tuple[float, float],
+        global_limit: Tuple[float, float],
+        sheddable: Iterable[str] = (),
+        max_loop_lag: float = 0.25,
+        max_db_queue: int = 50,
+        loop_lag: Callable[[], float] = lambda: 0.0,
+        db_queue: Callable[[], int] = lambda: 0,
+        exempt: Callable[[int], bool] = lambda user_id: False
+    ):
+        self.users = BucketMap(*user_limit)
+        self.guilds = BucketMap(*guild_limit)
+        self.global_bucket = TokenBucket(*global_limit, now=time.monotonic())
+        self.sheddable = set(sheddable)
+        self.max_loop_lag = max_loop_lag
+        self.max_db_queue = max_db_queue
+        self.loop_lag = loop_lag
+        self.db_queue = db_queue
+        self.exempt = exempt
+        self.notified: Dict[int, float] = {}
+
+    def overloaded(self) -> bool:
+        """Whether the loop or the database is currently behind"""
+        return self.loop_lag() > self.max_loop_lag or self.db_queue() > self.max_db_queue
+
+    def _reject(self, reason: str, retry_after: float = 0.0):
+        ADMISSION_REJECTIONS.inc(reason=reason)
+        raise AdmissionRejected(reason, retry_after)
+
+    def check(self, ctx: commands.Context) -> bool:
+        """Global bot check - raises AdmissionRejected if the command should not run"""
+        if self.exempt(ctx.author.id):
+            return True
+
+        # shed the cheap-to-skip commands first when we're struggling
+        if ctx.command and ctx.command.qualified_name in self.sheddable and self.overloaded():
+            self._reject('shed', 5.0)
+
+        now = time.monotonic()
+        buckets = [('user', self.users.get(ctx.author.id, now))]
+        if ctx.guild is not None:
+            buckets.append(('guild', self.guilds.get(ctx.guild.id, now)))
+        buckets.append(('global', self.global_bucket))
+
+        # check every bucket before taking from any, so a guild or global
+        # rejection doesn't cost the user a token for a command that never ran
+        for reason, bucket in buckets:
+            retry_after = bucket.wait_time(now)
+            if retry_after:
+                self._reject(reason, retry_after)
+
+        for _, bucket in buckets:
+            bucket.take()
+
+        return True
+
+    def should_notify(self, user_id: int, retry_after: float) -> bool:
+        """Only answer a rejected user once per rejection window so spam stays cheap"""
+        now = time.monotonic()
+        if self.notified.get(user_id, 0) > now:
+            return False
+
+        if len(self.notified) > 10000:
+            self.notified = {uid: until for uid, until in self.notified.items() if until > now}
+        self.notified[user_id] = now + max(retry_after, 1.0)
+        return True
@@ -0,0 +1,130 @@
+"""
+Startup profiling - per-module import times and bot startup phases
+
+This module must not import anything from the bot (or discord): main.py loads
+it by path before the first heavy import so the import timer sees everything.
+"""
+
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class ImportTimer:
+    """Times first imports by wrapping builtins.__import__, keeping the nesting"""
+
+    def __init__(self):
+        self.stack: List[str] = []
+        # (import chain, cumulative seconds) in completion order
+        self.records: List[Tuple[Tuple[str, ...], float]] = []
+        self.original = None
+
+    def install(self):
+        self.original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self.original is not None:
+            builtins.__import__ = self.original
+            self.original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # already imported modules cost a dict lookup, don't record them
+        if level == 0 and name in sys.modules:
+            return self.original(name, globals, locals, fromlist, level)
+
+        label = name
+        if level:
+            package = (globals or {}).get('__package__') or ''
+            label = f"{package}.{name}" if name else package
+
+        self.stack.append(label)
+        start = time.perf_counter()
+        try:
+            return self.original(name, globals, locals, fromlist, level)
+        finally:
+            self.records.append((tuple(self.stack), time.perf_counter() - start))
+            self.stack.pop()
+
+    def cumulative(self) -> Dict[str, float]:
+        """Cumulative import time per module (including what it imported)"""
+        totals: Dict[str, float] = {}
+        for chain, elapsed in self.records:
+            totals[chain[-1]] = totals.get(chain[-1], 0.0) + elapsed
+        return totals
+
+    def folded(self, root: str = 'imports') -> List[str]:
+        """Self time per import chain in the folded-stack format flamegraph tools read"""
+        children: Dict[Tuple[str, ...], float] = {}
+        for chain, elapsed in self.records:
+            parent = chain[:-1]
+            children[parent] = children.get(parent, 0.0) + elapsed
+
+        lines = []
+        for chain, elapsed in self.records:
+            self_time = max(0.0, elapsed - children.get(chain, 0.0))
+            micros = int(self_time * 1_000_000)
+            if micros:
+                lines.append(f"{root};{';'.join(chain)} {micros}")
+        return lines
+
+
+class StartupProfiler:
+    """Collects import times and named startup phases, then reports them"""
+
+    def __init__(self, started: float, output: Optional[str] = None):
+        self.started = started
+        self.output = output
+        self.imports = ImportTimer()
+        self.phases: List[Tuple[str, float, float]] = []  # (name, offset, duration)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a startup phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.started, time.perf_counter() - start))
+
+    def mark(self, name: str):
+        """Record a point in time as a zero-length phase"""
+        self.phases.append((name, time.perf_counter() - self.started, 0.0))
+
+    def imports_done(self):
+        """Record how long the entry point's imports took (cogs keep importing later)"""
+        self.phases.append(('main.py imports', 0.0, time.perf_counter() - self.started))
+
+    def finish(self):
+        """Stop timing imports and write the folded stacks if requested"""
+        self.imports.uninstall()
+        if self.output:
+            with open(self.output, 'w', encoding='utf-8') as f:
+                f.write("\n".join(self.folded()) + "\n")
+
+    def report(self, top: int = 25) -> List[str]:
+        """Sorted breakdown of phases and the slowest imports"""
+        lines = ["Startup phases (slowest first):"]
+        for name, offset, duration in sorted(self.phases, key=lambda phase: phase[2], reverse=True):
+            if duration:
+                lines.append(f"  {duration * 1000:>10.1f}ms  {name}  (at {offset * 1000:.0f}ms)")
+        for name, offset, duration in self.phases:
+            if not duration:
+                lines.append(f"  {name} at {offset * 1000:.0f}ms")
+
+        lines.append(f"Slowest imports (cumulative, top {top}):")
+        cumulative = sorted(self.imports.cumulative().items(), key=lambda item: item[1], reverse=True)
+        for module, elapsed in cumulative[:top]:
+            lines.append(f"  {elapsed * 1000:>10.1f}ms  {module}")
+        return lines
+
+    def folded(self) -> List[str]:
+        """Imports and phases as folded stacks"""
+        lines = self.imports.folded('startup;imports')
+        for name, _, duration in self.phases:
+            # imports are already broken down above
+            if name != 'main.py imports' and duration:
+                lines.append(f"startup;{name.replace(';', ',')} {int(duration * 1_000_000)}")
+        return lines
@@ -0,0 +1,214 @@
+"""
+Lightweight command tracing - a root span per invocation with child spans
+for Database methods and outbound Discord requests
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from discord.webhook.async_ import AsyncWebhookAdapter
+
+logger = logging.getLogger('EconomyBot.Tracing')
+
+# span that new child spans attach to, per task
+current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """A timed operation and the operations it contained"""
+
+    __slots__ = ('name', 'start', 'end', 'children', 'attributes', 'wait')
+
+    def __init__(self, name: str, wait: bool = False, **attributes):
+        self.name = name
+        self.wait = wait
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List['Span'] = []
+        self.attributes: Dict[str, Any] = attributes
+
+    @property
+    def duration(self) -> float:
+        """Seconds between start and end (or now, if still open)"""
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent in wait spans (user think time) below this span"""
+        if self.wait:
+            return self.duration
+        return sum(child.wait_time for child in self.children)
+
+    @property
+    def active_time(self) -> float:
+        """Duration minus time spent waiting on the user"""
+        return self.duration - self.wait_time
+
+    def finish(self):
+        """Close the span"""
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        """Serialize with offsets in milliseconds relative to the root span"""
+        data = {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3),
+        }
+        if self.wait:
+            data['wait'] = True
+        if self.attributes:
+            data['attributes'] = self.attributes
+        if self.children:
+            data['children'] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+@contextmanager
+def span(name: str, wait: bool = False, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Time a block as a child of the current span.
+
+    Pass wait=True for blocks that wait on a human (confirmations, replies);
+    they are recorded but don't count towards the slow trace threshold.
+    Outside a sampled trace this is a single ContextVar lookup.
+    """
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, wait=wait, **attributes)
+    parent.children.append(child)
+    token = current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        current_span.reset(token)
+
+
+class Tracer:
+    """Samples command invocations and writes slow traces to a JSON lines file"""
+
+    def __init__(self, sample_rate: float = 0.0, slow_threshold: float = 1.0, path: str = 'traces.jsonl'):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.path = path
+        self.buffer: List[str] = []
+        self.writer: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def start_trace(self, ctx) -> Optional[Span]:
+        """Open the root span for an invocation (once; later calls reuse it)"""
+        if hasattr(ctx, 'trace'):
+            return ctx.trace
+
+        trace = None
+        if self.enabled and ctx.command is not None and random.random() < self.sample_rate:
+            trace = Span(
+                f"command {ctx.command.qualified_name}",
+                user_id=ctx.author.id,
+                guild_id=ctx.guild.id if ctx.guild else None,
+                slash=ctx.interaction is not None
+            )
+        ctx.trace = trace
+        return trace
+
+    def activate(self, ctx):
+        """Make the invocation's root span current in the task running the command"""
+        trace = self.start_trace(ctx)
+        if trace is not None:
+            current_span.set(trace)
+
+    def finish_trace(self, ctx, status: str):
+        """Close the root span and keep it if it was slow"""
+        trace = getattr(ctx, 'trace', None)
+        if trace is None or trace.end is not None:
+            return
+
+        trace.finish()
+        trace.attributes['status'] = status
+        trace.attributes['active_ms'] = round(trace.active_time * 1000, 3)
+        if trace.active_time >= self.slow_threshold:
+            self.write(trace)
+
+    def write(self, trace: Span):
+        """Queue a finished trace for the background writer"""
+        record = {'timestamp': time.time(), **trace.to_dict(trace.start)}
+        self.buffer.append(json.dumps(record, default=str) + "\n")
+
+        if self.writer is None or self.writer.done():
+            self.writer = asyncio.create_task(self.flush())
+
+    def _append(self, lines: List[str]):
+        """Blocking file append, run off the event loop"""
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+        except OSError as e:
+            logger.error(f"Failed to write traces to {self.path}: {e}")
+
+    async def flush(self):
+        """Write every buffered trace from a worker thread"""
+        loop = asyncio.get_running_loop()
+        while self.buffer:
+            lines, self.buffer = self.buffer, []
+            await loop.run_in_executor(None, self._append, lines)
+
+
+def _traced_method(name: str, method):
+    """Wrap a bound Database coroutine method in a child span"""
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with span(f"db.{name}"):
+            return await method(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument_database(db) -> None:
+    """Give every public coroutine method of a Database instance its own span"""
+    for name in dir(type(db)):
+        if name.startswith('_') or name == 'connect':
+            continue
+
+        method = getattr(db, name)
+        if asyncio.iscoroutinefunction(method):
+            setattr(db, name, _traced_method(name, method))
+
+
+def instrument_discord(bot) -> None:
+    """Trace every REST call - bot HTTP requests and interaction/webhook responses"""
+    http_request = bot.http.request
+
+    @functools.wraps(http_request)
+    async def request(route, **kwargs):
+        with span(f"discord {route.method} {route.path}"):
+            return await http_request(route, **kwargs)
+
+    bot.http.request = request
+
+    # slash command responses bypass bot.http and go through the webhook adapter
+    if not getattr(AsyncWebhookAdapter.request, '__traced__', False):
+        webhook_request = AsyncWebhookAdapter.request
+
+        @functools.wraps(webhook_request)
+        async def adapter_request(self, route, *args, **kwargs):
+            with span(f"discord {route.method} {route.path}"):
+                return await webhook_request(self, route, *args, **kwargs)
+
+        adapter_request.__traced__ = True
+        AsyncWebhookAdapter.request = adapter_request
@@ -0,0 +1,258 @@
+"""
+Whole-economy valuation - net worth of every user in one pass
+
+The inventory is read as a sparse user x item quantity matrix (COO rows in
+primary key order) and multiplied by the catalog's price vector. NumPy does
+that in a few vectorized operations when it is installed; otherwise a plain
+loop over the same arrays gives identical results, just slower.
+
+Snapshots feed the leaderboard, the admin economy stats and a dupe check
+that flags users whose net worth jumped between two snapshots.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from array import array
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+from utils import catalog
+from utils.metrics import REGISTRY
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger('EconomyBot.Valuation')
+
+ECONOMY_NET_WORTH = REGISTRY.gauge(
+    'economybot_economy_net_worth',
+    'Total net worth (wallets plus inventories) at the last valuation'
+)
+VALUATION_SECONDS = REGISTRY.gauge(
+    'economybot_valuation_seconds',
+    'Time the last whole-economy valuation took'
+)
+NET_WORTH_JUMPS = REGISTRY.counter(
+    'economybot_net_worth_jumps_total',
+    'Users whose net worth grew more than DUPE_ALERT_GAIN between two valuations'
+)
+SNAPSHOT_READS = REGISTRY.counter(
+    'economybot_valuation_snapshot_total',
+    'Reads of the valuation snapshot, by whether there was one',
+    ('result',)
+)
+
+
+class Valuation:
+    """One snapshot: net worth per user, item supply and summary statistics"""
+
+    __slots__ = ('user_ids', 'net_worth', 'ranking', 'supply', 'stats', 'taken_at', 'elapsed', 'backend')
+
+    def __init__(self, user_ids, net_worth, ranking, supply: Dict[int, int], taken_at: float, backend: str):
+        # user_ids ascending, net_worth parallel to it, ranking = indices by net worth descending
+        self.user_ids = user_ids
+        self.net_worth = net_worth
+        self.ranking = ranking
+        self.supply = supply
+        self.taken_at = taken_at
+        self.backend = backend
+        self.elapsed = 0.0
+        self.stats = self._statistics()
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def leaderboard(self, limit: int = 10, offset: int = 0) -> List[Tuple[int, int]]:
+        """(user_id, net worth) by rank"""
+        return [
+            (int(self.user_ids[i]), int(self.net_worth[i]))
+            for i in self.ranking[offset:offset + limit]
+        ]
+
+    def _statistics(self) -> Dict[str, float]:
+        n = len(self.user_ids)
+        if not n:
+            return {'users': 0, 'total': 0}
+
+        # ascending net worth
+        top = max(1, n // 100)
+        if np is not None:
+            ordered = self.net_worth[self.ranking[::-1]]
+            total = int(ordered.sum())
+            weighted = float((np.arange(1, n + 1, dtype=np.float64) * ordered).sum())
+            top_share = int(ordered[-top:].sum())
+        else:
+            ordered = [self.net_worth[i] for i in reversed(self.ranking)]
+            total = sum(ordered)
+            weighted = sum(rank * value for rank, value in enumerate(ordered, 1))
+            top_share = sum(ordered[-top:])
+
+        return {
+            'users': n,
+            'total': total,
+            'mean': total / n,
+            'median': int(ordered[n // 2]),
+            'p99': int(ordered[min(n - 1, n * 99 // 100)]),
+            'top_1pct_share': top_share / total if total else 0.0,
+            # 0 = everyone equal, 1 = one user owns everything
+            'gini': (2 * weighted / (n * total) - (n + 1) / n) if total > 0 else 0.0,
+        }
+
+    def jumps(self, previous: 'Valuation', min_gain: int) -> List[Tuple[int, int, int]]:
+        """(user_id, before, after) for users who gained at least `min_gain` since `previous`"""
+        if np is not None:
+            index = np.searchsorted(previous.user_ids, self.user_ids)
+            index = np.minimum(index, max(len(previous.user_ids) - 1, 0))
+            if len(previous.user_ids):
+                known = previous.user_ids[index] == self.user_ids
+                before = np.where(known, previous.net_worth[index], 0)
+            else:
+                before = np.zeros(len(self.user_ids), dtype=np.int64)
+            flagged = np.flatnonzero(self.net_worth - before >= min_gain)
+            return [(int(self.user_ids[i]), int(before[i]), int(self.net_worth[i])) for i in flagged]
+
+        earlier = dict(zip(previous.user_ids, previous.net_worth))
+        return [
+            (int(user_id), int(earlier.get(user_id, 0)), int(worth))
+            for user_id, worth in zip(self.user_ids, self.net_worth)
+            if worth - earlier.get(user_id, 0) >= min_gain
+        ]
+
+
+def _read(db_path: str) -> Tuple[list, list]:
+    """Wallets and inventory rows, both sorted by user id, from one read transaction"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        conn.execute("BEGIN")
+        wallets = conn.execute("SELECT user_id, wallet FROM balances ORDER BY user_id").fetchall()
+        holdings = conn.execute(
+            "SELECT user_id, item_id, quantity FROM inventory WHERE quantity > 0 ORDER BY user_id"
+        ).fetchall()
+        conn.rollback()
+    finally:
+        conn.close()
+    return wallets, holdings
+
+
+def _value_numpy(wallets: list, holdings: list, prices: array, taken_at: float) -> Valuation:
+    w = np.fromiter(chain.from_iterable(wallets), dtype=np.int64, count=2 * len(wallets)).reshape(-1, 2)
+    h = np.fromiter(chain.from_iterable(holdings), dtype=np.int64, count=3 * len(holdings)).reshape(-1, 3)
+
+    # both inputs are sorted by user, so a merge and a dedupe beat np.union1d's hashing
+    users = np.concatenate((w[:, 0], h[:, 0]))
+    users.sort(kind='stable')
+    users = users[np.concatenate(([True], users[1:] != users[:-1]))] if len(users) else users
+
+    net = np.zeros(len(users), dtype=np.int64)
+    net[np.searchsorted(users, w[:, 0])] = w[:, 1]
+
+    # price vector with a trailing zero for ids the catalog doesn't know
+    price_vector = np.zeros(len(prices) + 1, dtype=np.int64)
+    price_vector[:len(prices)] = np.frombuffer(prices, dtype=np.int64)
+    item_ids = np.minimum(h[:, 1], len(prices))
+    values = h[:, 2] * price_vector[item_ids]
+
+    supply = {}
+    if len(h):
+        # rows arrive grouped by user, so each user's items are one contiguous run
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(h[:, 0])) + 1))
+        net[np.searchsorted(users, h[starts, 0])] += np.add.reduceat(values, starts)
+
+        owned, column = np.unique(h[:, 1], return_inverse=True)
+        totals = np.zeros(len(owned), dtype=np.int64)
+        np.add.at(totals, column, h[:, 2])
+        supply = dict(zip(owned.tolist(), totals.tolist()))
+
+    ranking = np.argsort(-net, kind='stable')
+    return Valuation(users, net, ranking, supply, taken_at, 'numpy')
+
+
+def _value_python(wallets: list, holdings: list, prices: array, taken_at: float) -> Valuation:
+    net: Dict[int, int] = dict(wallets)
+    supply: Dict[int, int] = {}
+    size = len(prices)
+    for user_id, item_id, quantity in holdings:
+        net[user_id] = net.get(user_id, 0) + (prices[item_id] * quantity if item_id < size else 0)
+        supply[item_id] = supply.get(item_id, 0) + quantity
+
+    users = array('q', sorted(net))
+    worth = array('q', (net[user_id] for user_id in users))
+    ranking = sorted(range(len(users)), key=worth.__getitem__, reverse=True)
+    return Valuation(users, worth, ranking, supply, taken_at, 'python')
+
+
+def value_economy(db_path: str, prices: array) -> Valuation:
+    """Read the database and value every user (blocking, run it in an executor)"""
+    start = time.perf_counter()
+    taken_at = time.time()
+    wallets, holdings = _read(db_path)
+    valuation = (_value_numpy if np is not None else _value_python)(wallets, holdings, prices, taken_at)
+    valuation.elapsed = time.perf_counter() - start
+    return valuation
+
+
+class ValuationService:
+    """Keeps a recent valuation snapshot and checks each new one against the last"""
+
+    def __init__(self, interval: float = 300, alert_gain: int = 500_000_000):
+        self.interval = interval
+        self.alert_gain = alert_gain
+        self.latest: Optional[Valuation] = None
+        self.last_jumps: List[Tuple[int, int, int]] = []
+        self.task: Optional[asyncio.Task] = None
+        self._refreshing: Optional[asyncio.Future] = None
+
+    def snapshot(self) -> Optional[Valuation]:
+        """The latest valuation, counting reads that had to do without one"""
+        SNAPSHOT_READS.inc(result='miss' if self.latest is None else 'hit')
+        return self.latest
+
+    def start(self, db_path: str):
+        if self.interval > 0 and self.task is None:
+            self.task = asyncio.create_task(self._run(db_path), name='valuation')
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self, db_path: str):
+        while True:
+            try:
+                await self.refresh(db_path)
+            except Exception as e:
+                logger.error(f"Valuation failed: {e}", exc_info=e)
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self, db_path: str) -> Valuation:
+        """Take a new snapshot; concurrent callers share the one in progress"""
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh(db_path))
+        try:
+            return await asyncio.shield(self._refreshing)
+        finally:
+            if self._refreshing is not None and self._refreshing.done():
+                self._refreshing = None
+
+    async def _refresh(self, db_path: str) -> Valuation:
+        loop = asyncio.get_running_loop()
+        # copy the price table here, the stock slot changes under us otherwise
+        prices = array('q', catalog.catalog().prices)
+        valuation = await loop.run_in_executor(None, value_economy, db_path, prices)
+
+        previous = self.latest
+        if previous is not None:
+            self.last_jumps = await loop.run_in_executor(None, valuation.jumps, previous, self.alert_gain)
+            for user_id, before, after in self.last_jumps:
+                logger.warning(f"Net worth of {user_id} jumped from {before:,} to {after:,} since the last valuation")
+            NET_WORTH_JUMPS.inc(len(self.last_jumps))
+
+        self.latest = valuation
+        ECONOMY_NET_WORTH.set(valuation.stats['total'])
+        VALUATION_SECONDS.set(valuation.elapsed)
+        logger.info(f"Valued {len(valuation):,} users in {valuation.elapsed * 1000:.0f}ms ({valuation.backend})")
+        return valuation